@@ -0,0 +1,275 @@
+import frappe
+
+import hashlib
+
+from frappe.utils import cint, getdate, now_datetime, today
+
+from saudization_dashboard import movement, snapshot
+
+
+COUNTER_DOCTYPE = "Saudization Headcount Counter"
+# Day the counters were last reconciled for; they are only read on that day.
+COUNTERS_DAY_KEY = "saudization_dashboard:counters_day"
+
+# Employee field behind each snapshot / counter dimension.
+DIMENSION_FIELDS = {
+    "branch": "branch",
+    "department": "department",
+    "designation": "designation",
+    "nationality_group": "saudization_nationality_group",
+}
+COUNTER_FIELDS = ["name", "creation", "modified", "owner", "modified_by",
+                  "company", *DIMENSION_FIELDS, "total_employees", "saudi_employees"]
+
+
+def incremental_enabled():
+    """True when Employee changes update the counters and month buckets in place."""
+    try:
+        return bool(int(frappe.db.get_single_value("Saudization Settings", "incremental_aggregation") or 0))
+    except Exception:
+        return False
+
+
+def counter_name(company, dims):
+    key = "\x1f".join(str(v or "") for v in (company, *dims))
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+# --- deltas --------------------------------------------------------------------------------
+
+
+def _footprint(doc, month_ends, day, since=None):
+    """What one employee adds: ({(company, dims): [1, saudi]} today, {(month_end, company, dims): [1, saudi]})."""
+    if doc is None or not doc.get("company"):
+        return {}, {}
+
+    joined = getdate(doc.get("date_of_joining")) if doc.get("date_of_joining") else None
+    relieved = getdate(doc.get("relieving_date")) if doc.get("relieving_date") else None
+    if joined and relieved and relieved <= joined:
+        return {}, {}
+
+    def counted(d):
+        return (not joined or joined <= d) and (not relieved or relieved > d)
+
+    company = doc.get("company")
+    dims = tuple(doc.get(f) or None for f in DIMENSION_FIELDS.values())
+    value = [1, 1 if cint(doc.get("is_saudi")) == 1 else 0]
+
+    current = {(company, dims): value} if counted(day) else {}
+    months = {(m, company, dims): value for m in month_ends if (since is None or m >= since) and counted(m)}
+    return current, months
+
+
+def _subtract(new, old):
+    out = {}
+    for key, (total, saudi) in new.items():
+        out[key] = [total, saudi]
+    for key, (total, saudi) in old.items():
+        acc = out.setdefault(key, [0, 0])
+        acc[0] -= total
+        acc[1] -= saudi
+    return {k: v for k, v in out.items() if v != [0, 0]}
+
+
+def _upsert(doctype, fields, rows, names):
+    """Add (total, saudi) deltas to existing rows, creating missing ones; drop rows that reach zero."""
+    if not rows:
+        return
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(fields)) + ")"] * len(rows))
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tab{doctype}` ({", ".join(f"`{f}`" for f in fields)})
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE
+          total_employees = total_employees + VALUES(total_employees),
+          saudi_employees = saudi_employees + VALUES(saudi_employees),
+          modified = VALUES(modified),
+          modified_by = VALUES(modified_by)
+        """,
+        tuple(v for row in rows for v in row),
+    )
+    frappe.db.sql(
+        f"DELETE FROM `tab{doctype}` WHERE name IN %(names)s AND total_employees <= 0",
+        {"names": tuple(names)},
+    )
+
+
+def apply_employee_delta(doc, method=None):
+    """Employee on_update / on_trash: move the employee's +1 between counters and month buckets.
+
+    Runs in the saving transaction. Returns the companies it could not update in place (their
+    snapshot is not current for this window, or a ledger replay needs the full rebuild), which
+    the caller queues for a snapshot refresh as before.
+    """
+    if not incremental_enabled():
+        return None
+
+    if method == "on_trash":
+        before, after = doc, None
+    else:
+        before, after = doc.get_doc_before_save(), doc
+
+    day = getdate(today())
+    month_ends = snapshot._month_ends(snapshot._snapshot_months())
+    since = None
+    fallback = set()
+    if movement.ledger_enabled() and before is not None and after is not None:
+        if (movement._date(before.get("date_of_joining")) != movement._date(after.get("date_of_joining"))
+                or movement.classification_changed(before, after)):
+            # Joining-date and nationality corrections rewrite existing ledger rows; recount instead.
+            fallback.update(c for c in (before.get("company"), after.get("company")) if c)
+        else:
+            # Changes only hold from their effective date on in the ledger.
+            since = movement._change_date(after, before)
+
+    old_current, old_months = _footprint(before, month_ends, day, since)
+    new_current, new_months = _footprint(after, month_ends, day, since)
+
+    now, user = now_datetime(), frappe.session.user
+    counters = _subtract(new_current, old_current)
+    _upsert(
+        COUNTER_DOCTYPE, COUNTER_FIELDS,
+        [[counter_name(c, dims), now, now, user, user, c, *dims, t, s] for (c, dims), (t, s) in counters.items()],
+        [counter_name(c, dims) for c, dims in counters],
+    )
+
+    buckets = {}
+    for (m, company, dims), delta in _subtract(new_months, old_months).items():
+        if company in fallback:
+            continue
+        if not snapshot.is_current(company, month_ends):
+            fallback.add(company)
+            continue
+        buckets[(m, company, dims)] = delta
+    _upsert(
+        snapshot.SNAPSHOT_DOCTYPE, snapshot.SNAPSHOT_FIELDS,
+        [[snapshot.bucket_name(m, c, dims), now, now, user, user, m, c, *dims, t, s]
+         for (m, c, dims), (t, s) in buckets.items()],
+        [snapshot.bucket_name(m, c, dims) for m, c, dims in buckets],
+    )
+    return fallback
+
+
+# --- reads ---------------------------------------------------------------------------------
+
+
+def current_counts(companies, branch=None):
+    """{(company, branch or '' / None for the company total): [total, saudi]} as of today.
+
+    None when the counters are not reconciled for today (first day, or the nightly job failed).
+    """
+    if not incremental_enabled() or frappe.cache().get_value(COUNTERS_DAY_KEY) != today():
+        return None
+
+    where, params = ["company IN %(companies)s"], {"companies": tuple(companies)}
+    if branch:
+        where.append("branch = %(branch)s")
+        params["branch"] = branch
+    out = {}
+    for company, b, total, saudi in frappe.db.sql(
+        f"""
+        SELECT company, IFNULL(branch, ''), SUM(total_employees), SUM(saudi_employees)
+        FROM `tab{COUNTER_DOCTYPE}`
+        WHERE {' AND '.join(where)}
+        GROUP BY company, IFNULL(branch, '')
+        """,
+        params,
+    ):
+        for key in ((company, b), (company, None)):
+            acc = out.setdefault(key, [0, 0])
+            acc[0] += int(total or 0)
+            acc[1] += int(saudi or 0)
+    return out
+
+
+# --- reconciliation ------------------------------------------------------------------------
+
+
+def _recount(company, day):
+    dims = ", ".join(f"e.{f}" for f in DIMENSION_FIELDS.values())
+    rows = frappe.db.sql(
+        f"""
+        SELECT {dims}, COUNT(*) AS total, SUM(IF(IFNULL(e.is_saudi,0)=1,1,0)) AS saudi
+        FROM `tabEmployee` e
+        WHERE e.company = %(company)s
+          AND (e.date_of_joining IS NULL OR e.date_of_joining <= %(day)s)
+          AND (e.relieving_date IS NULL OR e.relieving_date > %(day)s)
+        GROUP BY {dims}
+        """,
+        {"company": company, "day": day},
+    )
+    counts = {}
+    for r in rows:
+        key = tuple(v or None for v in r[:-2])
+        acc = counts.setdefault(key, [0, 0])
+        acc[0] += int(r[-2] or 0)
+        acc[1] += int(r[-1] or 0)
+    return {counter_name(company, dims): [*dims, t, s] for dims, (t, s) in counts.items()}
+
+
+def _stored_counters(company):
+    fields = ", ".join(DIMENSION_FIELDS)
+    return {
+        r[0]: list(r[1:])
+        for r in frappe.db.sql(
+            f"SELECT name, {fields}, total_employees, saudi_employees FROM `tab{COUNTER_DOCTYPE}` WHERE company = %(company)s",
+            {"company": company},
+        )
+    }
+
+
+def _drift(expected, stored):
+    return sum(1 for name in set(expected) | set(stored) if expected.get(name) != stored.get(name))
+
+
+def reconcile_company(company, day=None, month_ends=None):
+    """Recount one company; rewrite its counters and month buckets where they drifted."""
+    day = getdate(day or today())
+    now, user = now_datetime(), frappe.session.user
+
+    expected = _recount(company, day)
+    counter_drift = _drift(expected, _stored_counters(company))
+    if counter_drift:
+        frappe.db.delete(COUNTER_DOCTYPE, {"company": company})
+        frappe.db.bulk_insert(COUNTER_DOCTYPE, fields=COUNTER_FIELDS, values=[
+            (name, now, now, user, user, company, *row) for name, row in expected.items()
+        ])
+
+    snapshot_drift = 0
+    if month_ends and frappe.db.table_exists("tab" + snapshot.SNAPSHOT_DOCTYPE):
+        buckets = snapshot.compute_company_snapshot(company, month_ends)
+        snapshot_drift = _drift(buckets, snapshot.stored_company_snapshot(company))
+        if snapshot_drift or not snapshot.is_current(company, month_ends):
+            snapshot.write_company_snapshot(company, buckets, month_ends)
+    return counter_drift, snapshot_drift
+
+
+def reconcile():
+    """Nightly job: verify counters and month buckets against a full recount and repair drift."""
+    if not incremental_enabled() or not frappe.db.table_exists("tab" + COUNTER_DOCTYPE):
+        return
+
+    day = getdate(today())
+    month_ends = snapshot._month_ends(snapshot._snapshot_months()) if snapshot.snapshot_enabled() else None
+    companies = set(frappe.db.sql_list("SELECT DISTINCT company FROM `tabEmployee` WHERE IFNULL(company,'') != ''"))
+    companies.update(frappe.db.sql_list(f"SELECT DISTINCT company FROM `tab{COUNTER_DOCTYPE}`"))
+
+    drifted, failed = {}, False
+    for company in sorted(companies):
+        try:
+            counter_drift, snapshot_drift = reconcile_company(company, day, month_ends)
+            frappe.db.commit()
+        except Exception:
+            frappe.db.rollback()
+            failed = True
+            frappe.log_error(frappe.get_traceback(), f"Saudization reconciliation failed for {company}")
+            continue
+        if counter_drift or snapshot_drift:
+            drifted[company] = {"counters": counter_drift, "snapshot": snapshot_drift}
+
+    if not failed:
+        # Counters now describe `day`; deltas keep them current until the next run.
+        frappe.cache().set_value(COUNTERS_DAY_KEY, str(day), expires_in_sec=2 * 24 * 60 * 60)
+    if drifted:
+        frappe.logger("saudization_dashboard").warning(f"reconciliation repaired drift: {drifted}")
+    return drifted
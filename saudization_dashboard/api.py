@@ -1,9 +1,17 @@
 import frappe
 from frappe import _
 
-import csv
-import io
-from frappe.utils.file_manager import save_file
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+from saudization_dashboard import aggregates, export, hierarchy, movement, parallel, snapshot
+from saudization_dashboard.cache import UI_SCOPE, cached
+from saudization_dashboard.cube import SALARY_BANDS, get_cube
+from saudization_dashboard.policy import get_resolver
+from saudization_dashboard.profiling import profiled
+from saudization_dashboard.replica import read_only
+from saudization_dashboard.search import RANK_SQL, search_condition
 
 
 def _get_theme_doc():
@@ -82,262 +90,105 @@ def get_navigation():
     return _get_navigation_doc()
 
 
-def _filters_to_where(filters):
-    clauses = ["e.status='Active'"]
-    params = {}
+@frappe.whitelist()
+@cached(scope=UI_SCOPE)
+def get_bootstrap():
+    """Theme and navigation in one call, cached until either singleton is saved."""
+    return {"theme": _get_theme_doc(), "navigation": _get_navigation_doc()}
 
-    company = filters.get('company')
+
+def _require_company(company):
+    company = (company or '').strip()
     if not company:
         raise frappe.ValidationError(_("Company is required"))
-    clauses.append("e.company=%(company)s")
-    params['company'] = company
-
-    for key, field in [
-        ('department', 'department'),
-        ('designation', 'designation'),
-        ('nationality_group', 'saudization_nationality_group'),
-    ]:
-        val = filters.get(key)
-        if val:
-            clauses.append(f"e.{field}=%({key})s")
-            params[key] = val
-
-    return " AND ".join(clauses), params
-
-
-def _latest_salary_cte():
-    return """
-    WITH latest_salary AS (
-      SELECT ssa.employee, ssa.base
-      FROM `tabSalary Structure Assignment` ssa
-      INNER JOIN (
-        SELECT employee, MAX(from_date) AS max_from_date
-        FROM `tabSalary Structure Assignment`
-        WHERE docstatus = 1
-        GROUP BY employee
-      ) x ON x.employee = ssa.employee AND x.max_from_date = ssa.from_date
-      WHERE ssa.docstatus = 1
-    )
-    """
+    return company
 
 
-def _get_active_policy(company):
-    # Returns dict with name and default_target_percent or None
-    row = frappe.db.sql(
-        """
-        SELECT name, default_target_percent
-        FROM `tabSaudization Policy`
-        WHERE company=%s
-          AND effective_from <= CURDATE()
-          AND (effective_to IS NULL OR effective_to >= CURDATE())
-        ORDER BY effective_from DESC
-        LIMIT 1
-        """,
-        (company,),
-        as_dict=True,
-    )
-    return row[0] if row else None
+def _active_policy(company, as_on=None):
+    """CompiledPolicy in force for `company` on `as_on` (default today), from the cached resolver."""
+    return get_resolver().policy(company, _getdate(as_on))
 
 
-def _get_policy_lines(policy_name, dimension_type=None):
-    if not policy_name:
-        return []
-    q = """
-        SELECT dimension_type, department, designation, nationality_group, target_percent, IFNULL(min_headcount, 0) AS min_headcount
-        FROM `tabSaudization Policy Line`
-        WHERE parent=%s
-    """
-    params = [policy_name]
-    if dimension_type:
-        q += " AND dimension_type=%s"
-        params.append(dimension_type)
-    return frappe.db.sql(q, tuple(params), as_dict=True)
+# The endpoints below answer from the company's in-memory workforce cube (cube.py): active
+# employees loaded once per company version, then sliced per filter without SQL.
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_kpis(company, department=None, designation=None, nationality_group=None):
-    where, params = _filters_to_where({
-        'company': company,
-        'department': department,
-        'designation': designation,
-        'nationality_group': nationality_group,
-    })
-
-    sql = _latest_salary_cte() + f"""
-    SELECT
-      COUNT(*) AS total_employees,
-      SUM(CASE WHEN e.is_saudi = 1 THEN 1 ELSE 0 END) AS saudi_employees,
-      SUM(CASE WHEN e.is_saudi = 0 THEN 1 ELSE 0 END) AS non_saudi_employees,
-      ROUND(100 * SUM(CASE WHEN e.is_saudi = 1 THEN 1 ELSE 0 END) / NULLIF(COUNT(*),0), 1) AS saudization_percent,
-
-      ROUND(AVG(CASE WHEN e.is_saudi = 1 THEN ls.base END), 0) AS avg_salary_saudi,
-      ROUND(AVG(CASE WHEN e.is_saudi = 0 THEN ls.base END), 0) AS avg_salary_non_saudi,
-
-      ROUND(AVG(CASE WHEN e.is_saudi = 1 THEN TIMESTAMPDIFF(MONTH, e.date_of_joining, CURDATE()) END)/12, 1) AS avg_tenure_years_saudi,
-      ROUND(AVG(CASE WHEN e.is_saudi = 0 THEN TIMESTAMPDIFF(MONTH, e.date_of_joining, CURDATE()) END)/12, 1) AS avg_tenure_years_non_saudi
-    FROM `tabEmployee` e
-    LEFT JOIN latest_salary ls ON ls.employee = e.name
-    WHERE {where}
-    """
-
-    row = frappe.db.sql(sql, params, as_dict=True)[0]
-
-    policy = _get_active_policy(company)
-    row['target_percent'] = policy.get('default_target_percent') if policy else None
-    row['variance_percent'] = (row['saudization_percent'] - row['target_percent']) if row.get('target_percent') is not None else None
-    return row
+    cube = get_cube(_require_company(company))
+    mask = cube.mask(department=department, designation=designation, nationality_group=nationality_group)
+    return _bundle_kpis(cube, mask)
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_nationality_group_breakdown(company, department=None, designation=None):
-    where, params = _filters_to_where({
-        'company': company,
-        'department': department,
-        'designation': designation,
-        'nationality_group': None,
-    })
-    sql = f"""
-    SELECT
-      e.saudization_nationality_group AS label,
-      COUNT(*) AS value
-    FROM `tabEmployee` e
-    WHERE {where}
-    GROUP BY e.saudization_nationality_group
-    ORDER BY value DESC
-    """
-    rows = frappe.db.sql(sql, params, as_dict=True)
-    return rows
+    cube = get_cube(_require_company(company))
+    return _bundle_nationality(cube, cube.mask(department=department, designation=designation))
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_designation_saudization(company, department=None, min_headcount=3):
-    where, params = _filters_to_where({
-        'company': company,
-        'department': department,
-        'designation': None,
-        'nationality_group': None,
-    })
-    params['min_headcount'] = int(min_headcount or 0)
-    sql = f"""
-    SELECT
-      e.designation AS label,
-      ROUND(100 * SUM(CASE WHEN e.is_saudi=1 THEN 1 ELSE 0 END)/NULLIF(COUNT(*),0), 1) AS value,
-      COUNT(*) AS headcount
-    FROM `tabEmployee` e
-    WHERE {where}
-    GROUP BY e.designation
-    HAVING COUNT(*) >= %(min_headcount)s
-    ORDER BY value ASC, headcount DESC
-    LIMIT 15
-    """
-    return frappe.db.sql(sql, params, as_dict=True)
+    cube = get_cube(_require_company(company))
+    return _bundle_designation(cube, cube.mask(department=department), int(min_headcount or 0))
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_department_saudization(company, designation=None):
-    where, params = _filters_to_where({
-        'company': company,
-        'department': None,
-        'designation': designation,
-        'nationality_group': None,
-    })
-    sql = f"""
-    SELECT
-      e.department AS label,
-      SUM(CASE WHEN e.is_saudi=1 THEN 1 ELSE 0 END) AS saudi_count,
-      SUM(CASE WHEN e.is_saudi=0 THEN 1 ELSE 0 END) AS non_saudi_count,
-      ROUND(100 * SUM(CASE WHEN e.is_saudi=1 THEN 1 ELSE 0 END)/NULLIF(COUNT(*),0), 1) AS saudization_percent,
-      COUNT(*) AS headcount
-    FROM `tabEmployee` e
-    WHERE {where}
-    GROUP BY e.department
-    ORDER BY saudization_percent ASC, headcount DESC
-    LIMIT 20
-    """
-    return frappe.db.sql(sql, params, as_dict=True)
+    cube = get_cube(_require_company(company))
+    return _bundle_department(cube, cube.mask(designation=designation))
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_salary_band_saudization(company, department=None, designation=None):
-    where, params = _filters_to_where({
-        'company': company,
-        'department': department,
-        'designation': designation,
-        'nationality_group': None,
-    })
-    sql = _latest_salary_cte() + f"""
-    WITH emp AS (
-      SELECT e.name, e.is_saudi, IFNULL(ls.base,0) AS base
-      FROM `tabEmployee` e
-      LEFT JOIN latest_salary ls ON ls.employee = e.name
-      WHERE {where}
-    )
-    SELECT
-      CASE
-        WHEN base <= 5000 THEN 'Up to 5k'
-        WHEN base <= 10000 THEN '5k-10k'
-        WHEN base <= 15000 THEN '10k-15k'
-        ELSE '15k+'
-      END AS label,
-      ROUND(100 * SUM(CASE WHEN is_saudi=1 THEN 1 ELSE 0 END)/NULLIF(COUNT(*),0), 1) AS value,
-      COUNT(*) AS headcount
-    FROM emp
-    GROUP BY label
-    ORDER BY FIELD(label,'Up to 5k','5k-10k','10k-15k','15k+')
-    """
-    return frappe.db.sql(sql, params, as_dict=True)
+    cube = get_cube(_require_company(company))
+    return _bundle_salary_band(cube, cube.mask(department=department, designation=designation))
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_trend(company, department=None, designation=None, months_back=24):
-    where, params = _filters_to_where({
-        'company': company,
-        'department': department,
-        'designation': designation,
-        'nationality_group': None,
-    })
-    params['months_back'] = int(months_back or 24)
-    sql = f"""
-    SELECT
-      DATE_FORMAT(e.date_of_joining, '%Y-%m-01') AS label,
-      ROUND(100 * SUM(CASE WHEN e.is_saudi=1 THEN 1 ELSE 0 END)/NULLIF(COUNT(*),0), 1) AS value,
-      COUNT(*) AS hires_count
-    FROM `tabEmployee` e
-    WHERE {where}
-      AND e.date_of_joining IS NOT NULL
-      AND e.date_of_joining >= DATE_SUB(CURDATE(), INTERVAL %(months_back)s MONTH)
-    GROUP BY label
-    ORDER BY label
-    """
-    return frappe.db.sql(sql, params, as_dict=True)
+    cube = get_cube(_require_company(company))
+    return _bundle_trend(cube, cube.mask(department=department, designation=designation), months_back)
 
 
 @frappe.whitelist()
-def get_department_compliance(company, min_headcount=3):
-    # Actual vs targets by department (policy line overrides default target)
+@profiled
+@cached()
+@read_only
+def get_department_compliance(company, min_headcount=3, policy_min=1):
+    # Actual vs targets by department (policy line overrides default target).
+    # Policy lines can raise min_headcount per department; policy_min=0 lists every department.
     min_headcount = int(min_headcount or 0)
+    policy_min = int(policy_min if policy_min is not None else 1)
+    cube = get_cube(_require_company(company))
 
-    policy = _get_active_policy(company)
-    default_target = policy.get('default_target_percent') if policy else None
-    policy_name = policy.get('name') if policy else None
-    line_targets = _get_policy_lines(policy_name, dimension_type='Department')
-    target_by_dept = {l.get('department'): l.get('target_percent') for l in line_targets if l.get('department')}
-    min_by_dept = {l.get('department'): int(l.get('min_headcount') or 0) for l in line_targets if l.get('department')}
+    policy = _active_policy(cube.company)
+    default_target = policy.default_target_percent if policy else None
+    target_by_dept = policy.dept if policy else {}
+    min_by_dept = policy.dept_min if policy and policy_min else {}
 
-    rows = frappe.db.sql(
-        """
-        SELECT
-          e.department AS department,
-          COUNT(*) AS headcount,
-          ROUND(100 * SUM(CASE WHEN e.is_saudi=1 THEN 1 ELSE 0 END)/NULLIF(COUNT(*),0), 1) AS actual_percent
-        FROM `tabEmployee` e
-        WHERE e.status='Active' AND e.company=%s
-        GROUP BY e.department
-        ORDER BY actual_percent ASC, headcount DESC
-        """,
-        (company,),
-        as_dict=True,
-    )
+    rows = [
+        {'department': k, 'headcount': v[0], 'actual_percent': _percent(v[1], v[0])}
+        for k, v in cube.group('department', cube.mask()).items()
+    ]
+    rows.sort(key=lambda x: (x['actual_percent'], -x['headcount'], _sort_key_nulls_first(x['department'])))
 
     out = []
     for r in rows:
@@ -369,25 +220,12 @@ def get_department_compliance(company, min_headcount=3):
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_matrix(company, min_headcount=3):
-    min_headcount = int(min_headcount or 0)
-    rows = frappe.db.sql(
-        """
-        SELECT
-          e.department AS department,
-          e.designation AS designation,
-          COUNT(*) AS headcount,
-          ROUND(100 * SUM(CASE WHEN e.is_saudi=1 THEN 1 ELSE 0 END)/NULLIF(COUNT(*),0), 1) AS saudization_percent
-        FROM `tabEmployee` e
-        WHERE e.status='Active' AND e.company=%s
-        GROUP BY e.department, e.designation
-        HAVING COUNT(*) >= %s
-        ORDER BY e.department, saudization_percent ASC
-        """,
-        (company, min_headcount),
-        as_dict=True,
-    )
-    return rows
+    cube = get_cube(_require_company(company))
+    return _bundle_matrix(cube, cube.mask(), int(min_headcount or 0))
 
 
 # --------------------------
@@ -406,6 +244,9 @@ def _rows_to_chart(rows, series_name="Value", value_key="value", label_key="labe
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_actual_vs_target_overall(company, department=None, designation=None, nationality_group=None):
     # Reuse KPI function to compute actual; compare with active policy
     k = get_kpis(company, department=department, designation=designation, nationality_group=nationality_group)
@@ -418,14 +259,24 @@ def get_actual_vs_target_overall(company, department=None, designation=None, nat
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_saudization_by_designation(company, department=None, min_headcount=3):
     rows = get_designation_saudization(company, department=department, min_headcount=min_headcount)
     return _rows_to_chart(rows, series_name="Saudization %")
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_saudization_by_department(company, designation=None):
     rows = get_department_saudization(company, designation=designation)
+    return _department_chart(rows)
+
+
+def _department_chart(rows):
     # stacked bar: saudi and non-saudi counts
     labels = [r.get("label") for r in rows]
     saudi = [r.get("saudi_count") for r in rows]
@@ -440,51 +291,40 @@ def get_saudization_by_department(company, designation=None):
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_saudization_by_salary_band(company, department=None, designation=None):
     rows = get_salary_band_saudization(company, department=department, designation=designation)
     return _rows_to_chart(rows, series_name="Saudization %")
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_saudization_trend(company, department=None, designation=None, months_back=24):
     rows = get_trend(company, department=department, designation=designation, months_back=months_back)
     return _rows_to_chart(rows, series_name="Saudization %")
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_matrix_with_targets(company, min_headcount=3):
     # Returns rows with target and variance (Department+Designation overrides)
-    base_rows = get_matrix(company, min_headcount=min_headcount)
-    policy = _get_active_policy(company)
-    default_target = policy.get("default_target_percent") if policy else None
-
-    lines = _get_policy_lines(policy.get("name") if policy else None)
-    # Build lookup precedence: Dept+Designation > Designation > Department > Overall(default)
-    dept_desig = {}
-    desig = {}
-    dept = {}
-    for l in lines:
-        dt = l.get("dimension_type")
-        if dt == "Department+Designation" and l.get("department") and l.get("designation"):
-            dept_desig[(l["department"], l["designation"])] = l.get("target_percent")
-        elif dt == "Designation" and l.get("designation"):
-            desig[l["designation"]] = l.get("target_percent")
-        elif dt == "Department" and l.get("department"):
-            dept[l["department"]] = l.get("target_percent")
+    cube = get_cube(_require_company(company))
+    base_rows = _bundle_matrix(cube, cube.mask(), int(min_headcount or 0))
+    return _apply_matrix_targets(base_rows, _active_policy(cube.company))
+
 
+def _apply_matrix_targets(base_rows, policy):
+    # Precedence tables (Dept+Designation > Designation > Department > default) are precompiled
+    # on the policy.
     out = []
     for r in base_rows:
-        d = r.get("department")
-        g = r.get("designation")
-        t = None
-        if d and g and (d, g) in dept_desig:
-            t = dept_desig[(d, g)]
-        elif g and g in desig:
-            t = desig[g]
-        elif d and d in dept:
-            t = dept[d]
-        else:
-            t = default_target
+        t = policy.target_for(r.get("department"), r.get("designation")) if policy else None
         v = (r.get("saudization_percent") - t) if (t is not None and r.get("saudization_percent") is not None) else None
         out.append({
             **r,
@@ -493,6 +333,134 @@ def get_matrix_with_targets(company, min_headcount=3):
         })
     return out
 
+# ------------------------------
+# Dashboard bundle (HR analytics page, from the workforce cube)
+# ------------------------------
+
+def _round_half_up(value, digits):
+    """Python equivalent of SQL ROUND(value, digits); None passes through."""
+    if value is None:
+        return None
+    return float(Decimal(value).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+
+
+def _sort_key_nulls_first(value):
+    return (value is not None, value or '')
+
+
+def _bundle_kpis(cube, mask):
+    total, saudi, non_saudi = cube.totals(mask)
+
+    def avg_tenure(saudi_flag):
+        months = cube.avg_tenure_months(mask, saudi_flag)
+        return _round_half_up(months / 12, 1) if months is not None else None
+
+    out = {
+        'total_employees': total,
+        'saudi_employees': saudi if total else None,
+        'non_saudi_employees': non_saudi if total else None,
+        'saudization_percent': _percent(saudi, total),
+        'avg_salary_saudi': _round_half_up(cube.avg_salary(mask, 1), 0),
+        'avg_salary_non_saudi': _round_half_up(cube.avg_salary(mask, 0), 0),
+        'avg_tenure_years_saudi': avg_tenure(1),
+        'avg_tenure_years_non_saudi': avg_tenure(0),
+    }
+    policy = _active_policy(cube.company)
+    out['target_percent'] = policy.default_target_percent if policy else None
+    out['variance_percent'] = (out['saudization_percent'] - out['target_percent']) if (out['target_percent'] is not None and out['saudization_percent'] is not None) else None
+    return out
+
+
+def _bundle_nationality(cube, mask):
+    groups = cube.group('nationality_group', mask)
+    out = [{'label': k, 'value': v[0]} for k, v in groups.items()]
+    out.sort(key=lambda x: (-x['value'], _sort_key_nulls_first(x['label'])))
+    return out
+
+
+def _bundle_designation(cube, mask, min_headcount):
+    groups = cube.group('designation', mask)
+    out = [{'label': k, 'value': _percent(v[1], v[0]), 'headcount': v[0]} for k, v in groups.items() if v[0] >= min_headcount]
+    out.sort(key=lambda x: (x['value'], -x['headcount'], _sort_key_nulls_first(x['label'])))
+    return out[:15]
+
+
+def _bundle_department(cube, mask):
+    groups = cube.group('department', mask)
+    out = [{
+        'label': k,
+        'saudi_count': v[1],
+        'non_saudi_count': v[2],
+        'saudization_percent': _percent(v[1], v[0]),
+        'headcount': v[0],
+    } for k, v in groups.items()]
+    out.sort(key=lambda x: (x['saudization_percent'], -x['headcount'], _sort_key_nulls_first(x['label'])))
+    return out[:20]
+
+
+def _bundle_salary_band(cube, mask):
+    groups = cube.group('salary_band', mask)
+    return [{'label': b, 'value': _percent(groups[b][1], groups[b][0]), 'headcount': groups[b][0]} for b in SALARY_BANDS if b in groups]
+
+
+def _bundle_trend(cube, mask, months_back):
+    since = _month_add(cube.today, -int(months_back or 24))
+    groups = cube.group('join_month', cube.joined_since(mask, since))
+    return [{'label': k, 'value': _percent(groups[k][1], groups[k][0]), 'hires_count': groups[k][0]} for k in sorted(groups)]
+
+
+def _bundle_matrix(cube, mask, min_headcount):
+    groups = cube.group2('department', 'designation', mask)
+    out = [{
+        'department': d,
+        'designation': g,
+        'headcount': v[0],
+        'saudi_count': v[1],
+        'total_count': v[0],
+        'saudization_percent': _percent(v[1], v[0]),
+    } for (d, g), v in groups.items() if v[0] >= min_headcount]
+    out.sort(key=lambda x: (_sort_key_nulls_first(x['department']), x['saudization_percent'], _sort_key_nulls_first(x['designation'])))
+    return out
+
+
+@frappe.whitelist()
+@profiled
+@cached()
+@read_only
+def get_dashboard_bundle(company, department=None, designation=None, nationality_group=None, min_headcount=3, months_back=24):
+    """Every chart of the Saudization HR Analytics page from the company's workforce cube.
+
+    Each payload applies the same filter subset as its standalone endpoint (e.g. the
+    nationality breakdown ignores the nationality group filter, the matrix is company-wide).
+    """
+    cube = get_cube(_require_company(company))
+    min_headcount = int(min_headcount or 0)
+
+    filtered = cube.mask(department=department, designation=designation, nationality_group=nationality_group)
+    by_dept_desig = cube.mask(department=department, designation=designation)
+    by_dept = cube.mask(department=department)
+    by_desig = cube.mask(designation=designation)
+
+    kpis = _bundle_kpis(cube, filtered)
+    return {
+        'kpis': kpis,
+        'nationality': _bundle_nationality(cube, by_dept_desig),
+        'actual_vs_target': {
+            'labels': ['Saudization %'],
+            'datasets': [
+                {'name': 'Actual', 'values': [kpis.get('saudization_percent') or 0]},
+                {'name': 'Target', 'values': [kpis.get('target_percent') or 0]},
+            ],
+            'variance_percent': kpis.get('variance_percent'),
+        },
+        'designation': _rows_to_chart(_bundle_designation(cube, by_dept, min_headcount), series_name="Saudization %"),
+        'department': _department_chart(_bundle_department(cube, by_desig)),
+        'salary_band': _rows_to_chart(_bundle_salary_band(cube, by_dept_desig), series_name="Saudization %"),
+        'trend': _rows_to_chart(_bundle_trend(cube, by_dept_desig, months_back), series_name="Saudization %"),
+        'matrix': _apply_matrix_targets(_bundle_matrix(cube, cube.mask(), min_headcount), _active_policy(cube.company)),
+    }
+
+
 # ------------------------------
 # Executive Layer (CEO View)
 # ------------------------------
@@ -533,8 +501,9 @@ def _month_labels(end_dt, months_back):
 def _employee_snapshot(company=None, branch=None, as_on=None):
     """Return headcount snapshot as of a date, using DOJ + relieving_date where available.
 
-    Note: historical status changes may affect precision; this is the safest Cloud-ready approach
-    without requiring a separate snapshot table.
+    Note: historical status changes may affect precision; the trend engine can replay the
+    movement ledger instead (see `movement.py`). Month-end figures are also materialized in
+    Saudization Monthly Snapshot (see `snapshot.py`).
     """
     as_on = _getdate(as_on)
     where = ["(e.date_of_joining IS NULL OR e.date_of_joining <= %(as_on)s)",
@@ -562,21 +531,7 @@ def _employee_snapshot(company=None, branch=None, as_on=None):
 
 
 def _policy_target_percent(company, as_on=None):
-    as_on = _getdate(as_on)
-    row = frappe.db.sql(
-        """
-        SELECT default_target_percent
-        FROM `tabSaudization Policy`
-        WHERE company=%s
-          AND effective_from <= %s
-          AND (effective_to IS NULL OR effective_to >= %s)
-        ORDER BY effective_from DESC
-        LIMIT 1
-        """,
-        (company, as_on, as_on),
-        as_dict=True,
-    )
-    return (row[0].get('default_target_percent') if row else None)
+    return get_resolver().target(company, _getdate(as_on))
 
 
 def _status_from_variance(variance_pp):
@@ -590,41 +545,358 @@ def _status_from_variance(variance_pp):
 
 
 def _companies_under_holding(holding_company):
-    # ERPNext Company typically has parent_company.
+    # ERPNext Company typically has parent_company; every level below the holding counts.
     if not holding_company:
         return []
-    if not frappe.db.table_exists('tabCompany'):
-        return []
-    rows = frappe.get_all('Company', filters={'parent_company': holding_company}, pluck='name')
-    return rows
+    return [c for c, _depth in hierarchy.descendants(holding_company)]
+
+
+def _scope_companies(holding_company=None, company=None):
+    if company:
+        return [company]
+    if holding_company:
+        return _companies_under_holding(holding_company)
+    # all companies
+    return frappe.get_all('Company', pluck='name') if frappe.db.table_exists('tabCompany') else []
+
+
+def _percent(part, whole):
+    """Same as SQL ROUND(100 * part / whole, 1) (half-up); None when whole is 0."""
+    if not whole:
+        return None
+    value = (Decimal(100) * Decimal(int(part or 0)) / Decimal(int(whole))).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)
+    return float(value)
+
+
+def _snapshot_row(total, saudi):
+    total = int(total or 0)
+    saudi = int(saudi or 0)
+    return {
+        'total_employees': total,
+        'saudi_employees': saudi,
+        'non_saudi_employees': total - saudi,
+        'saudization_percent': _percent(saudi, total),
+    }
+
+
+class _Timeline:
+    """Cumulative joins/leaves per date; headcount on any date is two bisects.
+
+    An employee is counted on `as_on` when date_of_joining <= as_on < relieving_date,
+    which is exactly the predicate used by `_employee_snapshot`.
+    """
+
+    __slots__ = ('_join_dates', '_join_cum', '_leave_dates', '_leave_cum')
+
+    def __init__(self, joins, leaves):
+        self._join_dates, self._join_cum = self._cumulate(joins)
+        self._leave_dates, self._leave_cum = self._cumulate(leaves)
+
+    @staticmethod
+    def _cumulate(counts):
+        dates = sorted(counts)
+        cum = []
+        running = 0
+        for d in dates:
+            running += counts[d]
+            cum.append(running)
+        return dates, cum
+
+    @staticmethod
+    def _count_upto(dates, cum, as_on):
+        i = bisect_right(dates, as_on)
+        return cum[i - 1] if i else 0
+
+    def count_at(self, as_on):
+        return (self._count_upto(self._join_dates, self._join_cum, as_on)
+                - self._count_upto(self._leave_dates, self._leave_cum, as_on))
+
+
+def _employee_interval_rows(companies, branch=None):
+    """Joining/relieving intervals of `companies`, grouped by identical intervals."""
+    where = [
+        "e.company IN %(companies)s",
+        "(e.date_of_joining IS NULL OR e.relieving_date IS NULL OR e.relieving_date > e.date_of_joining)",
+    ]
+    params = {"companies": tuple(companies)}
+    if branch:
+        where.append("e.branch = %(branch)s")
+        params["branch"] = branch
+
+    return frappe.db.sql(
+        f"""
+        SELECT
+            e.company AS company,
+            e.branch AS branch,
+            IFNULL(e.is_saudi,0) AS is_saudi,
+            e.date_of_joining AS date_of_joining,
+            e.relieving_date AS relieving_date,
+            COUNT(*) AS headcount
+        FROM `tabEmployee` e
+        WHERE {' AND '.join(where)}
+        GROUP BY e.company, e.branch, IFNULL(e.is_saudi,0), e.date_of_joining, e.relieving_date
+        """,
+        params,
+        as_dict=True,
+    )
+
+
+class _HeadcountEngine:
+    """Month-end headcounts and weighted targets for a whole scope from one query.
+
+    Every employee's joining/relieving interval in `companies` is loaded once (grouped by
+    identical intervals), and every snapshot afterwards is computed in memory. Replaces the
+    per-company, per-month `_employee_snapshot` / `_policy_target_percent` round trips.
+    Targets come from the cached policy resolver.
+
+    With the movement ledger enabled the intervals are the ledger's effective-dated rows, so
+    transfers and other changes land in the months they happened. With a worker pool configured
+    the load runs one query per company in parallel and the rows are merged in scope order.
+    """
+
+    def __init__(self, companies, branch=None):
+        self.companies = list(companies or [])
+        self.branch = branch
+        # (company, branch, is_saudi) -> _Timeline; branch=None holds the whole-company total
+        self.timelines = {}
+        if self.companies:
+            self._load_intervals()
+
+    def _load_intervals(self):
+        # Holding scopes can split the load per company across pooled connections (parallel.py).
+        source = movement.interval_rows if movement.ledger_enabled() else _employee_interval_rows
+        self._build_timelines(parallel.per_company(source, self.companies, branch=self.branch))
+
+    def _build_timelines(self, rows):
+        joins = {}
+        leaves = {}
+        for r in rows:
+            is_saudi = 1 if int(r.get('is_saudi') or 0) == 1 else 0
+            n = int(r['headcount'] or 0)
+            doj = r.get('date_of_joining') or date.min
+            # Company-level keys use branch=None so whole-company counts skip the branch split.
+            for key in ((r['company'], r.get('branch') or '', is_saudi), (r['company'], None, is_saudi)):
+                j = joins.setdefault(key, {})
+                j[doj] = j.get(doj, 0) + n
+                if r.get('relieving_date'):
+                    lv = leaves.setdefault(key, {})
+                    lv[r['relieving_date']] = lv.get(r['relieving_date'], 0) + n
+
+        self.timelines = {key: _Timeline(j, leaves.get(key, {})) for key, j in joins.items()}
+
+    def counts(self, as_on, company=None, branch=None):
+        """(total, saudi) on `as_on` for one company/branch or the whole scope."""
+        total = saudi = 0
+        if company:
+            # Direct lookups, so per-company calls stay O(1) however many companies are loaded.
+            for is_saudi in (0, 1):
+                timeline = self.timelines.get((company, branch or None, is_saudi))
+                n = timeline.count_at(as_on) if timeline else 0
+                total += n
+                saudi += n if is_saudi else 0
+            return total, saudi
+
+        for (_company, b, is_saudi), timeline in self.timelines.items():
+            if (b != branch) if branch else (b is not None):
+                continue
+            n = timeline.count_at(as_on)
+            total += n
+            if is_saudi:
+                saudi += n
+        return total, saudi
+
+    def snapshot(self, as_on, company=None, branch=None):
+        return _snapshot_row(*self.counts(as_on, company=company, branch=branch))
+
+    def target(self, company, as_on):
+        return get_resolver().target(company, as_on)
+
+    def weighted_target(self, as_on):
+        """Headcount-weighted target across the scope (None when no company has a target)."""
+        t_sum = 0.0
+        t_base = 0
+        for c in self.companies:
+            t_c = self.target(c, as_on)
+            total, _saudi = self.counts(as_on, company=c)
+            if t_c is not None and total > 0:
+                t_sum += float(t_c) * total
+                t_base += total
+        return round((t_sum / t_base), 1) if t_base else None
+
+    def top_branches(self, as_on, company=None, limit=6):
+        totals = {}
+        for (c, b, _is_saudi), timeline in self.timelines.items():
+            if not b or (company and c != company):
+                continue
+            totals[b] = totals.get(b, 0) + timeline.count_at(as_on)
+        ranked = sorted((b for b in totals if totals[b] > 0), key=lambda b: (-totals[b], b))
+        return ranked[:limit]
+
+
+def _current_count_rows(companies, branch=None, as_on=None):
+    """(company, branch, total, saudi) of employees on `as_on` (default today), one aggregate query.
+
+    Reads today's Employee fields, like the incremental headcount counters, without loading
+    any joining/relieving intervals.
+    """
+    where = [
+        "e.company IN %(companies)s",
+        "(e.date_of_joining IS NULL OR e.date_of_joining <= %(as_on)s)",
+        "(e.relieving_date IS NULL OR e.relieving_date > %(as_on)s)",
+    ]
+    params = {"companies": tuple(companies), "as_on": as_on or _getdate(None)}
+    if branch:
+        where.append("e.branch = %(branch)s")
+        params["branch"] = branch
+
+    return frappe.db.sql(
+        f"""
+        SELECT e.company, IFNULL(e.branch,''), COUNT(*), SUM(IF(IFNULL(e.is_saudi,0)=1,1,0))
+        FROM `tabEmployee` e
+        WHERE {' AND '.join(where)}
+        GROUP BY e.company, IFNULL(e.branch,'')
+        """,
+        params,
+    )
+
+
+class _SnapshotHeadcountEngine(_HeadcountEngine):
+    """Same interface as `_HeadcountEngine`, reading month-end counts from Saudization Monthly Snapshot.
+
+    A month-end is read from the table only for the companies that have it stored and are not
+    marked dirty; a company whose refresh is still pending is computed live instead, so an
+    edit shows up before the hourly refresh and is not cached under the version it bumped.
+    Today is answered from the incremental headcount counters when they are current,
+    otherwise from one aggregate count on Employee. Any other date falls back to the live
+    interval load, which then happens at most once per engine.
+    """
+
+    def _load_intervals(self):
+        self._live_loaded = False
+        self.today = _getdate(None)
+        self.today_counts = aggregates.current_counts(self.companies, self.branch)
+        # (company, month_end) -> {branch: [total, saudi]}; branch None holds the company total
+        self.month_counts = {}
+        dirty = snapshot.dirty_companies()
+        stored = [c for c in self.companies if c not in dirty]
+        if not stored:
+            return
+
+        where = ["s.company IN %(companies)s"]
+        params = {"companies": tuple(stored)}
+        if self.branch:
+            where.append("s.branch = %(branch)s")
+            params["branch"] = self.branch
+
+        rows = frappe.db.sql(
+            f"""
+            SELECT s.company, IFNULL(s.branch,'') AS branch, s.month_end,
+                   SUM(s.total_employees) AS total_employees, SUM(s.saudi_employees) AS saudi_employees
+            FROM `tabSaudization Monthly Snapshot` s
+            WHERE {' AND '.join(where)}
+            GROUP BY s.company, IFNULL(s.branch,''), s.month_end
+            """,
+            params,
+            as_dict=True,
+        )
+        for r in rows:
+            branches = self.month_counts.setdefault((r['company'], r['month_end']), {})
+            for b in (r['branch'], None):
+                acc = branches.setdefault(b, [0, 0])
+                acc[0] += int(r['total_employees'] or 0)
+                acc[1] += int(r['saudi_employees'] or 0)
+
+    def _is_stored(self, company, as_on):
+        return (company, as_on) in self.month_counts
+
+    def _ensure_live(self):
+        if not self._live_loaded:
+            _HeadcountEngine._load_intervals(self)
+            self._live_loaded = True
+
+    def _ensure_today(self):
+        if self.today_counts is None:
+            self.today_counts = {}
+            for company, b, total, saudi in _current_count_rows(self.companies, self.branch, self.today):
+                for key in ((company, b), (company, None)):
+                    acc = self.today_counts.setdefault(key, [0, 0])
+                    acc[0] += int(total or 0)
+                    acc[1] += int(saudi or 0)
+
+    def _branch_counts(self, as_on, company):
+        """{branch: [total, saudi]} for one company on `as_on`, branch None for its total."""
+        stored = self.month_counts.get((company, as_on))
+        if stored is not None:
+            return stored
+        if as_on == self.today:
+            self._ensure_today()
+            return {b: acc for (c, b), acc in self.today_counts.items() if c == company}
+
+        self._ensure_live()
+        out = {}
+        for (c, b, is_saudi), timeline in self.timelines.items():
+            if c != company:
+                continue
+            n = timeline.count_at(as_on)
+            acc = out.setdefault(b, [0, 0])
+            acc[0] += n
+            acc[1] += n if is_saudi else 0
+        return out
+
+    def counts(self, as_on, company=None, branch=None):
+        total = saudi = 0
+        for c in ([company] if company else self.companies):
+            if as_on == self.today and not self._is_stored(c, as_on):
+                self._ensure_today()
+                acc = self.today_counts.get((c, branch or None))
+            elif not self._is_stored(c, as_on):
+                self._ensure_live()
+                acc = super().counts(as_on, company=c, branch=branch)
+            else:
+                acc = self.month_counts[(c, as_on)].get(branch or None)
+            if acc:
+                total += acc[0]
+                saudi += acc[1]
+        return total, saudi
+
+    def top_branches(self, as_on, company=None, limit=6):
+        totals = {}
+        for c in ([company] if company else self.companies):
+            for b, acc in self._branch_counts(as_on, c).items():
+                if b:
+                    totals[b] = totals.get(b, 0) + acc[0]
+        ranked = sorted((b for b in totals if totals[b] > 0), key=lambda b: (-totals[b], b))
+        return ranked[:limit]
+
+
+def _headcount_engine(companies, branch=None):
+    """Snapshot-table engine when enabled in Saudization Settings, live computation otherwise."""
+    if snapshot.snapshot_enabled():
+        return _SnapshotHeadcountEngine(companies, branch=branch)
+    return _HeadcountEngine(companies, branch=branch)
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_executive_scorecard(holding_company=None, company=None, branch=None, as_on_date=None, months_back=12):
     """CEO scorecard payload (filters allowed)."""
     as_on = _getdate(as_on_date)
     months_back = int(months_back or 12)
 
     # Determine scope
-    scope_companies = []
-    if company:
-        scope_companies = [company]
-    elif holding_company:
-        scope_companies = _companies_under_holding(holding_company)
-    else:
-        # all companies
-        scope_companies = frappe.get_all('Company', pluck='name') if frappe.db.table_exists('tabCompany') else []
+    scope_companies = _scope_companies(holding_company, company)
+    engine = _headcount_engine(scope_companies, branch=branch)
 
     # Overall snapshot (weighted across companies if multiple)
     overall_total = overall_saudi = overall_non = 0
-    weighted_target = 0.0
-    weighted_target_base = 0
 
     company_rows = []
     for c in scope_companies:
-        snap = _employee_snapshot(company=c, branch=branch, as_on=as_on)
-        tgt = _policy_target_percent(c, as_on=as_on)
-        variance = (snap['saudization_percent'] - tgt) if tgt is not None else None
+        snap = engine.snapshot(as_on, company=c)
+        tgt = engine.target(c, as_on)
+        variance = (snap['saudization_percent'] - tgt) if (tgt is not None and snap['saudization_percent'] is not None) else None
         status = _status_from_variance(variance)
         snap.update({
             'company': c,
@@ -634,16 +906,12 @@ def get_executive_scorecard(holding_company=None, company=None, branch=None, as_
         })
         company_rows.append(snap)
 
-        overall_total += int(snap.get('total_employees') or 0)
-        overall_saudi += int(snap.get('saudi_employees') or 0)
-        overall_non += int(snap.get('non_saudi_employees') or 0)
-
-        if tgt is not None and (snap.get('total_employees') or 0) > 0:
-            weighted_target += float(tgt) * int(snap['total_employees'])
-            weighted_target_base += int(snap['total_employees'])
+        overall_total += snap['total_employees']
+        overall_saudi += snap['saudi_employees']
+        overall_non += snap['non_saudi_employees']
 
     overall_percent = round((100 * overall_saudi / overall_total), 1) if overall_total else 0.0
-    overall_target = round((weighted_target / weighted_target_base), 1) if weighted_target_base else None
+    overall_target = engine.weighted_target(as_on)
     overall_variance = (overall_percent - overall_target) if overall_target is not None else None
 
     overall = {
@@ -659,8 +927,7 @@ def get_executive_scorecard(holding_company=None, company=None, branch=None, as_
 
     # MoM change using previous month end
     prev_month_end = _last_day_of_month(_month_add(as_on, -1))
-    prev = _employee_snapshot(company=company if company else None, branch=branch, as_on=prev_month_end)
-    prev_percent = prev.get('saudization_percent')
+    prev_percent = engine.snapshot(prev_month_end).get('saudization_percent')
     if prev_percent is not None:
         overall['mom_change'] = round(overall_percent - float(prev_percent), 1)
 
@@ -670,23 +937,11 @@ def get_executive_scorecard(holding_company=None, company=None, branch=None, as_
     target_values = []
     for m_start in _month_labels(as_on, months_back):
         m_end = _last_day_of_month(m_start)
-        snap = _employee_snapshot(company=company if company else None, branch=branch, as_on=m_end)
+        snap = engine.snapshot(m_end)
         labels.append(m_start.strftime('%Y-%m'))
         actual_values.append(snap.get('saudization_percent') or 0)
         # Use current target policy as of month end (weighted if multiple companies)
-        if company:
-            t = _policy_target_percent(company, as_on=m_end)
-        else:
-            # weighted across companies
-            t_sum = 0.0
-            t_base = 0
-            for c in scope_companies:
-                s = _employee_snapshot(company=c, branch=branch, as_on=m_end)
-                t_c = _policy_target_percent(c, as_on=m_end)
-                if t_c is not None and (s.get('total_employees') or 0) > 0:
-                    t_sum += float(t_c) * int(s['total_employees'])
-                    t_base += int(s['total_employees'])
-            t = round((t_sum / t_base), 1) if t_base else None
+        t = engine.target(company, m_end) if company else engine.weighted_target(m_end)
         target_values.append(t if t is not None else 0)
 
     trend = {
@@ -713,6 +968,9 @@ def get_executive_scorecard(holding_company=None, company=None, branch=None, as_
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_trend_data(holding_company=None, company=None, branch=None, months_back=24, as_on_date=None):
     """Month-wise trend charts payload (overall + branch-level)."""
     as_on = _getdate(as_on_date)
@@ -725,40 +983,20 @@ def get_trend_data(holding_company=None, company=None, branch=None, months_back=
     saudi_counts = []
     non_counts = []
 
-    scope_companies = []
-    if company:
-        scope_companies = [company]
-    elif holding_company:
-        scope_companies = _companies_under_holding(holding_company)
-    else:
-        scope_companies = frappe.get_all('Company', pluck='name') if frappe.db.table_exists('tabCompany') else []
+    scope_companies = _scope_companies(holding_company, company)
+    engine = _headcount_engine(scope_companies, branch=branch)
+    month_ends = [(m_start, _last_day_of_month(m_start)) for m_start in _month_labels(as_on, months_back)]
 
-    for m_start in _month_labels(as_on, months_back):
-        m_end = _last_day_of_month(m_start)
-        snap_total = snap_saudi = snap_non = 0
-        for c in scope_companies:
-            s = _employee_snapshot(company=c, branch=branch, as_on=m_end)
-            snap_total += int(s.get('total_employees') or 0)
-            snap_saudi += int(s.get('saudi_employees') or 0)
-            snap_non += int(s.get('non_saudi_employees') or 0)
+    for m_start, m_end in month_ends:
+        snap_total, snap_saudi = engine.counts(m_end)
         percent = round((100 * snap_saudi / snap_total), 1) if snap_total else 0.0
-
-        # weighted target
-        t_sum = 0.0
-        t_base = 0
-        for c in scope_companies:
-            s = _employee_snapshot(company=c, branch=branch, as_on=m_end)
-            t_c = _policy_target_percent(c, as_on=m_end)
-            if t_c is not None and (s.get('total_employees') or 0) > 0:
-                t_sum += float(t_c) * int(s['total_employees'])
-                t_base += int(s['total_employees'])
-        t = round((t_sum / t_base), 1) if t_base else None
+        t = engine.weighted_target(m_end)
 
         labels.append(m_start.strftime('%Y-%m'))
         actual.append(percent)
         target.append(t if t is not None else 0)
         saudi_counts.append(snap_saudi)
-        non_counts.append(snap_non)
+        non_counts.append(snap_total - snap_saudi)
 
     overall = {
         'labels': labels,
@@ -770,54 +1008,43 @@ def get_trend_data(holding_company=None, company=None, branch=None, months_back=
 
     # Branch-level trend: top 6 branches by headcount in last month within single company scope
     branch_level = {'labels': labels, 'datasets': []}
-    if company and frappe.db.table_exists('tabEmployee'):
-        # get top branches
-        last_month_end = _last_day_of_month(_getdate(as_on))
-        top = frappe.db.sql(
-            """
-            SELECT e.branch, COUNT(*) as headcount
-            FROM `tabEmployee` e
-            WHERE e.company=%s
-              AND e.branch IS NOT NULL AND e.branch != ''
-              AND (e.date_of_joining IS NULL OR e.date_of_joining <= %s)
-              AND (e.relieving_date IS NULL OR e.relieving_date > %s)
-            GROUP BY e.branch
-            ORDER BY headcount DESC
-            LIMIT 6
-            """,
-            (company, last_month_end, last_month_end),
-            as_dict=True,
-        )
-        branches = [r['branch'] for r in top if r.get('branch')]
-        for b in branches:
-            series = []
-            for m_start in _month_labels(as_on, months_back):
-                m_end = _last_day_of_month(m_start)
-                s = _employee_snapshot(company=company, branch=b, as_on=m_end)
-                series.append(s.get('saudization_percent') or 0)
+    if company:
+        last_month_end = _last_day_of_month(as_on)
+        for b in engine.top_branches(last_month_end, company=company, limit=6):
+            series = [engine.snapshot(m_end, company=company, branch=b).get('saudization_percent') or 0 for _m_start, m_end in month_ends]
             branch_level['datasets'].append({'name': b, 'values': series})
 
     return {'overall': overall, 'branch_level': branch_level}
 
 
 @frappe.whitelist()
+@profiled
+@cached(company_arg=None)
+@read_only
 def get_holding_comparison(holding_company, as_on_date=None):
     """Holding vs subsidiaries comparison (table + chart)."""
     as_on = _getdate(as_on_date)
-    companies = _companies_under_holding(holding_company)
+    tree = hierarchy.descendants(holding_company)
+    companies = [c for c, _depth in tree]
 
     rows = []
     labels = []
     actual_values = []
     target_values = []
 
-    for c in companies:
-        snap = _employee_snapshot(company=c, as_on=as_on)
-        tgt = _policy_target_percent(c, as_on=as_on)
-        variance = (snap['saudization_percent'] - tgt) if tgt is not None else None
+    # One grouped load for every company in the tree (all levels), then in-memory lookups.
+    engine = _headcount_engine(companies)
+    counts = {c: engine.counts(as_on, company=c) for c in companies}
+
+    for c, depth in tree:
+        snap = _snapshot_row(*counts[c])
+        tgt = engine.target(c, as_on)
+        variance = (snap['saudization_percent'] - tgt) if (tgt is not None and snap['saudization_percent'] is not None) else None
         status = _status_from_variance(variance)
         row = {
             'company': c,
+            'parent_company': hierarchy.parent_of(c),
+            'level': depth,
             'total_employees': snap.get('total_employees') or 0,
             'saudi_employees': snap.get('saudi_employees') or 0,
             'saudization_percent': snap.get('saudization_percent') or 0,
@@ -825,6 +1052,16 @@ def get_holding_comparison(holding_company, as_on_date=None):
             'variance_percent': variance,
             'status': status,
         }
+        below = hierarchy.descendants(c)
+        if below:
+            # Intermediate holdings also show their whole subtree.
+            group_total = counts[c][0] + sum(counts[d][0] for d, _ in below if d in counts)
+            group_saudi = counts[c][1] + sum(counts[d][1] for d, _ in below if d in counts)
+            row.update({
+                'group_total_employees': group_total,
+                'group_saudi_employees': group_saudi,
+                'group_saudization_percent': _percent(group_saudi, group_total),
+            })
         rows.append(row)
 
         labels.append(c)
@@ -845,6 +1082,9 @@ def get_holding_comparison(holding_company, as_on_date=None):
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_company_drilldown(company, as_on_date=None, branch=None):
     """Drill-down payload for a single company.
 
@@ -862,101 +1102,22 @@ def get_company_drilldown(company, as_on_date=None, branch=None):
     if not company:
         raise frappe.ValidationError(_("Company is required"))
 
-    tgt = _policy_target_percent(company, as_on=as_on)
-
-    # --- Branch breakdown
-    b_rows = frappe.db.sql(
-        """
-        SELECT
-          e.branch AS branch,
-          COUNT(*) AS total_employees,
-          SUM(CASE WHEN IFNULL(e.is_saudi,0)=1 THEN 1 ELSE 0 END) AS saudi_employees,
-          SUM(CASE WHEN IFNULL(e.is_saudi,0)=0 THEN 1 ELSE 0 END) AS non_saudi_employees,
-          ROUND(100 * SUM(CASE WHEN IFNULL(e.is_saudi,0)=1 THEN 1 ELSE 0 END) / NULLIF(COUNT(*),0), 1) AS saudization_percent
-        FROM `tabEmployee` e
-        WHERE e.company=%(company)s
-          AND (e.date_of_joining IS NULL OR e.date_of_joining <= %(as_on)s)
-          AND (e.relieving_date IS NULL OR e.relieving_date > %(as_on)s)
-          AND e.branch IS NOT NULL AND e.branch != ''
-        GROUP BY e.branch
-        ORDER BY total_employees DESC
-        """,
-        {"company": company, "as_on": as_on},
-        as_dict=True,
-    )
-
-    branches = []
-    for r in (b_rows or []):
-        variance = (float(r.get('saudization_percent') or 0) - float(tgt)) if tgt is not None else None
-        branches.append({
-            **r,
-            'target_percent': tgt,
-            'variance_percent': round(variance, 1) if variance is not None else None,
-            'status': _status_from_variance(variance),
-        })
-
-    # Risk-first ordering (lowest variance first), then headcount desc
-    branches.sort(key=lambda x: (
-        x.get('variance_percent') if x.get('variance_percent') is not None else 9999,
-        -(x.get('total_employees') or 0)
-    ))
-
-    # --- Department breakdown (optionally filtered by Branch)
-    dep_where = [
-        "e.company=%(company)s",
-        "(e.date_of_joining IS NULL OR e.date_of_joining <= %(as_on)s)",
-        "(e.relieving_date IS NULL OR e.relieving_date > %(as_on)s)",
-        "e.department IS NOT NULL AND e.department != ''",
-    ]
-    params = {"company": company, "as_on": as_on}
-    if branch:
-        dep_where.append("e.branch=%(branch)s")
-        params["branch"] = branch
-
-    d_rows = frappe.db.sql(
-        f"""
-        SELECT
-          e.department AS department,
-          COUNT(*) AS total_employees,
-          SUM(CASE WHEN IFNULL(e.is_saudi,0)=1 THEN 1 ELSE 0 END) AS saudi_employees,
-          SUM(CASE WHEN IFNULL(e.is_saudi,0)=0 THEN 1 ELSE 0 END) AS non_saudi_employees,
-          ROUND(100 * SUM(CASE WHEN IFNULL(e.is_saudi,0)=1 THEN 1 ELSE 0 END) / NULLIF(COUNT(*),0), 1) AS saudization_percent
-        FROM `tabEmployee` e
-        WHERE {' AND '.join(dep_where)}
-        GROUP BY e.department
-        ORDER BY total_employees DESC
-        LIMIT 30
-        """,
-        params,
-        as_dict=True,
-    )
-
-    departments = []
-    for r in (d_rows or []):
-        variance = (float(r.get('saudization_percent') or 0) - float(tgt)) if tgt is not None else None
-        departments.append({
-            **r,
-            'target_percent': tgt,
-            'variance_percent': round(variance, 1) if variance is not None else None,
-            'status': _status_from_variance(variance),
-        })
-
-    departments.sort(key=lambda x: (
-        x.get('variance_percent') if x.get('variance_percent') is not None else 9999,
-        -(x.get('total_employees') or 0)
-    ))
-
+    # Branch and department breakdowns come out of the same single scan as the page bundle.
+    payload = _company_drilldown_payload(company, as_on, branch=branch)
     return {
         'company': company,
-        'as_on_date': as_on.strftime('%Y-%m-%d'),
+        'as_on_date': payload['as_on_date'],
         'branch': branch,
-        'target_percent': tgt,
-        'branches': branches,
-        'departments': departments,
+        'target_percent': payload['target_percent'],
+        'branches': payload['branches'],
+        'departments': payload['departments'],
     }
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_designation_breakdown(company, department, as_on_date=None, branch=None, min_headcount=3):
     """Designation breakdown within a department (optionally within a branch).
 
@@ -1036,6 +1197,9 @@ def get_designation_breakdown(company, department, as_on_date=None, branch=None,
 
 
 @frappe.whitelist()
+@profiled
+@cached()
+@read_only
 def get_top_risky_positions(company, as_on_date=None, branch=None, top_n=10, min_headcount=3):
     """Return the most risky designations (lowest variance vs target).
 
@@ -1105,6 +1269,116 @@ def get_top_risky_positions(company, as_on_date=None, branch=None, top_n=10, min
     }
 
 
+def _drill_row(total, saudi, tgt):
+    percent = _percent(saudi, total)
+    variance = (float(percent or 0) - float(tgt)) if tgt is not None else None
+    return {
+        'total_employees': total,
+        'saudi_employees': saudi,
+        'non_saudi_employees': total - saudi,
+        'saudization_percent': percent,
+        'target_percent': tgt,
+        'variance_percent': round(variance, 1) if variance is not None else None,
+        'status': _status_from_variance(variance),
+    }
+
+
+def _risk_sorted(items):
+    # Risk-first ordering (lowest variance first), then headcount desc
+    return sorted(items, key=lambda x: (
+        x.get('variance_percent') if x.get('variance_percent') is not None else 9999,
+        -(x.get('total_employees') or 0)
+    ))
+
+
+def _drill_rollup(counts, field, tgt, limit=None, min_headcount=0):
+    """{value: [total, saudi]} -> risk-sorted rows; keeps the `limit` largest groups like the SQL did."""
+    groups = [(v, c) for v, c in counts.items() if v and c[0] >= min_headcount]
+    groups.sort(key=lambda g: -g[1][0])
+    if limit:
+        groups = groups[:limit]
+    return _risk_sorted([{field: v, **_drill_row(c[0], c[1], tgt)} for v, c in groups])
+
+
+def _company_drilldown_payload(company, as_on, branch=None, top_n=10, min_headcount=3):
+    """Branch, department, designation and department x designation rollups from one scan."""
+    tgt = _policy_target_percent(company, as_on=as_on)
+
+    rows = frappe.db.sql(
+        """
+        SELECT
+          IFNULL(e.branch,'') AS branch,
+          IFNULL(e.department,'') AS department,
+          IFNULL(e.designation,'') AS designation,
+          IFNULL(e.is_saudi,0) AS is_saudi,
+          COUNT(*) AS headcount
+        FROM `tabEmployee` e
+        WHERE e.company=%(company)s
+          AND (e.date_of_joining IS NULL OR e.date_of_joining <= %(as_on)s)
+          AND (e.relieving_date IS NULL OR e.relieving_date > %(as_on)s)
+        GROUP BY 1, 2, 3, 4
+        """,
+        {"company": company, "as_on": as_on},
+        as_dict=True,
+    )
+
+    branches, departments, designations, dept_designations = {}, {}, {}, {}
+    overall = [0, 0]
+    for r in rows:
+        n = int(r.headcount or 0)
+        saudi = n if int(r.is_saudi or 0) == 1 else 0
+        targets = [branches.setdefault(r.branch, [0, 0])]
+        # Department / designation figures stay within the selected branch.
+        if not branch or r.branch == branch:
+            targets += [
+                overall,
+                departments.setdefault(r.department, [0, 0]),
+                designations.setdefault(r.designation, [0, 0]),
+            ]
+            if r.department:
+                targets.append(dept_designations.setdefault(r.department, {}).setdefault(r.designation, [0, 0]))
+        for c in targets:
+            c[0] += n
+            c[1] += saudi
+
+    return {
+        'company': company,
+        'as_on_date': as_on.strftime('%Y-%m-%d'),
+        'branch': branch,
+        'target_percent': tgt,
+        'overall': _drill_row(overall[0], overall[1], tgt),
+        'branches': _drill_rollup(branches, 'branch', tgt),
+        'departments': _drill_rollup(departments, 'department', tgt, limit=30),
+        'designations_by_department': {
+            dep: _drill_rollup(des, 'designation', tgt, limit=50, min_headcount=min_headcount)
+            for dep, des in dept_designations.items()
+        },
+        'risky_positions': _drill_rollup(designations, 'designation', tgt, min_headcount=min_headcount)[:top_n],
+    }
+
+
+@frappe.whitelist()
+@profiled
+@cached()
+@read_only
+def get_company_drilldown_bundle(company, as_on_date=None, branch=None, top_n=10, min_headcount=3):
+    """Everything the Company Drilldown page renders first, from one scan of the company's employees.
+
+    Same figures as get_company_drilldown plus `overall`, the designation breakdown of every
+    department (`designations_by_department`, as get_designation_breakdown) and the
+    `risky_positions` list (as get_top_risky_positions).
+    """
+    as_on = _getdate(as_on_date)
+    company = (company or '').strip()
+    branch = (branch or '').strip() or None
+    if not company:
+        raise frappe.ValidationError(_("Company is required"))
+
+    return _company_drilldown_payload(
+        company, as_on, branch=branch, top_n=int(top_n or 10), min_headcount=int(min_headcount or 0)
+    )
+
+
 def _employee_as_on_where(params, company, as_on, branch=None, department=None, designation=None, nationality_group=None, is_saudi=None, search=None):
     where = [
         "e.company=%(company)s",
@@ -1128,39 +1402,111 @@ def _employee_as_on_where(params, company, as_on, branch=None, department=None,
     if is_saudi in (0, 1, "0", "1"):
         where.append("IFNULL(e.is_saudi,0)=%(is_saudi)s")
         params["is_saudi"] = int(is_saudi)
-    if search:
-        where.append("(e.name LIKE %(q)s OR e.employee_name LIKE %(q)s OR e.employee_number LIKE %(q)s)")
-        params["q"] = f"%{search.strip()}%"
+    if search and search.strip():
+        where.append(search_condition(params, search))
 
     return " AND ".join(where)
 
 
+def _employee_keyset_where(params, after):
+    """Rows strictly after `after` = (employee_name, name) in `ORDER BY e.employee_name, e.name`.
+
+    NULL names sort first in MariaDB, so a NULL last-seen name continues within the NULLs
+    and then moves on to every named row. A three-part cursor (rank, employee_name, name)
+    continues a ranked search ordered by `RANK_SQL DESC` first.
+    """
+    if len(after) == 3:
+        params["after_rank"] = int(after[0] or 0)
+        within = _employee_keyset_where(params, after[1:])
+        return f"({RANK_SQL} < %(after_rank)s OR ({RANK_SQL} = %(after_rank)s AND {within}))"
+
+    last_name, last_id = after
+    params["after_id"] = last_id
+    if last_name is None:
+        return "((e.employee_name IS NULL AND e.name > %(after_id)s) OR e.employee_name IS NOT NULL)"
+    params["after_name"] = last_name
+    return "(e.employee_name > %(after_name)s OR (e.employee_name = %(after_name)s AND e.name > %(after_id)s))"
+
+
+@cached()
+@read_only
+def _employee_list_total(company, as_on, branch=None, department=None, designation=None, nationality_group=None, is_saudi=None, search=None):
+    """Row count for an Employee Drilldown filter; cached until the company's employees change."""
+    params = {}
+    where = _employee_as_on_where(params, company, as_on, branch, department, designation, nationality_group, is_saudi, search)
+    return int(frappe.db.sql(f"SELECT COUNT(*) FROM `tabEmployee` e WHERE {where}", params)[0][0] or 0)
+
+
+def _employee_cursor(row):
+    key = [row.get("employee_name"), row.get("employee")]
+    if "search_rank" in row:
+        key.insert(0, row.get("search_rank"))
+    return frappe.as_json(key, indent=None)
+
+
+def _parse_employee_cursor(cursor):
+    if not cursor:
+        return None
+    value = frappe.parse_json(cursor) if isinstance(cursor, str) else cursor
+    if not isinstance(value, (list, tuple)) or len(value) not in (2, 3) or not value[-1]:
+        raise frappe.ValidationError(_("Invalid cursor"))
+    return tuple(value)
+
+
+def _employee_list_page(rows, limit):
+    page, rest = rows[:limit], rows[limit:]
+    return {
+        "rows": page,
+        "has_more": bool(rest),
+        "next_cursor": _employee_cursor(page[-1]) if rest else None,
+    }
+
+
 @frappe.whitelist()
-def get_employee_list(company, as_on_date=None, branch=None, department=None, designation=None, nationality_group=None, is_saudi=None, search=None, limit=50, offset=0):
-    """Paginated employee list used by Employee Drilldown page."""
+@profiled
+@read_only
+def get_employee_list(company, as_on_date=None, branch=None, department=None, designation=None, nationality_group=None, is_saudi=None, search=None, limit=50, offset=0, cursor=None, prefetch=0, with_total=1):
+    """Paginated employee list used by Employee Drilldown page.
+
+    Pass the previous page's `next_cursor` as `cursor` to page by keyset on (employee_name, name),
+    or on (search rank, employee_name, name) when searching; `offset` is still honoured when no
+    cursor is given. With `prefetch`, the following page is
+    returned as `next_page` from the same query. `total` is cached and skipped with `with_total=0`.
+    """
     as_on = _getdate(as_on_date)
     company = (company or '').strip()
     if not company:
         raise frappe.ValidationError(_("Company is required"))
 
+    filters = {
+        "company": company,
+        "as_on": as_on,
+        "branch": (branch or '').strip() or None,
+        "department": (department or '').strip() or None,
+        "designation": (designation or '').strip() or None,
+        "nationality_group": (nationality_group or '').strip() or None,
+        "is_saudi": is_saudi,
+        "search": (search or '').strip() or None,
+    }
     params = {}
-    where = _employee_as_on_where(
-        params,
-        company=company,
-        as_on=as_on,
-        branch=(branch or '').strip() or None,
-        department=(department or '').strip() or None,
-        designation=(designation or '').strip() or None,
-        nationality_group=(nationality_group or '').strip() or None,
-        is_saudi=is_saudi,
-        search=search,
-    )
+    where = _employee_as_on_where(params, **filters)
 
     limit = int(limit or 50)
     offset = int(offset or 0)
-    params.update({"limit": limit, "offset": offset})
+    prefetch = int(prefetch or 0)
+    after = _parse_employee_cursor(cursor)
+    if after and (len(after) == 3) != bool(filters["search"]):
+        raise frappe.ValidationError(_("Cursor does not match the search"))
+    if after:
+        where += " AND " + _employee_keyset_where(params, after)
+        offset = 0
+
+    # Searches list exact / prefix ID matches first, then name matches.
+    rank_column = f"{RANK_SQL} AS search_rank," if filters["search"] else ""
+    order_by = "search_rank DESC, e.employee_name ASC, e.name ASC" if filters["search"] else "e.employee_name ASC, e.name ASC"
 
-    total = frappe.db.sql(f"SELECT COUNT(*) AS c FROM `tabEmployee` e WHERE {where}", params)[0][0]
+    # One extra row tells whether another page exists.
+    params.update({"limit": limit * (2 if prefetch else 1) + 1, "offset": offset})
 
     rows = frappe.db.sql(
         f"""
@@ -1174,84 +1520,47 @@ def get_employee_list(company, as_on_date=None, branch=None, department=None, de
           IFNULL(e.is_saudi,0) AS is_saudi,
           e.nationality AS nationality,
           e.saudization_nationality_group AS nationality_group,
-          DATE_FORMAT(e.date_of_joining, '%Y-%m-%d') AS date_of_joining
+          {rank_column}
+          DATE_FORMAT(e.date_of_joining, '%%Y-%%m-%%d') AS date_of_joining
         FROM `tabEmployee` e
         WHERE {where}
-        ORDER BY e.employee_name ASC, e.name ASC
+        ORDER BY {order_by}
         LIMIT %(limit)s OFFSET %(offset)s
         """,
         params,
         as_dict=True,
     )
 
-    return {"total": int(total or 0), "rows": rows}
+    out = _employee_list_page(rows, limit)
+    if prefetch:
+        out["next_page"] = _employee_list_page(rows[limit:], limit)
+    out["total"] = _employee_list_total(**filters) if int(with_total if with_total is not None else 1) else None
+    return out
 
 
 @frappe.whitelist()
-def export_employee_list_csv(company, as_on_date=None, branch=None, department=None, designation=None, nationality_group=None, is_saudi=None, search=None):
-    """Export employee list as CSV and return file_url."""
+def export_employee_list_csv(company, as_on_date=None, branch=None, department=None, designation=None, nationality_group=None, is_saudi=None, search=None, file_format="csv", background=0):
+    """Export employee list as CSV / XLSX and return file_url (queued as a background job when `background` is set)."""
     as_on = _getdate(as_on_date)
     company = (company or '').strip()
     if not company:
         raise frappe.ValidationError(_("Company is required"))
 
-    params = {}
-    where = _employee_as_on_where(
-        params,
-        company=company,
-        as_on=as_on,
-        branch=(branch or '').strip() or None,
-        department=(department or '').strip() or None,
-        designation=(designation or '').strip() or None,
-        nationality_group=(nationality_group or '').strip() or None,
-        is_saudi=is_saudi,
-        search=search,
-    )
+    file_format = (file_format or "csv").strip().lower()
+    if file_format not in export.EXPORT_FORMATS:
+        raise frappe.ValidationError(_("Unsupported export format: {0}").format(file_format))
 
-    rows = frappe.db.sql(
-        f"""
-        SELECT
-          e.name AS employee,
-          e.employee_number AS employee_number,
-          e.employee_name AS employee_name,
-          e.branch AS branch,
-          e.department AS department,
-          e.designation AS designation,
-          IFNULL(e.is_saudi,0) AS is_saudi,
-          e.nationality AS nationality,
-          e.saudization_nationality_group AS nationality_group,
-          DATE_FORMAT(e.date_of_joining, '%Y-%m-%d') AS date_of_joining
-        FROM `tabEmployee` e
-        WHERE {where}
-        ORDER BY e.employee_name ASC, e.name ASC
-        """,
-        params,
-        as_dict=True,
-    )
+    filters = {
+        "company": company,
+        "as_on": as_on,
+        "branch": (branch or '').strip() or None,
+        "department": (department or '').strip() or None,
+        "designation": (designation or '').strip() or None,
+        "nationality_group": (nationality_group or '').strip() or None,
+        "is_saudi": is_saudi,
+        "search": search,
+    }
 
-    output = io.StringIO()
-    # Excel-friendly UTF-8 with BOM
-    output.write('\ufeff')
-    writer = csv.writer(output)
-    writer.writerow([
-        'Employee', 'Employee Number', 'Employee Name', 'Branch', 'Department', 'Designation',
-        'Type', 'Nationality', 'Nationality Group', 'Date of Joining'
-    ])
-    for r in (rows or []):
-        writer.writerow([
-            r.get('employee') or '',
-            r.get('employee_number') or '',
-            r.get('employee_name') or '',
-            r.get('branch') or '',
-            r.get('department') or '',
-            r.get('designation') or '',
-            'Saudi' if int(r.get('is_saudi') or 0) == 1 else 'Non-Saudi',
-            r.get('nationality') or '',
-            r.get('nationality_group') or '',
-            r.get('date_of_joining') or '',
-        ])
-
-    content = output.getvalue().encode('utf-8')
-    fname = f"AlphaX_Employees_{company}_{as_on.strftime('%Y%m%d')}.csv"
-    f = save_file(fname, content, dt=None, dn=None, is_private=0)
-    return {"file_url": f.file_url}
+    if int(background or 0):
+        return export.enqueue_employee_export(filters, file_format)
+    return export.run_employee_export(filters, file_format)
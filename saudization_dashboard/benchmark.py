@@ -0,0 +1,430 @@
+"""Synthetic-data benchmark for the dashboard API and the shipped reports.
+
+On a throwaway site (developer_mode or allow_tests must be set):
+
+    bench --site <site> execute saudization_dashboard.benchmark.generate --kwargs "{'scale': '100k', 'companies': 50}"
+    bench --site <site> execute saudization_dashboard.benchmark.run
+    bench --site <site> execute saudization_dashboard.benchmark.cleanup
+
+or standalone from the bench's `sites` directory:
+
+    python -m saudization_dashboard.benchmark --site <site> generate --scale 100k --companies 50
+    python -m saudization_dashboard.benchmark --site <site> run --baseline baseline.json
+
+`run` writes its timings as JSON and compares them with the baseline; the standalone runner
+exits non-zero when an endpoint or report got slower than the tolerance allows.
+"""
+
+import frappe
+from frappe import _
+
+import inspect
+import json
+import os
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from frappe.utils import add_days, getdate, now_datetime
+
+from saudization_dashboard import cache, hierarchy, policy, salary
+
+
+PREFIX = "BENCH"
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+MAX_COMPANIES = 200
+CHUNK = 10_000
+
+# Subsidiaries per synthetic holding company.
+HOLDING_SIZE = 10
+
+# (nationality, is_saudi, group, weight)
+NATIONALITIES = (
+    ("Saudi Arabia", 1, "Saudi", 35),
+    ("Kuwait", 0, "GCC", 2),
+    ("Bahrain", 0, "GCC", 2),
+    ("United Arab Emirates", 0, "GCC", 2),
+    ("Egypt", 0, "Non-GCC", 15),
+    ("India", 0, "Non-GCC", 20),
+    ("Pakistan", 0, "Non-GCC", 12),
+    ("Philippines", 0, "Non-GCC", 10),
+    ("Jordan", 0, "Non-GCC", 2),
+)
+DEPARTMENTS = ("Operations", "Sales", "Finance", "Human Resources", "IT", "Procurement", "Logistics", "Customer Service")
+DESIGNATION_COUNT = 40
+BRANCH_COUNT = 20
+
+DEFAULT_BASELINE = "saudization_benchmark_baseline.json"
+DEFAULT_OUTPUT = "saudization_benchmark.json"
+DEFAULT_TOLERANCE = 0.25
+# Differences below this are noise, whatever the ratio.
+MIN_DELTA_MS = 5.0
+
+
+def _guard():
+    if not (frappe.conf.get("developer_mode") or frappe.conf.get("allow_tests")):
+        frappe.throw(_("The Saudization benchmark writes synthetic data; enable developer_mode or allow_tests on this site first."))
+
+
+_STD_FIELDS = ["creation", "modified", "owner", "modified_by"]
+
+
+def _std(now, user):
+    return [now, now, user, user]
+
+
+def _bulk(doctype, fields, rows):
+    """Insert an iterable of rows in CHUNK-sized batches."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK:
+            frappe.db.bulk_insert(doctype, fields=fields, values=batch)
+            batch = []
+    if batch:
+        frappe.db.bulk_insert(doctype, fields=fields, values=batch)
+
+
+def _company_names(companies):
+    """[(name, abbr, parent)]: holdings of HOLDING_SIZE subsidiaries each (a lone company has no holding)."""
+    out = []
+    if companies == 1:
+        return [(f"{PREFIX} Company 001", f"{PREFIX}C001", None)]
+    for h in range(-(-companies // HOLDING_SIZE)):
+        holding = f"{PREFIX} Holding {h + 1:02d}"
+        out.append((holding, f"{PREFIX}H{h + 1:02d}", None))
+        for i in range(h * HOLDING_SIZE, min(companies, (h + 1) * HOLDING_SIZE)):
+            out.append((f"{PREFIX} Company {i + 1:03d}", f"{PREFIX}C{i + 1:03d}", holding))
+    return out
+
+
+def generate(scale="10k", companies=10, seed=42):
+    """Replace any previous synthetic data with `scale` employees spread over `companies` companies."""
+    _guard()
+    employees = SCALES.get(str(scale).lower()) or int(scale)
+    companies = int(companies)
+    if not 1 <= companies <= MAX_COMPANIES:
+        frappe.throw(_("Companies must be between 1 and {0}").format(MAX_COMPANIES))
+
+    cleanup()
+    rng = random.Random(seed)
+    now, user = now_datetime(), frappe.session.user
+    today = getdate()
+
+    company_rows = _company_names(companies)
+    _bulk("Company", ["name", "company_name", "abbr", "default_currency", "country", "parent_company", "is_group", *_STD_FIELDS], (
+        [name, name, abbr, "SAR", "Saudi Arabia", parent, 1 if parent is None and companies > 1 else 0, *_std(now, user)]
+        for name, abbr, parent in company_rows
+    ))
+    # Holdings carry no employees of their own; subsidiaries get a skewed share.
+    staffed = [(name, abbr) for name, abbr, parent in company_rows if parent or companies == 1]
+
+    branches = [f"{PREFIX} Branch {i + 1:02d}" for i in range(BRANCH_COUNT)]
+    _bulk("Branch", ["name", "branch", *_STD_FIELDS], ([b, b, *_std(now, user)] for b in branches))
+
+    designations = [f"{PREFIX} Designation {i + 1:02d}" for i in range(DESIGNATION_COUNT)]
+    _bulk("Designation", ["name", "designation_name", *_STD_FIELDS], ([d, d, *_std(now, user)] for d in designations))
+
+    departments = {name: [f"{d} - {abbr}" for d in DEPARTMENTS] for name, abbr in staffed}
+    _bulk("Department", ["name", "department_name", "company", *_STD_FIELDS], (
+        [dept, dept.rsplit(" - ", 1)[0], company, *_std(now, user)]
+        for company, depts in departments.items() for dept in depts
+    ))
+
+    company_weights = [1 / (i + 1) ** 0.5 for i in range(len(staffed))]
+    nationality_weights = [n[3] for n in NATIONALITIES]
+    has_assignments = frappe.db.table_exists("tabSalary Structure Assignment")
+
+    def employee_rows():
+        for i in range(employees):
+            company = rng.choices(staffed, weights=company_weights)[0][0]
+            nationality, is_saudi, group, _w = rng.choices(NATIONALITIES, weights=nationality_weights)[0]
+            joined = today - timedelta(days=rng.randint(0, 8 * 365))
+            left = rng.random() < 0.12
+            relieving = add_days(joined, rng.randint(30, 5 * 365)) if left else None
+            if relieving and getdate(relieving) > today:
+                relieving, left = None, False
+            yield [
+                f"{PREFIX}-{i + 1:07d}", f"Employee {i + 1}", f"Employee {i + 1}", company,
+                rng.choice(branches), rng.choice(departments[company]), rng.choice(designations),
+                nationality, is_saudi, group, "Left" if left else "Active", joined, relieving,
+                rng.choice(("Male", "Female")), date(1965, 1, 1) + timedelta(days=rng.randint(0, 13000)),
+                *_std(now, user),
+            ]
+
+    _bulk("Employee", [
+        "name", "employee_name", "first_name", "company", "branch", "department", "designation",
+        "nationality", "is_saudi", "saudization_nationality_group", "status", "date_of_joining", "relieving_date",
+        "gender", "date_of_birth", *_STD_FIELDS,
+    ], employee_rows())
+
+    rng_salary = random.Random(seed + 1)
+    salary_rows = (
+        (f"{PREFIX}-SSA-{i + 1:07d}", f"{PREFIX}-{i + 1:07d}", rng_salary.choice((3000, 4500, 6000, 8000, 11000, 14000, 18000, 25000)))
+        for i in range(employees)
+    )
+    if has_assignments:
+        employee_of = {r[0]: r[1:] for r in frappe.db.sql(
+            "SELECT name, company, date_of_joining FROM `tabEmployee` WHERE name LIKE %s", (f"{PREFIX}-%",)
+        )}
+        _bulk("Salary Structure Assignment", [
+            "name", "employee", "company", "from_date", "salary_structure", "base", "currency", "docstatus", *_STD_FIELDS,
+        ], (
+            [name, emp, *employee_of[emp], f"{PREFIX} Structure", base, "SAR", 1, *_std(now, user)]
+            for name, emp, base in salary_rows
+        ))
+        salary.rebuild_current_salaries()
+    else:
+        _bulk(salary.CURRENT_SALARY_DOCTYPE, ["name", "employee", "base", "from_date", *_STD_FIELDS], (
+            [emp, emp, base, today, *_std(now, user)] for _name, emp, base in salary_rows
+        ))
+
+    _generate_policies(rng, [c for c, _a in staffed], departments, designations, now, user)
+
+    hierarchy.invalidate()
+    policy.invalidate()
+    cache.bump_all()
+    frappe.db.commit()
+    return {"employees": employees, "companies": len(company_rows), "holdings": len(company_rows) - len(staffed)}
+
+
+def _generate_policies(rng, companies, departments, designations, now, user):
+    effective_from = add_days(getdate(), -3 * 365)
+    policies, lines = [], []
+    for company in companies:
+        name = f"{company}-{effective_from}"
+        policies.append([name, company, effective_from, rng.choice((25, 30, 35, 40)), *_std(now, user)])
+        picked = [("Department", d, None) for d in rng.sample(departments[company], 3)]
+        picked += [("Designation", None, d) for d in rng.sample(designations, 3)]
+        for idx, (dimension, dept, desig) in enumerate(picked, start=1):
+            lines.append([
+                f"{name}-{idx}", name, "Saudization Policy", "policy_lines", idx,
+                dimension, dept, desig, rng.choice((20, 30, 45, 60)), 3, *_std(now, user),
+            ])
+    _bulk("Saudization Policy", ["name", "company", "effective_from", "default_target_percent", *_STD_FIELDS], policies)
+    _bulk("Saudization Policy Line", [
+        "name", "parent", "parenttype", "parentfield", "idx",
+        "dimension_type", "department", "designation", "target_percent", "min_headcount", *_STD_FIELDS,
+    ], lines)
+
+
+def cleanup():
+    """Delete every synthetic row created by `generate`."""
+    _guard()
+    like = f"{PREFIX}%"
+    frappe.db.sql("DELETE FROM `tabSaudization Policy Line` WHERE parent LIKE %s", (like,))
+    frappe.db.sql("DELETE FROM `tabSaudization Policy` WHERE company LIKE %s", (like,))
+    frappe.db.sql(f"DELETE FROM `tab{salary.CURRENT_SALARY_DOCTYPE}` WHERE employee LIKE %s", (like,))
+    if frappe.db.table_exists("tabSalary Structure Assignment"):
+        frappe.db.sql("DELETE FROM `tabSalary Structure Assignment` WHERE name LIKE %s", (like,))
+    for doctype in ("Employee", "Department", "Designation", "Branch", "Company"):
+        frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE name LIKE %s", (like,))
+
+    hierarchy.invalidate()
+    policy.invalidate()
+    cache.bump_all()
+    frappe.db.commit()
+
+
+# --- timing --------------------------------------------------------------------------------
+
+
+def _reset_worker_caches():
+    """Forget per-worker and per-request state so every timed call computes from the database."""
+    from saudization_dashboard import cube, nationality
+
+    cube._cubes.clear()
+    policy._resolvers.clear()
+    nationality._process_maps.clear()
+    frappe.local.saudization_policy_resolver = None
+
+
+def _time(fn, kwargs, repeat):
+    from saudization_dashboard.profiling import _SqlMeter
+
+    samples, meter = [], None
+    for _i in range(repeat):
+        _reset_worker_caches()
+        meter = _SqlMeter()
+        start = time.perf_counter()
+        with meter:
+            fn(**kwargs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "sql_count": meter.count,
+        "rows": meter.rows,
+    }
+
+
+def _endpoint_cases(company, holding):
+    """(name, fn, kwargs) for every profiled endpoint in api.py, in a company and a holding scope."""
+    from saudization_dashboard import api, profiling
+
+    department = frappe.db.get_value("Employee", {"company": company, "status": "Active"}, "department")
+    cases = []
+    for endpoint in sorted(profiling.ENDPOINTS):
+        fn = inspect.unwrap(getattr(api, endpoint))
+        params = inspect.signature(fn).parameters
+        if "company" in params:
+            kwargs = {"company": company}
+            if "department" in params and params["department"].default is inspect.Parameter.empty:
+                kwargs["department"] = department
+            cases.append((f"api.{endpoint}[company]", fn, kwargs))
+        if holding and "holding_company" in params:
+            cases.append((f"api.{endpoint}[holding]", fn, {"holding_company": holding}))
+    return cases
+
+
+def _report_cases(company):
+    """(name, fn, kwargs) for every shipped report, with its default filters."""
+    from frappe.desk.query_report import run as run_report
+
+    from saudization_dashboard.reports import REPORTS
+
+    return [
+        (f"report.{name}", run_report, {
+            "report_name": name, "filters": {**defaults, "company": company}, "ignore_prepared_report": True,
+        })
+        for name, defaults in REPORTS.items()
+    ]
+
+
+def _scale():
+    like = f"{PREFIX}%"
+    return {
+        "employees": frappe.db.count("Employee", {"name": ["like", like]}),
+        "companies": frappe.db.count("Company", {"name": ["like", like]}),
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Timings slower than the baseline by more than `tolerance` (and MIN_DELTA_MS)."""
+    regressions = []
+    previous = (baseline or {}).get("timings") or {}
+    for name, current in results["timings"].items():
+        before = previous.get(name)
+        if not before:
+            continue
+        now_ms, base_ms = current["median_ms"], before["median_ms"]
+        if now_ms > base_ms * (1 + tolerance) and now_ms - base_ms > MIN_DELTA_MS:
+            regressions.append({
+                "name": name,
+                "baseline_ms": base_ms,
+                "median_ms": now_ms,
+                "ratio": round(now_ms / base_ms, 2) if base_ms else None,
+                "sql_count": current["sql_count"],
+                "baseline_sql_count": before.get("sql_count"),
+            })
+    return regressions
+
+
+def run(company=None, holding=None, repeat=3, baseline=None, output=None, tolerance=DEFAULT_TOLERANCE, update_baseline=False, verbose=True):
+    """Time every endpoint and report against the synthetic data and compare with the baseline.
+
+    `company` defaults to the largest synthetic company and `holding` to the first synthetic
+    holding. Paths are relative to the site directory.
+    """
+    _guard()
+    import saudization_dashboard.api  # noqa: F401 - registers the profiled endpoints
+
+    company = company or frappe.db.sql(
+        "SELECT company FROM `tabEmployee` WHERE name LIKE %s GROUP BY company ORDER BY COUNT(*) DESC LIMIT 1",
+        (f"{PREFIX}%",),
+    )[0][0]
+    holding = holding or next((h for h in sorted(hierarchy.get_hierarchy()["descendants"]) if h.startswith(PREFIX)), None)
+    repeat = max(1, int(repeat))
+
+    # The result cache would turn every repeat into a Redis read.
+    cache_flag = frappe.db.get_single_value("Saudization Settings", "enable_result_cache")
+    frappe.db.set_single_value("Saudization Settings", "enable_result_cache", 0)
+    timings = {}
+    try:
+        for name, fn, kwargs in _endpoint_cases(company, holding) + _report_cases(company):
+            timings[name] = _time(fn, kwargs, repeat)
+            if verbose:
+                t = timings[name]
+                print(f"{t['median_ms']:>10.1f} ms  {t['sql_count']:>5} sql  {name}")
+    finally:
+        frappe.db.set_single_value("Saudization Settings", "enable_result_cache", cache_flag)
+        frappe.db.commit()
+
+    results = {
+        "meta": {
+            "at": str(now_datetime()),
+            "site": frappe.local.site,
+            "company": company,
+            "holding": holding,
+            "repeat": repeat,
+            **_scale(),
+        },
+        "timings": timings,
+    }
+
+    baseline_path = frappe.get_site_path(baseline or DEFAULT_BASELINE)
+    previous = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            previous = json.load(f)
+    results["regressions"] = compare(results, previous, float(tolerance))
+
+    with open(frappe.get_site_path(output or DEFAULT_OUTPUT), "w") as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    if previous is None or update_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump({k: results[k] for k in ("meta", "timings")}, f, indent=1, sort_keys=True)
+
+    if verbose:
+        if previous is None:
+            print(f"No baseline yet; wrote {baseline_path}")
+        for r in results["regressions"]:
+            print(f"REGRESSION {r['name']}: {r['baseline_ms']} ms -> {r['median_ms']} ms (x{r['ratio']})")
+    return results
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m saudization_dashboard.benchmark")
+    parser.add_argument("--site", required=True)
+    parser.add_argument("--sites-path", default=".")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate")
+    gen.add_argument("--scale", default="10k", help="1k, 10k, 100k, 1m or an employee count")
+    gen.add_argument("--companies", type=int, default=10)
+    gen.add_argument("--seed", type=int, default=42)
+
+    bench = sub.add_parser("run")
+    bench.add_argument("--company")
+    bench.add_argument("--holding")
+    bench.add_argument("--repeat", type=int, default=3)
+    bench.add_argument("--baseline")
+    bench.add_argument("--output")
+    bench.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    bench.add_argument("--update-baseline", action="store_true")
+
+    sub.add_parser("cleanup")
+    args = parser.parse_args(argv)
+
+    frappe.init(site=args.site, sites_path=args.sites_path)
+    frappe.connect()
+    frappe.set_user("Administrator")
+    try:
+        if args.command == "generate":
+            print(generate(args.scale, args.companies, args.seed))
+        elif args.command == "cleanup":
+            cleanup()
+        else:
+            results = run(args.company, args.holding, args.repeat, args.baseline, args.output,
+                          args.tolerance, args.update_baseline)
+            return 1 if results["regressions"] else 0
+    finally:
+        frappe.destroy()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
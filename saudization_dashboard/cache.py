@@ -0,0 +1,279 @@
+import frappe
+
+import functools
+import hashlib
+import inspect
+import json
+import time
+
+from frappe.utils import today
+
+
+RESULT_PREFIX = "saudization_dashboard:result"
+VERSION_PREFIX = "saudization_dashboard:version"
+STATS_KEY = "saudization_dashboard:cache_stats"
+COMPUTING_PREFIX = "saudization_dashboard:computing"
+LAST_WRITE_KEY = "saudization_dashboard:last_write"
+
+# Version scopes: GLOBAL is bumped when settings change (invalidates everything),
+# ALL_COMPANIES whenever any company changes (holding / all-company payloads),
+# and one counter per company for company-scoped payloads.
+GLOBAL_SCOPE = "global"
+ALL_COMPANIES_SCOPE = "all"
+# Dashboard theme and navigation singletons.
+UI_SCOPE = "ui"
+
+DEFAULT_TTL = 6 * 60 * 60
+
+# Single flight: concurrent misses for one key wait this long for the first caller's result
+# before computing it themselves. The lock expires on its own if that caller dies.
+SINGLE_FLIGHT_WAIT = 20
+SINGLE_FLIGHT_LOCK_TTL = 120
+SINGLE_FLIGHT_POLL = (0.05, 0.5)
+
+# Deletes the lock only if it still holds our token (it may have expired and been retaken).
+_RELEASE_LOCK = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+# Names of every cached endpoint, for the stats report.
+ENDPOINTS = set()
+
+
+def _redis_key(key):
+    return frappe.cache().make_key(key)
+
+
+def _settings():
+    # Document cache, not get_single_value: this runs on every call, hits included.
+    try:
+        settings = frappe.get_cached_doc("Saudization Settings")
+        enabled = settings.get("enable_result_cache")
+        ttl = settings.get("result_cache_ttl")
+    except Exception:
+        return True, DEFAULT_TTL
+    return bool(int(enabled if enabled is not None else 1)), int(ttl or DEFAULT_TTL)
+
+
+def get_version(scope):
+    value = frappe.cache().get(_redis_key(f"{VERSION_PREFIX}:{scope}"))
+    return int(value or 0)
+
+
+def after_commit(fn):
+    """Run `fn` again once the current transaction commits (dropped on rollback)."""
+    callbacks = getattr(getattr(frappe.local, "db", None), "after_commit", None)
+    if callbacks is not None:
+        callbacks.add(fn)
+
+
+def _incr(scope):
+    frappe.cache().incr(_redis_key(f"{VERSION_PREFIX}:{scope}"))
+    # Lets replica reads wait out the lag behind this change (replica.py).
+    frappe.cache().set_value(LAST_WRITE_KEY, time.time())
+
+
+def bump_version(scope):
+    """Bump now, and again after commit.
+
+    Doc events run before the transaction commits, so a concurrent reader can miss the cache
+    after the first bump, still read the old rows and store them under the new version; the
+    second bump retires that entry.
+    """
+    _incr(scope)
+    after_commit(functools.partial(_incr, scope))
+
+
+def bump_company(company):
+    """Invalidate every cached payload that depends on `company`."""
+    if company:
+        bump_version(f"company:{company}")
+    bump_version(ALL_COMPANIES_SCOPE)
+
+
+def bump_all():
+    """Invalidate every cached payload (settings changed)."""
+    bump_version(GLOBAL_SCOPE)
+
+
+def _normalize(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in sorted(value.items())}
+    value = str(value).strip()
+    return value or None
+
+
+def _scope_for(bound_args, company_arg):
+    company = _normalize(bound_args.get(company_arg)) if company_arg else None
+    return f"company:{company}" if company else ALL_COMPANIES_SCOPE
+
+
+def _stats_key(endpoint, outcome):
+    return _redis_key(f"{STATS_KEY}:{endpoint}:{outcome}")
+
+
+def _record(endpoint, outcome):
+    try:
+        frappe.cache().incr(_stats_key(endpoint, outcome))
+    except Exception:
+        pass
+
+
+def _if_none_match(fn):
+    """The client's ETag when this request called `fn` conditionally, else None.
+
+    Sent as the `if_none_match` argument (frappe.call) or the If-None-Match header; only the
+    endpoint named by the request's `cmd` answers conditionally, not endpoints it calls.
+    """
+    if getattr(frappe.local, "request", None) is None:
+        return None
+    if frappe.form_dict.get("cmd") != f"{fn.__module__}.{fn.__name__}":
+        return None
+    if "if_none_match" in frappe.form_dict:
+        return (frappe.form_dict.get("if_none_match") or "").strip()
+    header = frappe.request.headers.get("If-None-Match")
+    if header is None:
+        return None
+    return header.strip().removeprefix("W/").strip('"')
+
+
+def cache_key(endpoint, args, scope):
+    """Result key: endpoint + normalized arguments + the versions the payload depends on."""
+    payload = json.dumps({
+        "args": {k: _normalize(v) for k, v in sorted(args.items())},
+        # Endpoints default as-on dates and tenure to "today".
+        "today": today(),
+        "versions": [get_version(GLOBAL_SCOPE), get_version(scope)],
+    }, sort_keys=True, default=str)
+    digest = hashlib.sha1(payload.encode()).hexdigest()
+    return f"{RESULT_PREFIX}:{endpoint}:{digest}"
+
+
+def _single_flight(endpoint, key, ttl, compute):
+    """Compute a missing payload once across workers: the first caller holds a Redis lock for
+    `key` and computes; concurrent callers poll for its result for up to SINGLE_FLIGHT_WAIT
+    seconds and compute it themselves only if it does not arrive (or the first caller failed).
+    """
+    redis = frappe.cache()
+    lock = _redis_key(f"{COMPUTING_PREFIX}:{key}")
+    token = frappe.generate_hash(length=12)
+    if redis.set(lock, token, nx=True, ex=SINGLE_FLIGHT_LOCK_TTL):
+        try:
+            value = compute()
+            redis.set_value(key, {"value": value}, expires_in_sec=ttl)
+            return value
+        finally:
+            redis.eval(_RELEASE_LOCK, 1, lock, token)
+
+    deadline = time.monotonic() + SINGLE_FLIGHT_WAIT
+    delay, max_delay = SINGLE_FLIGHT_POLL
+    while time.monotonic() < deadline:
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+        hit = redis.get_value(key, expires=True)
+        if hit is not None:
+            _record(endpoint, "coalesced")
+            return hit["value"]
+        # Raw get, like the set above: RedisWrapper.exists() would prefix `lock` a second time.
+        if redis.get(lock) is None:
+            break
+
+    value = compute()
+    redis.set_value(key, {"value": value}, expires_in_sec=ttl)
+    return value
+
+
+def cached(company_arg="company", scope=None):
+    """Cache a read-only endpoint's result in Redis until its company (or all companies) changes.
+
+    `company_arg` names the argument that scopes the payload to one company; calls without it
+    depend on every company. A fixed `scope` (e.g. UI_SCOPE) replaces both. Must sit below
+    `@frappe.whitelist()`.
+
+    Concurrent misses for the same key are computed once (`_single_flight`).
+
+    The key doubles as the payload's ETag. A request made with `if_none_match` (or an
+    If-None-Match header) gets `{"etag", "not_modified", "data"}` back, and `data` is left out
+    when the client's ETag is still current, before anything is read or computed.
+    """
+
+    def decorator(fn):
+        endpoint = fn.__name__
+        ENDPOINTS.add(endpoint)
+        signature = inspect.signature(fn)
+
+        def key_for(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return cache_key(endpoint, bound.arguments, scope or _scope_for(bound.arguments, company_arg))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = None
+            if_none_match = _if_none_match(fn)
+            if if_none_match is not None:
+                # The ETag depends only on the arguments, today and the Redis versions, so a
+                # match is answered before settings or anything else is read from the database.
+                key = key_for(args, kwargs)
+                if if_none_match == key.rsplit(":", 1)[-1]:
+                    _record(endpoint, "not_modified")
+                    return {"etag": if_none_match, "not_modified": 1}
+
+            enabled, ttl = _settings()
+            if not enabled and if_none_match is None:
+                return fn(*args, **kwargs)
+            key = key or key_for(args, kwargs)
+            etag = key.rsplit(":", 1)[-1]
+
+            # expires=True: a miss must not be remembered for the rest of the request.
+            hit = frappe.cache().get_value(key, expires=True) if enabled else None
+            if hit is not None:
+                _record(endpoint, "hit")
+                value = hit["value"]
+            elif enabled:
+                _record(endpoint, "miss")
+                value = _single_flight(endpoint, key, ttl, lambda: fn(*args, **kwargs))
+            else:
+                value = fn(*args, **kwargs)
+            if if_none_match is None:
+                return value
+            return {"etag": etag, "not_modified": 0, "data": value}
+
+        return wrapper
+
+    return decorator
+
+
+@frappe.whitelist()
+def get_cache_stats():
+    """Hit/miss counters per endpoint since the last reset."""
+    frappe.only_for("System Manager")
+    import saudization_dashboard.api  # noqa: F401 - registers the cached endpoints
+
+    out = {}
+    for endpoint in sorted(ENDPOINTS):
+        hits = int(frappe.cache().get(_stats_key(endpoint, "hit")) or 0)
+        misses = int(frappe.cache().get(_stats_key(endpoint, "miss")) or 0)
+        not_modified = int(frappe.cache().get(_stats_key(endpoint, "not_modified")) or 0)
+        coalesced = int(frappe.cache().get(_stats_key(endpoint, "coalesced")) or 0)
+        calls = hits + misses
+        out[endpoint] = {
+            "hits": hits,
+            "misses": misses,
+            "coalesced": coalesced,
+            "not_modified": not_modified,
+            "hit_ratio": round(hits / calls, 3) if calls else None,
+        }
+    return out
+
+
+@frappe.whitelist()
+def reset_cache_stats():
+    frappe.only_for("System Manager")
+    import saudization_dashboard.api  # noqa: F401
+
+    for endpoint in ENDPOINTS:
+        frappe.cache().delete(*(_stats_key(endpoint, o) for o in ("hit", "miss", "coalesced", "not_modified")))
+    return get_cache_stats()
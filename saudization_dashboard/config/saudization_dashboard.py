@@ -8,6 +8,7 @@ def get_data():
             "items": [
                 {"type": "doctype", "name": "Saudization Settings", "label": _("Saudization Settings")},
                 {"type": "doctype", "name": "Saudization Policy", "label": _("Saudization Policy")},
+                {"type": "page", "name": "saudization-performance", "label": _("Saudization Performance")},
             ],
         },
         {
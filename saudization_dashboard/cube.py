@@ -0,0 +1,231 @@
+import frappe
+
+from array import array
+from collections import OrderedDict
+from decimal import Decimal
+
+from frappe.utils import getdate
+
+from saudization_dashboard import cache
+from saudization_dashboard.salary import CURRENT_SALARY_JOIN
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback over array.array columns
+    np = None
+
+
+SALARY_BANDS = ('Up to 5k', '5k-10k', '10k-15k', '15k+')
+DIMENSIONS = ('department', 'designation', 'branch', 'nationality_group', 'salary_band')
+
+# Per worker process; a handful of companies is plenty for a dashboard session.
+MAX_CUBES = 16
+_cubes = OrderedDict()
+
+
+def salary_band(base):
+    base = base or 0
+    if base <= 5000:
+        return 'Up to 5k'
+    if base <= 10000:
+        return '5k-10k'
+    if base <= 15000:
+        return '10k-15k'
+    return '15k+'
+
+
+def months_between(start, end):
+    # TIMESTAMPDIFF(MONTH, start, end) for dates
+    months = (end.year - start.year) * 12 + (end.month - start.month)
+    if months > 0 and end.day < start.day:
+        months -= 1
+    elif months < 0 and end.day > start.day:
+        months += 1
+    return months
+
+
+def _column(values, typecode):
+    if np is not None:
+        return np.array(values, dtype={'i': np.int32, 'b': np.int8, 'q': np.int64}[typecode])
+    return array(typecode, values)
+
+
+class _Dimension:
+    """Dictionary-encoded column: `codes[i]` indexes `labels`; NULL is a label of its own."""
+
+    def __init__(self, values):
+        index = {}
+        self.codes = _column([index.setdefault(v, len(index)) for v in values], 'i')
+        self.labels = list(index)
+        self.index = index
+
+
+class WorkforceCube:
+    """A company's active employees as columnar arrays, answering group-bys in memory.
+
+    Counts follow the SQL they replace: `is_saudi` NULL counts in the headcount but neither
+    as Saudi nor as non-Saudi, and NULL / '' dimension values stay distinct groups.
+    """
+
+    def __init__(self, company, rows, today):
+        self.company = company
+        self.today = today
+        self.size = len(rows)
+
+        self.dimensions = {
+            'department': _Dimension([r.department for r in rows]),
+            'designation': _Dimension([r.designation for r in rows]),
+            'branch': _Dimension([r.branch for r in rows]),
+            'nationality_group': _Dimension([r.nationality_group for r in rows]),
+            'salary_band': _Dimension([salary_band(r.base) for r in rows]),
+        }
+        self.is_saudi = _column([int(r.is_saudi) if r.is_saudi is not None else -1 for r in rows], 'b')
+        # Currency has two decimals, so cents keep the salary sums exact.
+        self.has_base = _column([r.base is not None for r in rows], 'b')
+        self.base_cents = _column([int((Decimal(str(r.base)) * 100).to_integral_value()) if r.base is not None else 0 for r in rows], 'q')
+        doj = [r.date_of_joining for r in rows]
+        self.joined = _column([d.toordinal() if d else 0 for d in doj], 'i')
+        self.has_doj = _column([d is not None for d in doj], 'b')
+        self.tenure_months = _column([months_between(d, today) if d else 0 for d in doj], 'i')
+        self.join_month = _Dimension([d.strftime('%Y-%m-01') if d else None for d in doj])
+
+    # --- masks -------------------------------------------------------------------------
+
+    def mask(self, **filters):
+        """Rows matching every truthy filter (dimension=value); unknown values match nothing."""
+        if np is not None:
+            out = np.ones(self.size, dtype=bool)
+            for dim, value in filters.items():
+                if value:
+                    code = self.dimensions[dim].index.get(value)
+                    out &= (self.dimensions[dim].codes == code) if code is not None else False
+            return out
+
+        selected = range(self.size)
+        for dim, value in filters.items():
+            if value:
+                code = self.dimensions[dim].index.get(value)
+                codes = self.dimensions[dim].codes
+                selected = [i for i in selected if codes[i] == code] if code is not None else []
+        return list(selected)
+
+    def joined_since(self, mask, since):
+        """Narrow `mask` to rows with a joining date on or after `since`."""
+        ordinal = since.toordinal()
+        if np is not None:
+            return mask & (self.joined >= ordinal)
+        return [i for i in mask if self.joined[i] >= ordinal]
+
+    # --- aggregates --------------------------------------------------------------------
+
+    def _counts(self, codes, size, mask):
+        """Per-code [headcount, saudi, non_saudi] as three lists of length `size`."""
+        if np is not None:
+            sel = codes[mask]
+            flags = self.is_saudi[mask]
+            return (
+                np.bincount(sel, minlength=size).tolist(),
+                np.bincount(sel[flags == 1], minlength=size).tolist(),
+                np.bincount(sel[flags == 0], minlength=size).tolist(),
+            )
+
+        total, saudi, non_saudi = [0] * size, [0] * size, [0] * size
+        for i in mask:
+            c = codes[i]
+            total[c] += 1
+            if self.is_saudi[i] == 1:
+                saudi[c] += 1
+            elif self.is_saudi[i] == 0:
+                non_saudi[c] += 1
+        return total, saudi, non_saudi
+
+    def group(self, dimension, mask):
+        """{label: [headcount, saudi, non_saudi]} for groups with at least one row."""
+        dim = self.join_month if dimension == 'join_month' else self.dimensions[dimension]
+        total, saudi, non_saudi = self._counts(dim.codes, len(dim.labels), mask)
+        return {label: [total[c], saudi[c], non_saudi[c]] for c, label in enumerate(dim.labels) if total[c]}
+
+    def group2(self, first, second, mask):
+        """{(label_a, label_b): [headcount, saudi, non_saudi]} over two dimensions."""
+        a, b = self.dimensions[first], self.dimensions[second]
+        width = len(b.labels)
+        if np is not None:
+            combined = a.codes.astype(np.int64) * width + b.codes
+            present, inverse = np.unique(combined[mask], return_inverse=True)
+            flags = self.is_saudi[mask]
+            size = len(present)
+            total = np.bincount(inverse, minlength=size).tolist()
+            saudi = np.bincount(inverse[flags == 1], minlength=size).tolist()
+            non_saudi = np.bincount(inverse[flags == 0], minlength=size).tolist()
+            return {
+                (a.labels[int(k) // width], b.labels[int(k) % width]): [total[i], saudi[i], non_saudi[i]]
+                for i, k in enumerate(present.tolist())
+            }
+
+        out = {}
+        for i in mask:
+            acc = out.setdefault((a.labels[a.codes[i]], b.labels[b.codes[i]]), [0, 0, 0])
+            acc[0] += 1
+            if self.is_saudi[i] == 1:
+                acc[1] += 1
+            elif self.is_saudi[i] == 0:
+                acc[2] += 1
+        return out
+
+    def totals(self, mask):
+        """(headcount, saudi, non_saudi) under `mask`."""
+        if np is not None:
+            flags = self.is_saudi[mask]
+            return int(flags.size), int((flags == 1).sum()), int((flags == 0).sum())
+        flags = [self.is_saudi[i] for i in mask]
+        return len(flags), flags.count(1), flags.count(0)
+
+    def _sum_count(self, values, valid, mask, saudi_flag):
+        if np is not None:
+            sel = mask & (self.is_saudi == saudi_flag) & (valid != 0)
+            return int(values[sel].sum()), int(sel.sum())
+        picked = [values[i] for i in mask if self.is_saudi[i] == saudi_flag and valid[i]]
+        return sum(picked), len(picked)
+
+    def avg_salary(self, mask, saudi_flag):
+        """AVG(base) over Saudi (1) / non-Saudi (0) rows with a salary, as a Decimal; None if none."""
+        total, count = self._sum_count(self.base_cents, self.has_base, mask, saudi_flag)
+        return (Decimal(total) / 100 / count) if count else None
+
+    def avg_tenure_months(self, mask, saudi_flag):
+        """AVG(TIMESTAMPDIFF(MONTH, date_of_joining, today)) for rows with a joining date."""
+        total, count = self._sum_count(self.tenure_months, self.has_doj, mask, saudi_flag)
+        return (Decimal(total) / count) if count else None
+
+
+def _load(company, today):
+    rows = frappe.db.sql(f"""
+    SELECT
+      e.department, e.designation, e.branch,
+      e.saudization_nationality_group AS nationality_group,
+      e.is_saudi, e.date_of_joining,
+      ls.base AS base
+    FROM `tabEmployee` e
+    {CURRENT_SALARY_JOIN}
+    WHERE e.status='Active' AND e.company=%(company)s
+    """, {"company": company}, as_dict=True)
+    return WorkforceCube(company, rows, today)
+
+
+def get_cube(company):
+    """The company's cube, rebuilt only when its cache version (or the day) changes."""
+    today = getdate()
+    stamp = (cache.get_version(cache.GLOBAL_SCOPE), cache.get_version(f"company:{company}"), today)
+    key = (frappe.local.site, company)
+
+    entry = _cubes.get(key)
+    if entry and entry[0] == stamp:
+        _cubes.move_to_end(key)
+        return entry[1]
+
+    cube = _load(company, today)
+    _cubes[key] = (stamp, cube)
+    _cubes.move_to_end(key)
+    while len(_cubes) > MAX_CUBES:
+        _cubes.popitem(last=False)
+    return cube
@@ -0,0 +1,88 @@
+import frappe
+
+from saudization_dashboard import aggregates, cache, hierarchy, movement, nationality, policy, reports, salary, snapshot
+
+
+def _companies_touched(doc):
+    companies = {doc.get("company")}
+    before = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+    if before:
+        companies.add(before.get("company"))
+    return {c for c in companies if c}
+
+
+def on_employee_change(doc, method=None):
+    """Employee on_update / on_trash: record the movement, update or invalidate aggregates and cached results."""
+    if method == "on_trash":
+        movement.forget(doc.name)
+    else:
+        movement.record(doc)
+
+    companies = _companies_touched(doc)
+    # Incremental mode moves the employee's counts in place; None means it is off.
+    stale = aggregates.apply_employee_delta(doc, method)
+    for company in companies:
+        if stale is None or company in stale:
+            snapshot.mark_company_dirty(company)
+        cache.bump_company(company)
+
+
+def on_company_data_change(doc, method=None):
+    """Policy and salary changes: invalidate the company's cached results."""
+    for company in _companies_touched(doc):
+        cache.bump_company(company)
+
+
+def on_policy_change(doc, method=None):
+    """Saudization Policy saved / deleted: reload the policy resolver and the company's results."""
+    policy.invalidate()
+    on_company_data_change(doc, method)
+
+
+def on_company_change(doc, method=None):
+    """Company saved / renamed / deleted: the holding tree (and every holding payload) may differ."""
+    hierarchy.invalidate()
+    cache.bump_company(doc.name)
+
+
+def on_salary_assignment_change(doc, method=None):
+    """Salary Structure Assignment submit / cancel: refresh the employee's current salary."""
+    salary.refresh_employee_salary(doc.get("employee"))
+    on_company_data_change(doc, method)
+
+
+def on_dashboard_ui_change(doc, method=None):
+    """Dashboard Theme / Navigation saved: pages reload the bootstrap payload."""
+    cache.bump_version(cache.UI_SCOPE)
+
+
+def _classification_inputs(doc):
+    return (
+        (doc.get("saudi_nationality") or "").strip(),
+        sorted((row.get("nationality") or "").strip() for row in (doc.get("gcc_nationalities") or [])),
+    )
+
+
+def on_settings_change(doc, method=None):
+    """Saudization Settings saved: every cached result may classify or target differently."""
+    cache.bump_all()
+    nationality.invalidate_nationality_map()
+
+    before = doc.get_doc_before_save()
+    if not before or _classification_inputs(before) != _classification_inputs(doc):
+        # Directly, not the whitelisted button endpoint: any role allowed to save Settings may get here.
+        frappe.enqueue(
+            "saudization_dashboard.nationality.reclassify_all_employees",
+            queue="long",
+            timeout=3600,
+            enqueue_after_commit=True,
+        )
+    if before and bool(before.get("use_movement_ledger")) != bool(doc.get("use_movement_ledger")):
+        # Month-end rows were built from the other history source.
+        for company in frappe.get_all("Company", pluck="name"):
+            snapshot.mark_company_dirty(company)
+    if bool(before and before.get("prepared_reports")) != bool(doc.get("prepared_reports")):
+        reports.apply_prepared_mode()
+    if doc.get("incremental_aggregation") and not (before and before.get("incremental_aggregation")):
+        # Counters start from a full count; until then dashboards read as before.
+        frappe.enqueue("saudization_dashboard.aggregates.reconcile", queue="long", enqueue_after_commit=True)
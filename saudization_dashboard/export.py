@@ -0,0 +1,168 @@
+import frappe
+from frappe import _
+
+import csv
+import hashlib
+import os
+import re
+
+
+EXPORT_FORMATS = ("csv", "xlsx")
+PAGE_SIZE = 2000
+REALTIME_EVENT = "saudization_employee_export"
+
+HEADER = [
+    "Employee", "Employee Number", "Employee Name", "Branch", "Department", "Designation",
+    "Type", "Nationality", "Nationality Group", "Date of Joining",
+]
+
+
+def iter_employee_rows(filters, page_size=PAGE_SIZE):
+    """Yield export rows (lists in HEADER order), one keyset page of tabEmployee at a time."""
+    from saudization_dashboard.api import _employee_as_on_where, _employee_keyset_where
+
+    after = None
+    while True:
+        params = {"limit": int(page_size)}
+        where = _employee_as_on_where(params, **filters)
+        if after:
+            where += " AND " + _employee_keyset_where(params, after)
+
+        rows = frappe.db.sql(
+            f"""
+            SELECT
+              e.name,
+              e.employee_number,
+              e.employee_name,
+              e.branch,
+              e.department,
+              e.designation,
+              IFNULL(e.is_saudi,0),
+              e.nationality,
+              e.saudization_nationality_group,
+              DATE_FORMAT(e.date_of_joining, '%%Y-%%m-%%d')
+            FROM `tabEmployee` e
+            WHERE {where}
+            ORDER BY e.employee_name ASC, e.name ASC
+            LIMIT %(limit)s
+            """,
+            params,
+        )
+        if not rows:
+            return
+
+        for r in rows:
+            yield [
+                r[0] or "", r[1] or "", r[2] or "", r[3] or "", r[4] or "", r[5] or "",
+                "Saudi" if int(r[6] or 0) == 1 else "Non-Saudi",
+                r[7] or "", r[8] or "", r[9] or "",
+            ]
+
+        if len(rows) < page_size:
+            return
+        after = (rows[-1][2], rows[-1][0])
+
+
+def _write_csv(path, rows):
+    # Excel-friendly UTF-8 with BOM
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _write_xlsx(path, rows):
+    from openpyxl import Workbook
+
+    # write_only keeps a single row in memory and spools the sheet to a temp file.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Employees")
+    ws.append(HEADER)
+    count = 0
+    for row in rows:
+        ws.append(row)
+        count += 1
+    wb.save(path)
+    return count
+
+
+def _content_hash(path):
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def _file_name(company, as_on, file_format):
+    safe_company = re.sub(r"[^\w\-]+", "_", company or "").strip("_")
+    return f"AlphaX_Employees_{safe_company}_{as_on.strftime('%Y%m%d')}_{frappe.generate_hash(length=6)}.{file_format}"
+
+
+def _notify(user, payload, subject):
+    frappe.publish_realtime(REALTIME_EVENT, payload, user=user, after_commit=True)
+    try:
+        frappe.get_doc({
+            "doctype": "Notification Log",
+            "for_user": user,
+            "type": "Alert",
+            "subject": subject,
+            "document_type": "File" if payload.get("file") else None,
+            "document_name": payload.get("file"),
+        }).insert(ignore_permissions=True)
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Saudization export notification failed")
+
+
+def run_employee_export(filters, file_format="csv", notify=False):
+    """Stream the filtered employee list into a private CSV / XLSX File and return its URL.
+
+    Rows are read in keyset pages and written straight to disk, so memory stays flat whatever
+    the row count. With `notify`, the requesting user gets a realtime event and a notification.
+    """
+    user = frappe.session.user
+    file_name = _file_name(filters.get("company"), filters["as_on"], file_format)
+    path = frappe.get_site_path("private", "files", file_name)
+    writer = _write_xlsx if file_format == "xlsx" else _write_csv
+
+    try:
+        count = writer(path, iter_employee_rows(filters))
+        file_doc = frappe.get_doc({
+            "doctype": "File",
+            "file_name": file_name,
+            "file_url": f"/private/files/{file_name}",
+            "is_private": 1,
+            "file_size": os.path.getsize(path),
+            "content_hash": _content_hash(path),
+        })
+        file_doc.flags.ignore_duplicate_entry_error = True
+        file_doc.insert(ignore_permissions=True)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        if notify:
+            frappe.db.rollback()
+            _notify(user, {"error": 1}, _("Employee export failed"))
+            frappe.db.commit()
+        raise
+
+    result = {"file_url": file_doc.file_url, "file": file_doc.name, "rows": count}
+    if notify:
+        _notify(user, result, _("Employee export is ready ({0} rows)").format(count))
+    return result
+
+
+def enqueue_employee_export(filters, file_format="csv"):
+    job = frappe.enqueue(
+        "saudization_dashboard.export.run_employee_export",
+        queue="long",
+        timeout=3600,
+        filters=filters,
+        file_format=file_format,
+        notify=True,
+    )
+    return {"queued": 1, "job_id": getattr(job, "id", None), "message": _("Export queued, you will be notified when the file is ready")}
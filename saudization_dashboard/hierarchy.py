@@ -0,0 +1,61 @@
+import frappe
+
+from saudization_dashboard import cache
+
+
+HIERARCHY_KEY = "saudization_dashboard:company_hierarchy"
+
+
+def _build():
+    """Company tree as a closure: every company -> all its descendants with their depth."""
+    if not frappe.db.table_exists("tabCompany"):
+        return {"parents": {}, "descendants": {}}
+
+    rows = frappe.db.sql("SELECT name, parent_company FROM `tabCompany` ORDER BY name", as_dict=True)
+    parents = {r.name: r.parent_company or None for r in rows}
+    children = {}
+    for r in rows:
+        if r.parent_company:
+            children.setdefault(r.parent_company, []).append(r.name)
+
+    descendants = {}
+    for root in parents:
+        out, seen = [], {root}
+        level, depth = children.get(root, []), 1
+        # Breadth-first; `seen` guards against parent_company cycles.
+        while level:
+            nxt = []
+            for name in level:
+                if name in seen:
+                    continue
+                seen.add(name)
+                out.append((name, depth))
+                nxt.extend(children.get(name, []))
+            level, depth = nxt, depth + 1
+        if out:
+            descendants[root] = out
+
+    return {"parents": parents, "descendants": descendants}
+
+
+def get_hierarchy():
+    return frappe.cache().get_value(HIERARCHY_KEY, generator=_build)
+
+
+def descendants(company):
+    """[(company, depth)] for every company below `company`, nearest levels first."""
+    return [tuple(d) for d in get_hierarchy()["descendants"].get(company, [])]
+
+
+def parent_of(company):
+    return get_hierarchy()["parents"].get(company)
+
+
+def _forget():
+    frappe.cache().delete_value(HIERARCHY_KEY)
+
+
+def invalidate():
+    _forget()
+    # A reader before the commit may have rebuilt the tree from the old rows.
+    cache.after_commit(_forget)
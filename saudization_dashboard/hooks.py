@@ -5,11 +5,56 @@ app_description = "Saudization HR analytics dashboard with theme + configurable
 app_email = "info@example.com"
 app_license = "MIT"
 
-# Exported fixtures shipped with this app (Custom Fields + Reports + Server Script)
+# Exported fixtures shipped with this app (Custom Fields + Server Script); reports are standard Script Reports
 fixtures = [
     {"dt": "Custom Field", "filters": [["name", "in", ["Employee-is_saudi", "Employee-saudization_nationality_group"]]]},
-    {"dt": "Report", "filters": [["name", "like", "Saudization%"]]},
     {"dt": "Server Script", "filters": [["name", "like", "Derive Saudization%"]]},
 ]
 
 after_install = "saudization_dashboard.install.after_install"
+
+# Re-checks the dashboard indexes on every migrate (cheap when they exist).
+after_migrate = [
+    "saudization_dashboard.indexes.ensure_indexes",
+    # Report JSON sync resets prepared_report; reapply the setting.
+    "saudization_dashboard.reports.apply_prepared_mode",
+]
+
+doc_events = {
+    "Employee": {
+        "on_update": "saudization_dashboard.events.on_employee_change",
+        "on_trash": "saudization_dashboard.events.on_employee_change",
+    },
+    "Company": {
+        "on_update": "saudization_dashboard.events.on_company_change",
+        "on_trash": "saudization_dashboard.events.on_company_change",
+        "after_rename": "saudization_dashboard.events.on_company_change",
+    },
+    "Salary Structure Assignment": {
+        "on_submit": "saudization_dashboard.events.on_salary_assignment_change",
+        "on_cancel": "saudization_dashboard.events.on_salary_assignment_change",
+    },
+    "Saudization Policy": {
+        "on_update": "saudization_dashboard.events.on_policy_change",
+        "on_trash": "saudization_dashboard.events.on_policy_change",
+    },
+    "Saudization Settings": {
+        "on_update": "saudization_dashboard.events.on_settings_change",
+    },
+    "Saudization Dashboard Theme": {
+        "on_update": "saudization_dashboard.events.on_dashboard_ui_change",
+    },
+    "Saudization Dashboard Navigation": {
+        "on_update": "saudization_dashboard.events.on_dashboard_ui_change",
+    },
+}
+
+scheduler_events = {
+    "hourly_long": [
+        "saudization_dashboard.snapshot.refresh_snapshots",
+        "saudization_dashboard.warmup.run_scheduled_warmup",
+    ],
+    "daily_long": [
+        "saudization_dashboard.aggregates.reconcile",
+    ],
+}
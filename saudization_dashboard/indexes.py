@@ -0,0 +1,137 @@
+import frappe
+from frappe import _
+
+import inspect
+
+
+# Composite indexes on tabEmployee behind the dashboard predicates.
+#   active:  the workforce cube load (company + status = 'Active') and department / designation groups.
+#   as_on:   the as-on snapshot (company + joining / relieving dates) grouped by branch,
+#            department or designation; wide enough to cover those queries without row lookups.
+EMPLOYEE_INDEXES = {
+    "saudization_company_active": ["company", "status", "is_saudi", "department", "designation"],
+    "saudization_company_as_on": [
+        "company", "date_of_joining", "relieving_date", "branch", "department", "designation", "is_saudi",
+    ],
+}
+
+SNAPSHOT_INDEXES = {
+    "saudization_snapshot_company_month": ["company", "month_end"],
+}
+
+# The ledger replay partitions by employee in effective order.
+MOVEMENT_INDEXES = {
+    "saudization_movement_employee_date": ["employee", "effective_date"],
+}
+
+
+def _ensure(doctype, indexes):
+    for index_name, fields in indexes.items():
+        if all(frappe.db.has_column(doctype, f) for f in fields):
+            frappe.db.add_index(doctype, fields, index_name)
+
+
+def ensure_indexes():
+    """Create any missing dashboard index (after_install / after_migrate; idempotent)."""
+    from saudization_dashboard.movement import MOVEMENT_DOCTYPE
+    from saudization_dashboard.search import ensure_search_indexes
+    from saudization_dashboard.snapshot import SNAPSHOT_DOCTYPE
+
+    if frappe.db.table_exists("tabEmployee"):
+        _ensure("Employee", EMPLOYEE_INDEXES)
+        ensure_search_indexes()
+    if frappe.db.table_exists("tab" + SNAPSHOT_DOCTYPE):
+        _ensure(SNAPSHOT_DOCTYPE, SNAPSHOT_INDEXES)
+    if frappe.db.table_exists("tab" + MOVEMENT_DOCTYPE):
+        _ensure(MOVEMENT_DOCTYPE, MOVEMENT_INDEXES)
+
+
+def _traced_queries(fn, *args, **kwargs):
+    """Run an endpoint (bypassing its decorators) and return the SELECTs it sent to tabEmployee."""
+    queries = []
+    original = frappe.db.sql
+
+    def recording(query, values=(), *a, **kw):
+        text = str(query)
+        if "tabEmployee" in text and text.lstrip().upper().startswith(("SELECT", "WITH")):
+            queries.append((text, values))
+        return original(query, values, *a, **kw)
+
+    frappe.db.sql = recording
+    try:
+        inspect.unwrap(fn)(*args, **kwargs)
+    finally:
+        del frappe.db.sql
+    return queries
+
+
+def _dashboard_calls(company):
+    from frappe.utils import getdate
+
+    from saudization_dashboard import api, cube
+
+    department = frappe.db.get_value("Employee", {"company": company, "department": ["is", "set"]}, "department")
+    # A name prefix that exists, so the search lookups return rows.
+    name = frappe.db.get_value("Employee", {"company": company, "employee_name": ["is", "set"]}, "employee_name")
+    calls = [
+        # The cube is cached per worker; load it directly so its query is always traced.
+        ("workforce cube", cube._load, {"company": company, "today": getdate()}),
+        ("get_kpis", api.get_kpis, {"company": company}),
+        ("get_dashboard_bundle", api.get_dashboard_bundle, {"company": company}),
+        ("get_company_drilldown", api.get_company_drilldown, {"company": company}),
+        ("get_top_risky_positions", api.get_top_risky_positions, {"company": company}),
+        # The list's COUNT sits behind its own @cached(); unwrap and trace it separately.
+        ("get_employee_list", api.get_employee_list, {"company": company, "with_total": 0}),
+        ("_employee_list_total", api._employee_list_total, {"company": company, "as_on": getdate()}),
+        ("get_executive_scorecard", api.get_executive_scorecard, {"company": company}),
+    ]
+    if name:
+        search = name.split()[0]
+        calls += [
+            ("get_employee_list search", api.get_employee_list, {"company": company, "search": search, "with_total": 0}),
+            ("_employee_list_total search", api._employee_list_total, {"company": company, "as_on": getdate(), "search": search}),
+        ]
+    if department:
+        calls.append(("get_designation_breakdown", api.get_designation_breakdown, {"company": company, "department": department}))
+    return calls
+
+
+def advise(company=None, verbose=True):
+    """EXPLAIN every tabEmployee query the dashboards run and flag plans that scan the table.
+
+    bench --site <site> execute saudization_dashboard.indexes.advise --kwargs "{'company': 'X'}"
+    """
+    company = company or frappe.db.get_value("Employee", {}, "company")
+    if not company:
+        return []
+
+    out = []
+    for endpoint, fn, kwargs in _dashboard_calls(company):
+        for query, values in _traced_queries(fn, **kwargs):
+            for plan in frappe.db.sql("EXPLAIN " + query, values, as_dict=True):
+                # `se` is the Employee alias of the search lookups (search.py).
+                if plan.get("table") not in ("e", "se", "tabEmployee"):
+                    continue
+                out.append({
+                    "endpoint": endpoint,
+                    "type": plan.get("type"),
+                    "key": plan.get("key"),
+                    "rows": plan.get("rows"),
+                    "extra": plan.get("Extra"),
+                    "ok": bool(plan.get("key")) and plan.get("type") != "ALL",
+                })
+
+    if verbose:
+        for r in out:
+            flag = "ok  " if r["ok"] else "SCAN"
+            print(f"{flag} {r['endpoint']:<28} type={r['type']} key={r['key']} rows={r['rows']} {r['extra'] or ''}")
+    return out
+
+
+@frappe.whitelist()
+def get_index_report(company=None):
+    """Index advisor for System Managers (same as `advise`, without printing)."""
+    frappe.only_for("System Manager")
+    if not company:
+        frappe.throw(_("Company is required"))
+    return advise(company, verbose=False)
@@ -54,6 +54,18 @@ def after_install():
     except Exception:
         frappe.log_error(frappe.get_traceback(), "Saudization Dashboard after_install failed")
 
+    try:
+        from saudization_dashboard.salary import rebuild_current_salaries
+        rebuild_current_salaries()
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Saudization Dashboard current salary build failed")
+
+    try:
+        from saudization_dashboard.indexes import ensure_indexes
+        ensure_indexes()
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Saudization Dashboard index setup failed")
+
     try:
         _ensure_workspace()
     except Exception:
@@ -0,0 +1,294 @@
+import frappe
+from frappe import _
+
+from frappe.utils import cint, getdate, now_datetime, today
+
+
+MOVEMENT_DOCTYPE = "Saudization Employee Movement"
+
+# Employee field -> ledger field for everything a movement row records.
+STATE_FIELDS = {
+    "company": "company",
+    "branch": "branch",
+    "department": "department",
+    "designation": "designation",
+    "is_saudi": "is_saudi",
+    "saudization_nationality_group": "nationality_group",
+}
+# Fields an Employee Transfer / Promotion can change (Employee Property History.fieldname).
+MOVED_FIELDS = ("branch", "department", "designation")
+# Derived from nationality: a change corrects the whole history instead of starting a movement.
+CLASSIFICATION_FIELDS = ("is_saudi", "saudization_nationality_group")
+
+_FIELDS = ["employee", "effective_date", "active", *STATE_FIELDS.values(), "source", "reference_name",
+           "creation", "modified", "owner", "modified_by"]
+CHUNK = 5000
+
+
+def ledger_enabled():
+    """True when historical headcounts should be replayed from the movement ledger."""
+    try:
+        return bool(int(frappe.db.get_single_value("Saudization Settings", "use_movement_ledger") or 0))
+    except Exception:
+        return False
+
+
+def _has_table():
+    return frappe.db.table_exists("tab" + MOVEMENT_DOCTYPE)
+
+
+def _state(doc):
+    state = {field: doc.get(field) or None for field in STATE_FIELDS}
+    state["is_saudi"] = cint(doc.get("is_saudi"))
+    return state
+
+
+def _date(value):
+    return getdate(value) if value else None
+
+
+def _row(employee, effective_date, state, active, source="Employee", reference=None, now=None, user=None):
+    now = now or now_datetime()
+    user = user or frappe.session.user
+    return [
+        employee, effective_date, 1 if active else 0, *(state[f] for f in STATE_FIELDS),
+        source, reference, now, now, user, user,
+    ]
+
+
+def _insert(rows):
+    for i in range(0, len(rows), CHUNK):
+        frappe.db.bulk_insert(MOVEMENT_DOCTYPE, fields=_FIELDS, values=rows[i:i + CHUNK])
+
+
+def _never_counted(joined, relieved):
+    # Mirrors the Employee predicate: a relieving date on or before joining means never counted.
+    return bool(joined and relieved and relieved <= joined)
+
+
+def _opening_rows(employee, state, joined, relieved, **kw):
+    never = _never_counted(joined, relieved)
+    rows = [_row(employee, joined, state, not never, **kw)]
+    if relieved and not never:
+        rows.append(_row(employee, relieved, state, False, **kw))
+    return rows
+
+
+def _change_date(doc, before):
+    """Transfers and promotions add a work-history row from the change date; other moves (e.g. company) count from today."""
+    known = {r.name for r in before.get("internal_work_history") or []}
+    dates = [getdate(r.from_date) for r in doc.get("internal_work_history") or [] if r.from_date and r.name not in known]
+    return max(dates) if dates else getdate(today())
+
+
+def classification_changed(before, after):
+    """True when a save corrects the employee's nationality classification (rewritten for all history)."""
+    old, new = _state(before), _state(after)
+    return any(old[f] != new[f] for f in CLASSIFICATION_FIELDS)
+
+
+def record(doc):
+    """Employee on_update: append the effective-dated movements this save implies."""
+    if not _has_table():
+        return
+
+    state = _state(doc)
+    joined, relieved = _date(doc.get("date_of_joining")), _date(doc.get("relieving_date"))
+    before = doc.get_doc_before_save()
+    if before is None or not frappe.db.exists(MOVEMENT_DOCTYPE, {"employee": doc.name}):
+        _insert(_opening_rows(doc.name, state, joined, relieved))
+        return
+
+    old_joined, old_relieved = _date(before.get("date_of_joining")), _date(before.get("relieving_date"))
+    if old_joined != joined:
+        # A corrected joining date is not a movement: move the opening row instead.
+        first = frappe.db.get_value(MOVEMENT_DOCTYPE, {"employee": doc.name}, "name", order_by="effective_date asc, name asc")
+        frappe.db.set_value(MOVEMENT_DOCTYPE, first, "effective_date", joined, update_modified=False)
+
+    rows = []
+    old_state = _state(before)
+    if classification_changed(before, doc):
+        # Effective from joining, like reclassify() and the in-place counters (aggregates.py),
+        # so trends and as-on queries agree with them about past months.
+        reclassify([doc.name], state["is_saudi"], state["saudization_nationality_group"])
+    if any(old_state[f] != state[f] for f in STATE_FIELDS if f not in CLASSIFICATION_FIELDS):
+        effective = _change_date(doc, before)
+        rows.append(_row(doc.name, effective, state, not (relieved and relieved <= effective)))
+    if old_relieved != relieved:
+        # Relieving date cleared or pushed out: active again from the old date (until the new one).
+        if old_relieved and (not relieved or relieved > old_relieved):
+            rows.append(_row(doc.name, old_relieved, state, True))
+        if relieved:
+            rows.append(_row(doc.name, relieved, state, False))
+    if rows:
+        _insert(rows)
+
+
+def reclassify(employees, is_saudi, group):
+    """A changed nationality rule applies to the employee's whole history, not from today."""
+    if _has_table() and employees:
+        frappe.db.sql(
+            f"""
+            UPDATE `tab{MOVEMENT_DOCTYPE}`
+            SET is_saudi = %(is_saudi)s, nationality_group = %(group)s
+            WHERE employee IN %(employees)s
+            """,
+            {"is_saudi": is_saudi, "group": group, "employees": tuple(employees)},
+        )
+
+
+def forget(employee):
+    """Employee deleted: it never existed for any historical month either."""
+    if _has_table() and employee:
+        frappe.db.delete(MOVEMENT_DOCTYPE, {"employee": employee})
+
+
+# --- seed ----------------------------------------------------------------------------------
+
+
+def _history_events():
+    """employee -> [(date, doctype, name, {field: (old, new)})] from submitted transfers and promotions."""
+    events = {}
+    sources = (
+        ("Employee Transfer", "transfer_date", "transfer_details", "new_company"),
+        ("Employee Promotion", "promotion_date", "promotion_details", None),
+    )
+    for doctype, date_field, child_field, company_field in sources:
+        if not frappe.db.table_exists("tab" + doctype):
+            continue
+        company_sql = f", {company_field} AS new_company, company AS old_company" if company_field else ""
+        docs = frappe.db.sql(
+            f"""
+            SELECT name, employee, {date_field} AS event_date{company_sql}
+            FROM `tab{doctype}`
+            WHERE docstatus = 1 AND {date_field} IS NOT NULL
+            """,
+            as_dict=True,
+        )
+        details = {}
+        for d in frappe.db.sql(
+            """
+            SELECT parent, fieldname, current, new
+            FROM `tabEmployee Property History`
+            WHERE parenttype = %(doctype)s AND parentfield = %(field)s AND fieldname IN %(fields)s
+            """,
+            {"doctype": doctype, "field": child_field, "fields": MOVED_FIELDS},
+            as_dict=True,
+        ):
+            details.setdefault(d.parent, {})[d.fieldname] = (d.current or None, d.new or None)
+
+        for d in docs:
+            changes = dict(details.get(d.name, {}))
+            if d.get("new_company") and d.get("new_company") != d.get("old_company"):
+                changes["company"] = (d.old_company, d.new_company)
+            if changes:
+                events.setdefault(d.employee, []).append((getdate(d.event_date), doctype, d.name, changes))
+    return events
+
+
+def _employee_rows(emp, events, now, user):
+    state = _state(emp)
+    joined, relieved = _date(emp.date_of_joining), _date(emp.relieving_date)
+    if not events:
+        return _opening_rows(emp.name, state, joined, relieved, now=now, user=user)
+
+    # Walk back from today's state to the one each record started from.
+    events = sorted(events, key=lambda e: (e[0], e[2]))
+    after = []
+    for event_date, doctype, name, changes in reversed(events):
+        after.append((event_date, doctype, name, dict(state)))
+        for field, (old, _new) in changes.items():
+            state[field] = old
+    after.reverse()
+
+    never = _never_counted(joined, relieved)
+    rows = [_row(emp.name, joined, state, not never, now=now, user=user)]
+    for event_date, doctype, name, moved in after:
+        # A record dated before joining takes effect on the joining date.
+        event_date = max(event_date, joined) if joined else event_date
+        active = not never and not (relieved and relieved <= event_date)
+        rows.append(_row(emp.name, event_date, moved, active, doctype, name, now=now, user=user))
+    if relieved and not never:
+        rows.append(_row(emp.name, relieved, _state(emp), False, now=now, user=user))
+    return rows
+
+
+def seed(employees=None):
+    """(Re)build the ledger from Employee and submitted Employee Transfer / Promotion records.
+
+    Movements recorded from direct Employee edits are replaced as well, so this is a
+    one-time seed (migrate patch) or a repair, not a routine job.
+    """
+    if not _has_table() or not frappe.db.table_exists("tabEmployee"):
+        return 0
+
+    where, params = "", {}
+    if employees:
+        where, params = "WHERE name IN %(employees)s", {"employees": tuple(employees)}
+        frappe.db.delete(MOVEMENT_DOCTYPE, {"employee": ["in", list(employees)]})
+    else:
+        frappe.db.sql(f"DELETE FROM `tab{MOVEMENT_DOCTYPE}`")
+
+    fields = ", ".join(STATE_FIELDS)
+    staff = frappe.db.sql(
+        f"SELECT name, {fields}, date_of_joining, relieving_date FROM `tabEmployee` {where} ORDER BY name",
+        params,
+        as_dict=True,
+    )
+    events = _history_events()
+    now, user = now_datetime(), frappe.session.user
+
+    rows = []
+    for emp in staff:
+        rows.extend(_employee_rows(emp, events.get(emp.name), now, user))
+        if len(rows) >= CHUNK:
+            _insert(rows)
+            rows = []
+    _insert(rows)
+    return len(staff)
+
+
+@frappe.whitelist()
+def rebuild_ledger():
+    """Reseed the movement ledger (System Manager)."""
+    frappe.only_for("System Manager")
+    frappe.enqueue("saudization_dashboard.movement.seed", queue="long")
+    return {"queued": 1, "message": _("Movement ledger rebuild queued")}
+
+
+# --- replay --------------------------------------------------------------------------------
+
+
+def interval_rows(companies, branch=None, dimensions=("branch",)):
+    """Active intervals from the ledger, shaped like the Employee interval queries.
+
+    Each movement row holds from its effective_date until the employee's next row; rows are
+    grouped by company, `dimensions`, is_saudi and identical intervals, and the date columns
+    keep the Employee names (date_of_joining / relieving_date) so callers can switch sources.
+    """
+    dims = "".join(f", x.{d}" for d in dimensions)
+    where = ["x.active = 1", "x.company IN %(companies)s",
+             "(x.date_from IS NULL OR x.date_to IS NULL OR x.date_to > x.date_from)"]
+    params = {"companies": tuple(companies)}
+    if branch:
+        where.append("x.branch = %(branch)s")
+        params["branch"] = branch
+
+    return frappe.db.sql(
+        f"""
+        SELECT x.company{dims}, x.is_saudi,
+               x.date_from AS date_of_joining, x.date_to AS relieving_date, COUNT(*) AS headcount
+        FROM (
+            SELECT m.*, m.effective_date AS date_from,
+                   LEAD(m.effective_date) OVER (PARTITION BY m.employee ORDER BY m.effective_date, m.name) AS date_to
+            FROM `tab{MOVEMENT_DOCTYPE}` m
+            WHERE m.employee IN (
+                SELECT DISTINCT employee FROM `tab{MOVEMENT_DOCTYPE}` WHERE company IN %(companies)s
+            )
+        ) x
+        WHERE {' AND '.join(where)}
+        GROUP BY x.company{dims}, x.is_saudi, x.date_from, x.date_to
+        """,
+        params,
+        as_dict=True,
+    )
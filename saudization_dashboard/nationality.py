@@ -0,0 +1,175 @@
+import frappe
+from frappe import _
+
+from saudization_dashboard import aggregates, cache, movement, snapshot
+
+
+# Used when Saudization Settings cannot be loaded (same list as the Employee server script).
+FALLBACK_GCC = {"Saudi Arabia", "United Arab Emirates", "Kuwait", "Bahrain", "Qatar", "Oman"}
+
+
+def _norm(x):
+    return (x or "").strip()
+
+
+MAP_KEY = "saudization_dashboard:nationality_map"
+MAP_VERSION_SCOPE = "nationality_map"
+
+NON_GCC = (0, "Non-GCC")
+UNKNOWN = (0, "Unknown")
+
+# site -> (map version, {nationality: (is_saudi, group)}); survives across requests in a worker.
+_process_maps = {}
+
+
+def get_classification_inputs():
+    """Return (saudi_nationality, gcc_nationalities) from Saudization Settings."""
+    try:
+        settings = frappe.get_single("Saudization Settings")
+        saudi_nat = _norm(settings.saudi_nationality) or None
+        gcc_set = {_norm(getattr(row, "nationality", None)) for row in (settings.gcc_nationalities or [])}
+    except Exception:
+        saudi_nat, gcc_set = None, set(FALLBACK_GCC)
+    return saudi_nat, gcc_set
+
+
+def _build_map():
+    saudi_nat, gcc_set = get_classification_inputs()
+    mapping = {nat: (0, "GCC") for nat in gcc_set if nat}
+    if saudi_nat:
+        mapping[saudi_nat] = (1, "Saudi")
+    return mapping
+
+
+def get_nationality_map():
+    """{nationality: (is_saudi, group)} for Saudi and GCC nationalities; anything else is Non-GCC.
+
+    Looked up once per request (frappe.local), then per worker process while the Redis version
+    counter is unchanged, then from Redis; Settings are only loaded when all three miss.
+    """
+    mapping = getattr(frappe.local, "saudization_nationality_map", None)
+    if mapping is not None:
+        return mapping
+
+    version = cache.get_version(MAP_VERSION_SCOPE)
+    entry = _process_maps.get(frappe.local.site)
+    if entry and entry[0] == version:
+        mapping = entry[1]
+    else:
+        mapping = frappe.cache().get_value(MAP_KEY, generator=_build_map)
+        _process_maps[frappe.local.site] = (version, mapping)
+
+    frappe.local.saudization_nationality_map = mapping
+    return mapping
+
+
+def _forget_map():
+    frappe.cache().delete_value(MAP_KEY)
+    frappe.local.saudization_nationality_map = None
+
+
+def invalidate_nationality_map():
+    """Drop the cached map everywhere (Saudization Settings saved)."""
+    _forget_map()
+    cache.bump_version(MAP_VERSION_SCOPE)
+    # A reader before the commit may have rebuilt the map from the old settings.
+    cache.after_commit(_forget_map)
+
+
+def classify(nationality, mapping=None):
+    """Return (is_saudi, saudization_nationality_group) for one nationality value."""
+    nationality = _norm(nationality)
+    if not nationality:
+        return UNKNOWN
+    return (mapping if mapping is not None else get_nationality_map()).get(nationality, NON_GCC)
+
+
+@frappe.whitelist()
+def classify_employee_nationality(nationality=None):
+    """Classification used by the Employee 'Derive Saudization Group' server script."""
+    is_saudi, group = classify(nationality)
+    return {"is_saudi": is_saudi, "saudization_nationality_group": group}
+
+
+def reclassify_all_employees(chunk_size=2000, publish_progress=True):
+    """Recompute is_saudi / saudization_nationality_group for every Employee without saving documents.
+
+    Walks tabEmployee in primary-key order, classifies each chunk in memory and writes only
+    the rows that changed, with at most one UPDATE per target group per chunk. Commits after
+    every chunk so rows are never locked for the whole run.
+    """
+    if not frappe.db.table_exists("tabEmployee"):
+        return {"scanned": 0, "updated": 0}
+
+    mapping = get_nationality_map()
+    chunk_size = int(chunk_size or 2000)
+    total = frappe.db.count("Employee")
+    scanned = updated = 0
+    last_name = ""
+    companies = set()
+
+    while True:
+        rows = frappe.db.sql(
+            """
+            SELECT name, company, nationality, IFNULL(is_saudi,0) AS is_saudi, saudization_nationality_group
+            FROM `tabEmployee`
+            WHERE name > %(last_name)s
+            ORDER BY name
+            LIMIT %(limit)s
+            """,
+            {"last_name": last_name, "limit": chunk_size},
+            as_dict=True,
+        )
+        if not rows:
+            break
+
+        changes = {}
+        for r in rows:
+            target = classify(r.nationality, mapping)
+            if (int(r.is_saudi or 0), r.saudization_nationality_group) != target:
+                changes.setdefault(target, []).append(r.name)
+                companies.add(r.company)
+
+        for (is_saudi, group), names in changes.items():
+            frappe.db.sql(
+                """
+                UPDATE `tabEmployee`
+                SET is_saudi = %(is_saudi)s, saudization_nationality_group = %(group)s
+                WHERE name IN %(names)s
+                """,
+                {"is_saudi": is_saudi, "group": group, "names": tuple(names)},
+            )
+            movement.reclassify(names, is_saudi, group)
+            updated += len(names)
+
+        frappe.db.commit()
+        scanned += len(rows)
+        last_name = rows[-1].name
+        if publish_progress:
+            frappe.publish_progress(
+                min(100, scanned * 100 / (total or 1)),
+                title=_("Reclassifying Employees"),
+                description=_("{0} of {1} employees checked, {2} updated").format(scanned, total, updated),
+            )
+
+    # Counts by nationality group changed for these companies.
+    for company in companies:
+        snapshot.mark_company_dirty(company)
+        if aggregates.incremental_enabled():
+            aggregates.reconcile_company(company)
+    if updated:
+        cache.bump_all()
+
+    return {"scanned": scanned, "updated": updated}
+
+
+@frappe.whitelist()
+def reclassify_all():
+    """Queue a bulk reclassification of all employees (e.g. after the GCC list changed)."""
+    frappe.only_for(("System Manager", "HR Manager"))
+    frappe.enqueue(
+        "saudization_dashboard.nationality.reclassify_all_employees",
+        queue="long",
+        timeout=3600,
+    )
+    return {"queued": 1, "message": _("Employee reclassification queued")}
@@ -0,0 +1,104 @@
+import frappe
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from saudization_dashboard import profiling, replica
+
+
+DEFAULT_POOL_SIZE = 0
+MAX_POOL_SIZE = 16
+# How long the per-thread teardown tasks wait for each other (see _release_workers).
+RELEASE_TIMEOUT = 30
+
+
+def pool_size():
+    """Worker threads for holding-scope loads (Saudization Settings); 0 or 1 runs serially."""
+    if getattr(frappe.local, "saudization_parallel_worker", False):
+        return 0
+    # Document cache: read on every holding-scope load.
+    try:
+        size = int(frappe.get_cached_doc("Saudization Settings").get("parallel_workers") or 0)
+    except Exception:
+        size = DEFAULT_POOL_SIZE
+    return max(0, min(size, MAX_POOL_SIZE))
+
+
+def _init_worker(site, sites_path, user, on_replica, connections, meters):
+    """Thread initializer: one site context and database connection per pooled thread.
+
+    `meters` is a list while the caller is profiled (profiling.py): the thread's SQL is
+    metered for the pool's life and added to the caller's sample afterwards.
+    """
+    frappe.init(site=site, sites_path=sites_path)
+    frappe.connect()
+    frappe.set_user(user)
+    frappe.local.saudization_parallel_worker = True
+    # Follow the caller onto the read replica (re-checking the lag guard) for the thread's life.
+    if on_replica:
+        replica.switch()
+    connections.append(frappe.local.db)
+    if getattr(frappe.local, "primary_db", None) is not None:
+        connections.append(frappe.local.primary_db)
+    if meters is not None:
+        meters.append(profiling._SqlMeter().__enter__())
+
+
+def _destroy_worker(barrier):
+    try:
+        # Holding every thread here keeps each teardown task on a thread of its own.
+        barrier.wait(timeout=RELEASE_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass
+    finally:
+        frappe.destroy()
+
+
+def _release_workers(pool):
+    """Run frappe.destroy() on every pooled thread before the pool shuts down."""
+    # The executor keeps the threads it started in `_threads`; a broken pool runs nothing more.
+    count = len(pool._threads)
+    if not count or pool._broken:
+        return
+    barrier = threading.Barrier(count)
+    for future in [pool.submit(_destroy_worker, barrier) for _ in range(count)]:
+        future.exception()
+
+
+def per_company(fn, companies, **kwargs):
+    """`fn(companies, **kwargs) -> rows` over `companies`, split one company per task when enabled.
+
+    Serially (pool size 0/1, a single company, or already inside a worker) this is exactly
+    `fn(companies, **kwargs)` on the current connection. Otherwise each company runs on a
+    pooled thread with its own connection, and the rows are concatenated in `companies`
+    order whatever order the tasks finish in. Each thread connects once, when the pool starts
+    it, and tears its site context down (frappe.destroy) and closes its connections when the
+    pool shuts down.
+    """
+    companies = list(companies or [])
+    size = pool_size()
+    if size <= 1 or len(companies) <= 1:
+        return fn(companies, **kwargs)
+
+    site, sites_path, user = frappe.local.site, frappe.local.sites_path, frappe.session.user
+    meter = getattr(frappe.local, "saudization_sql_meter", None)
+    connections, meters = [], ([] if meter is not None else None)
+    try:
+        with ThreadPoolExecutor(
+            max_workers=min(size, len(companies)),
+            thread_name_prefix="saudization",
+            initializer=_init_worker,
+            initargs=(site, sites_path, user, replica.active(), connections, meters),
+        ) as pool:
+            futures = [pool.submit(fn, [c], **kwargs) for c in companies]
+            try:
+                parts = [f.result() for f in futures]
+            finally:
+                _release_workers(pool)
+    finally:
+        # destroy() closed frappe.db; this also closes the primary left behind a replica switch.
+        for db in connections:
+            db.close()
+        for worker_meter in meters or ():
+            meter.add(worker_meter)
+    return [row for part in parts for row in part]
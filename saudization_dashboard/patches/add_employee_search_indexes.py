@@ -0,0 +1,6 @@
+from saudization_dashboard.search import ensure_search_indexes
+
+
+def execute():
+    # Prefix (B-tree) and token (FULLTEXT) indexes behind the Employee Drilldown search box.
+    ensure_search_indexes()
@@ -27,19 +27,15 @@ def execute():
         ]
     })
 
-    # Trigger Employee before_save to compute derived fields for active employees
+    # Compute derived fields for all employees in chunked set-based updates
+    # (no per-document save, hooks or server script runs).
     if not frappe.db.table_exists("tabEmployee"):
         return
 
-    employee_names = frappe.get_all("Employee", filters={"status": "Active"}, pluck="name")
-    for name in employee_names:
-        try:
-            doc = frappe.get_doc("Employee", name)
-            # save will run before_save server script; ignore perms during install
-            doc.flags.ignore_permissions = True
-            doc.save()
-        except Exception:
-            # Do not fail installation due to one bad record
-            frappe.log_error(frappe.get_traceback(), f"Saudization backfill failed for Employee {name}")
+    if not frappe.db.has_column("Employee", "saudization_nationality_group"):
+        # Custom fields arrive with fixtures after patches on a fresh install. Saving
+        # Saudization Settings (or the Reclassify action) fills them later.
+        return
 
-    frappe.db.commit()
+    from saudization_dashboard.nationality import reclassify_all_employees
+    reclassify_all_employees(publish_progress=False)
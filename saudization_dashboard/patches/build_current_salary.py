@@ -0,0 +1,6 @@
+from saudization_dashboard.salary import rebuild_current_salaries
+
+
+def execute():
+    # Fill the current-salary projection that KPI and salary band queries join to.
+    rebuild_current_salaries()
@@ -0,0 +1,19 @@
+import frappe
+
+from saudization_dashboard.reports import RENAMED, REPORTS, apply_prepared_mode
+
+
+def execute():
+    # The fixture Query Reports are replaced by the Script Reports under report/.
+    old = set(REPORTS) | set(RENAMED)
+    for name in frappe.get_all("Report", filters={"name": ["in", list(old)], "report_type": "Query Report"}, pluck="name"):
+        frappe.delete_doc("Report", name, force=True, ignore_permissions=True)
+
+    for name in REPORTS:
+        frappe.reload_doc("saudization_dashboard", "report", frappe.scrub(name), force=True)
+
+    if frappe.db.table_exists("tabSaudization Dashboard Tab"):
+        for old_name, new_name in RENAMED.items():
+            frappe.db.set_value("Saudization Dashboard Tab", {"report_name": old_name}, "report_name", new_name, update_modified=False)
+
+    apply_prepared_mode()
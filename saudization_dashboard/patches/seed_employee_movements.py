@@ -0,0 +1,6 @@
+from saudization_dashboard.movement import seed
+
+
+def execute():
+    # One-time seed of the movement ledger from Employee and submitted transfers / promotions.
+    seed()
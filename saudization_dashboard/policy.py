@@ -0,0 +1,140 @@
+import frappe
+
+from bisect import bisect_right
+
+from saudization_dashboard import cache
+
+
+POLICIES_KEY = "saudization_dashboard:policies"
+POLICY_VERSION_SCOPE = "policies"
+
+# site -> (version, PolicyResolver); survives across requests in a worker.
+_resolvers = {}
+
+
+class CompiledPolicy:
+    """One Saudization Policy with its lines folded into precedence lookup tables."""
+
+    def __init__(self, row, lines):
+        self.name = row["name"]
+        self.company = row["company"]
+        self.effective_from = row["effective_from"]
+        self.effective_to = row["effective_to"]
+        self.default_target_percent = row["default_target_percent"]
+        self.lines = lines
+
+        # Precedence: Dept+Designation > Designation > Department > default.
+        # Later lines (by idx) win when the same key repeats.
+        self.dept_desig, self.desig, self.dept, self.dept_min = {}, {}, {}, {}
+        for l in lines:
+            dt = l.get("dimension_type")
+            if dt == "Department+Designation" and l.get("department") and l.get("designation"):
+                self.dept_desig[(l["department"], l["designation"])] = l.get("target_percent")
+            elif dt == "Designation" and l.get("designation"):
+                self.desig[l["designation"]] = l.get("target_percent")
+            elif dt == "Department" and l.get("department"):
+                self.dept[l["department"]] = l.get("target_percent")
+                self.dept_min[l["department"]] = int(l.get("min_headcount") or 0)
+
+    def covers(self, as_on):
+        return self.effective_from <= as_on and (not self.effective_to or self.effective_to >= as_on)
+
+    def target_for(self, department=None, designation=None):
+        if department and designation and (department, designation) in self.dept_desig:
+            return self.dept_desig[(department, designation)]
+        if designation and designation in self.desig:
+            return self.desig[designation]
+        if department and department in self.dept:
+            return self.dept[department]
+        return self.default_target_percent
+
+    def as_dict(self):
+        return {"name": self.name, "default_target_percent": self.default_target_percent}
+
+
+class PolicyResolver:
+    """Every company's policies sorted by effective_from; an as-on lookup is a bisect."""
+
+    def __init__(self, policies, lines):
+        by_parent = {}
+        for l in lines:
+            by_parent.setdefault(l["parent"], []).append(l)
+
+        self.policies = {}
+        for row in policies:
+            self.policies.setdefault(row["company"], []).append(CompiledPolicy(row, by_parent.get(row["name"], [])))
+        self.starts = {c: [p.effective_from for p in ps] for c, ps in self.policies.items()}
+
+    def policy(self, company, as_on):
+        """The covering policy with the latest effective_from on or before `as_on` (None if none)."""
+        policies = self.policies.get(company)
+        if not policies or not as_on:
+            return None
+        i = bisect_right(self.starts[company], as_on) - 1
+        # Usually the newest started policy; walk back only past ones that already ended.
+        while i >= 0:
+            if policies[i].covers(as_on):
+                return policies[i]
+            i -= 1
+        return None
+
+    def target(self, company, as_on):
+        p = self.policy(company, as_on)
+        return p.default_target_percent if p else None
+
+
+def _load():
+    if not frappe.db.table_exists("tabSaudization Policy"):
+        return {"policies": [], "lines": []}
+    policies = frappe.db.sql(
+        """
+        SELECT name, company, effective_from, effective_to, default_target_percent
+        FROM `tabSaudization Policy`
+        WHERE effective_from IS NOT NULL
+        ORDER BY company, effective_from, name
+        """,
+        as_dict=True,
+    )
+    lines = frappe.db.sql(
+        """
+        SELECT parent, dimension_type, department, designation, nationality_group, target_percent,
+               IFNULL(min_headcount, 0) AS min_headcount
+        FROM `tabSaudization Policy Line`
+        WHERE parenttype='Saudization Policy'
+        ORDER BY parent, idx
+        """,
+        as_dict=True,
+    )
+    return {"policies": [dict(r) for r in policies], "lines": [dict(r) for r in lines]}
+
+
+def get_resolver():
+    """Per request (frappe.local), then per worker while the version holds, then from Redis."""
+    resolver = getattr(frappe.local, "saudization_policy_resolver", None)
+    if resolver is not None:
+        return resolver
+
+    version = cache.get_version(POLICY_VERSION_SCOPE)
+    entry = _resolvers.get(frappe.local.site)
+    if entry and entry[0] == version:
+        resolver = entry[1]
+    else:
+        data = frappe.cache().get_value(POLICIES_KEY, generator=_load)
+        resolver = PolicyResolver(data["policies"], data["lines"])
+        _resolvers[frappe.local.site] = (version, resolver)
+
+    frappe.local.saudization_policy_resolver = resolver
+    return resolver
+
+
+def _forget():
+    frappe.cache().delete_value(POLICIES_KEY)
+    frappe.local.saudization_policy_resolver = None
+
+
+def invalidate():
+    """Saudization Policy saved or deleted."""
+    _forget()
+    cache.bump_version(POLICY_VERSION_SCOPE)
+    # A reader before the commit may have reloaded the old policies into Redis.
+    cache.after_commit(_forget)
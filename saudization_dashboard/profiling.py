@@ -0,0 +1,241 @@
+import frappe
+
+import functools
+import inspect
+import json
+import time
+
+from frappe.utils import now_datetime
+
+from saudization_dashboard import hierarchy
+
+
+SAMPLES_PREFIX = "saudization_dashboard:profile"
+SLOW_KEY = "saudization_dashboard:profile_slow"
+
+# Rolling window per endpoint, and the most recent slow calls across all endpoints.
+SAMPLE_SIZE = 500
+SLOW_SIZE = 100
+
+DEFAULT_SLOW_MS = 3000
+
+# Companies in scope -> bucket, so holding-wide calls are summarised apart from single-company ones.
+SCOPE_BUCKETS = ((1, "1"), (5, "2-5"), (20, "6-20"))
+
+# Names of every profiled endpoint, for the summary.
+ENDPOINTS = set()
+
+
+def _settings():
+    # Document cache: read on every call, including ETag matches that never touch the database.
+    try:
+        settings = frappe.get_cached_doc("Saudization Settings")
+        enabled = settings.get("enable_profiling")
+        threshold = settings.get("slow_call_threshold_ms")
+    except Exception:
+        return True, DEFAULT_SLOW_MS
+    return bool(int(enabled if enabled is not None else 1)), int(threshold or DEFAULT_SLOW_MS)
+
+
+def _scope(arguments):
+    """(label, companies in scope) for a call: its company, its holding, or every company."""
+    company = arguments.get("company")
+    if company:
+        return company, 1
+    holding = arguments.get("holding_company")
+    if holding:
+        from saudization_dashboard.api import _scope_companies
+
+        return holding, len(_scope_companies(holding_company=holding))
+    # Every company; the cached tree lists them all without querying tabCompany on each call.
+    return None, len(hierarchy.get_hierarchy()["parents"])
+
+
+def scope_bucket(size):
+    for limit, label in SCOPE_BUCKETS:
+        if size <= limit:
+            return label
+    return f"{SCOPE_BUCKETS[-1][0] + 1}+"
+
+
+class _SqlMeter:
+    """Counts statements, time and returned rows of frappe.db.sql while active."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+
+    def __enter__(self):
+        # The connection itself, not the frappe.db proxy, which follows replica switches.
+        db = frappe.local.db
+        self.db = db
+        self.shadowed = "sql" in vars(db)
+        self.outer = getattr(frappe.local, "saudization_sql_meter", None)
+        frappe.local.saudization_sql_meter = self
+        original = db.sql
+
+        def metered(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = original(*args, **kwargs)
+            finally:
+                self.count += 1
+                self.seconds += time.perf_counter() - start
+            if isinstance(result, (list, tuple)):
+                self.rows += len(result)
+            return result
+
+        self.original = original
+        db.sql = metered
+        return self
+
+    def __exit__(self, *exc):
+        if self.shadowed:
+            self.db.sql = self.original
+        else:
+            del self.db.sql
+        frappe.local.saudization_sql_meter = self.outer
+        if self.outer is not None and self.outer.db is not self.db:
+            # Metered on another connection (the read replica): the outer meter never saw these.
+            self.outer.add(self)
+        return False
+
+    def add(self, other):
+        """Count another connection's meter (the replica, a pooled worker) towards this one."""
+        self.count += other.count
+        self.seconds += other.seconds
+        self.rows += other.rows
+
+
+def _store(endpoint, sample, threshold):
+    redis = frappe.cache()
+    key = f"{SAMPLES_PREFIX}:{endpoint}"
+    redis.lpush(key, json.dumps(sample))
+    redis.ltrim(key, 0, SAMPLE_SIZE - 1)
+
+    if sample["wall_ms"] >= threshold:
+        redis.lpush(SLOW_KEY, json.dumps(sample))
+        redis.ltrim(SLOW_KEY, 0, SLOW_SIZE - 1)
+        frappe.logger("saudization_dashboard").warning(
+            "slow call {endpoint} scope={scope} ({scope_size} companies): {wall_ms} ms, "
+            "{sql_count} queries / {sql_ms} ms, {rows} rows".format(**sample)
+        )
+
+
+def profiled(fn):
+    """Record wall time, SQL statements, SQL time and rows of every call to a dashboard endpoint.
+
+    Sits between `@frappe.whitelist()` and `@cached()`, so cache hits are measured as well.
+    Calls made while another profiled call is running count towards the outer one only.
+    """
+    endpoint = fn.__name__
+    ENDPOINTS.add(endpoint)
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if getattr(frappe.local, "saudization_profiling", False):
+            return fn(*args, **kwargs)
+        enabled, threshold = _settings()
+        if not enabled:
+            return fn(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        scope, size = _scope(bound.arguments)
+
+        meter = _SqlMeter()
+        frappe.local.saudization_profiling = True
+        start = time.perf_counter()
+        try:
+            with meter:
+                return fn(*args, **kwargs)
+        finally:
+            frappe.local.saudization_profiling = False
+            sample = {
+                "endpoint": endpoint,
+                "at": str(now_datetime()),
+                "scope": scope,
+                "scope_size": size,
+                "wall_ms": round((time.perf_counter() - start) * 1000, 1),
+                "sql_count": meter.count,
+                "sql_ms": round(meter.seconds * 1000, 1),
+                "rows": meter.rows,
+            }
+            try:
+                _store(endpoint, sample, threshold)
+            except Exception:
+                # Instrumentation must never fail the request.
+                pass
+
+    return wrapper
+
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def _samples(endpoint):
+    raw = frappe.cache().lrange(f"{SAMPLES_PREFIX}:{endpoint}", 0, SAMPLE_SIZE - 1) or []
+    return [json.loads(r) for r in raw]
+
+
+def summarize(samples):
+    """p50 / p95 per (endpoint, scope bucket) over the rolling samples."""
+    groups = {}
+    for s in samples:
+        groups.setdefault((s["endpoint"], scope_bucket(s["scope_size"])), []).append(s)
+
+    out = []
+    for (endpoint, bucket), rows in sorted(groups.items()):
+        wall = [r["wall_ms"] for r in rows]
+        sql_count = [r["sql_count"] for r in rows]
+        sql_ms = [r["sql_ms"] for r in rows]
+        out.append({
+            "endpoint": endpoint,
+            "scope_bucket": bucket,
+            "calls": len(rows),
+            "wall_p50_ms": _percentile(wall, 50),
+            "wall_p95_ms": _percentile(wall, 95),
+            "sql_count_p50": _percentile(sql_count, 50),
+            "sql_count_p95": _percentile(sql_count, 95),
+            "sql_p95_ms": _percentile(sql_ms, 95),
+            "rows_p50": _percentile([r["rows"] for r in rows], 50),
+            "last_at": max(r["at"] for r in rows),
+        })
+    out.sort(key=lambda r: r["wall_p95_ms"], reverse=True)
+    return out
+
+
+def _load_endpoints():
+    import saudization_dashboard.api  # noqa: F401 - registers the profiled endpoints
+
+
+@frappe.whitelist()
+def get_performance_summary():
+    """Rolling p50/p95 per endpoint and scope size, plus the latest slow calls."""
+    frappe.only_for("System Manager")
+    _load_endpoints()
+
+    samples = []
+    for endpoint in ENDPOINTS:
+        samples.extend(_samples(endpoint))
+    slow = [json.loads(r) for r in frappe.cache().lrange(SLOW_KEY, 0, SLOW_SIZE - 1) or []]
+    return {
+        "summary": summarize(samples),
+        "slow_calls": slow,
+        "slow_threshold_ms": _settings()[1],
+        "sample_size": SAMPLE_SIZE,
+    }
+
+
+@frappe.whitelist()
+def reset_performance_stats():
+    frappe.only_for("System Manager")
+    _load_endpoints()
+
+    frappe.cache().delete_value([f"{SAMPLES_PREFIX}:{e}" for e in ENDPOINTS] + [SLOW_KEY])
+    return get_performance_summary()
@@ -0,0 +1,142 @@
+import frappe
+
+import contextlib
+import functools
+import time
+
+from saudization_dashboard import cache
+
+
+LAG_KEY = "saudization_dashboard:replica_lag"
+
+DEFAULT_MAX_LAG = 30
+# How long a measured lag is reused before the replica is asked again.
+LAG_CHECK_SECONDS = 10
+# Lag recorded when it cannot be measured (replication stopped, no privilege): always too much.
+UNKNOWN_LAG = -1
+
+
+def _settings():
+    # Document cache, not get_single_value: this runs on every decorated call (see cache._settings).
+    try:
+        settings = frappe.get_cached_doc("Saudization Settings")
+        enabled = settings.get("use_read_replica")
+        max_lag = settings.get("replica_max_lag_seconds")
+    except Exception:
+        return False, DEFAULT_MAX_LAG
+    return bool(int(enabled or 0)), int(max_lag if max_lag not in (None, "") else DEFAULT_MAX_LAG)
+
+
+def configured():
+    """True when site_config.json names a replica (`replica_host`, see Frappe's read_from_replica)."""
+    return bool(frappe.conf.get("replica_host"))
+
+
+def active():
+    """True while the current connection is the replica (ours or Frappe's own read_only)."""
+    primary = getattr(frappe.local, "primary_db", None)
+    return bool(getattr(frappe.local, "saudization_replica", False)) or (
+        primary is not None and frappe.local.db is not primary
+    )
+
+
+def _measure_lag():
+    """Seconds_Behind_Master of the connected replica, or UNKNOWN_LAG."""
+    try:
+        status = frappe.db.sql("SHOW SLAVE STATUS", as_dict=True)
+    except Exception:
+        frappe.logger("saudization_dashboard").warning("replica lag check failed", exc_info=True)
+        return UNKNOWN_LAG
+    lag = status[0].get("Seconds_Behind_Master") if status else None
+    return UNKNOWN_LAG if lag is None else int(lag)
+
+
+def _too_far_behind(lag, max_lag):
+    if lag == UNKNOWN_LAG or lag > max_lag:
+        return True
+    # The replica may not have the change that invalidated the cached payload yet.
+    last_write = frappe.cache().get_value(cache.LAST_WRITE_KEY)
+    return bool(last_write) and time.time() - float(last_write) <= lag + 1
+
+
+def _restore():
+    frappe.local.saudization_replica = False
+    meter = getattr(frappe.local, "saudization_replica_meter", None)
+    if meter is not None:
+        meter.__exit__(None, None, None)
+        frappe.local.saudization_replica_meter = None
+    frappe.local.db.close()
+    frappe.local.db = frappe.local.primary_db
+    del frappe.local.primary_db
+    del frappe.local.replica_db
+
+
+def _switch(max_lag):
+    """Point frappe.db at the replica if it is close enough; False leaves the primary in place."""
+    lag = frappe.cache().get_value(LAG_KEY)
+    if lag is not None and _too_far_behind(int(lag), max_lag):
+        return False
+
+    # Frappe's read_only leaves these behind after switching back; connect_replica refuses while they exist.
+    for attr in ("primary_db", "replica_db"):
+        if hasattr(frappe.local, attr):
+            delattr(frappe.local, attr)
+    try:
+        if not frappe.connect_replica():
+            return False
+    except Exception:
+        frappe.logger("saudization_dashboard").warning("replica connection failed, using primary", exc_info=True)
+        return False
+
+    frappe.local.saudization_replica = True
+    if lag is None:
+        lag = _measure_lag()
+        frappe.cache().set_value(LAG_KEY, lag, expires_in_sec=LAG_CHECK_SECONDS)
+        if _too_far_behind(lag, max_lag):
+            _restore()
+            return False
+
+    from saudization_dashboard.profiling import _SqlMeter
+    if getattr(frappe.local, "saudization_sql_meter", None) is not None:
+        # Keep profiled calls counting their SQL now that it runs on another connection.
+        frappe.local.saudization_replica_meter = _SqlMeter().__enter__()
+    return True
+
+
+def switch():
+    """Move frappe.db to the replica when enabled, configured and not lagging; False stays put.
+
+    `reads()` switches back when its block ends; pooled worker threads (parallel.py) switch
+    once for their whole life.
+    """
+    enabled, max_lag = _settings()
+    return bool(enabled and configured() and _switch(max_lag))
+
+
+@contextlib.contextmanager
+def reads():
+    """Run the block's queries on the read replica when enabled, configured and not lagging.
+
+    Falls back to the primary otherwise. Nested blocks reuse the outer connection. Only for
+    code that does not write.
+    """
+    if active():
+        yield
+        return
+    switched = switch()
+    try:
+        yield
+    finally:
+        if switched:
+            _restore()
+
+
+def read_only(fn):
+    """Decorator form of `reads()` for read-only endpoints; sits below `@cached()` so hits stay on Redis."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with reads():
+            return fn(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,49 @@
+import frappe
+from frappe import _
+
+
+# Shipped Script Reports (report/<scrubbed name>/) and the filter defaults their .js sets.
+REPORTS = {
+    "Saudization KPI Summary": {},
+    "Saudization by Nationality Group": {},
+    "Saudization Actual vs Target Overall": {},
+    "Saudization by Designation": {"min_headcount": 3},
+    "Saudization by Department": {},
+    "Saudization by Salary Band": {},
+    "Saudization Trend by Joining Month": {"months_back": 24},
+    "Saudization Matrix by Department and Designation": {"min_headcount": 3},
+    "Saudization Compliance vs Target by Department": {},
+}
+
+# Former fixture Query Reports whose names cannot be a report module path.
+RENAMED = {
+    "Saudization Actual vs Target (Overall)": "Saudization Actual vs Target Overall",
+    "Saudization Trend (Monthly Snapshot by DOJ)": "Saudization Trend by Joining Month",
+    "Saudization Matrix (Dept x Designation)": "Saudization Matrix by Department and Designation",
+}
+
+
+def company_filter(filters):
+    company = ((filters or {}).get("company") or "").strip()
+    if not company:
+        frappe.throw(_("Company is required"))
+    return company
+
+
+def prepared_enabled():
+    """True when the shipped reports should run as queued prepared reports."""
+    try:
+        return bool(int(frappe.db.get_single_value("Saudization Settings", "prepared_reports") or 0))
+    except Exception:
+        return False
+
+
+def apply_prepared_mode():
+    """Set Report.prepared_report on the shipped reports from Saudization Settings.
+
+    Also runs after migrate, since syncing the report JSON resets the flag.
+    """
+    enabled = 1 if prepared_enabled() else 0
+    for name in REPORTS:
+        if frappe.db.exists("Report", name):
+            frappe.db.set_value("Report", name, "prepared_report", enabled, update_modified=False)
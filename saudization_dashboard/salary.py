@@ -0,0 +1,84 @@
+import frappe
+from frappe import _
+
+
+CURRENT_SALARY_DOCTYPE = "Saudization Current Salary"
+
+# The one join every KPI / salary band query (API and shipped reports) uses for the current base salary.
+CURRENT_SALARY_JOIN = "LEFT JOIN `tabSaudization Current Salary` ls ON ls.employee = e.name"
+
+_LATEST_ASSIGNMENTS = """
+    SELECT x.employee, x.base, x.from_date, x.name
+    FROM (
+      SELECT ssa.employee, ssa.base, ssa.from_date, ssa.name,
+             ROW_NUMBER() OVER (PARTITION BY ssa.employee ORDER BY ssa.from_date DESC, ssa.creation DESC) AS rn
+      FROM `tabSalary Structure Assignment` ssa
+      WHERE ssa.docstatus = 1 {condition}
+    ) x
+    WHERE x.rn = 1
+"""
+
+
+def rebuild_current_salaries():
+    """Rebuild the whole projection from submitted Salary Structure Assignments in one statement."""
+    if not frappe.db.table_exists("tabSalary Structure Assignment"):
+        return 0
+
+    frappe.db.sql(f"DELETE FROM `tab{CURRENT_SALARY_DOCTYPE}`")
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tab{CURRENT_SALARY_DOCTYPE}`
+          (name, employee, base, from_date, salary_structure_assignment,
+           creation, modified, owner, modified_by, docstatus, idx)
+        SELECT l.employee, l.employee, l.base, l.from_date, l.name, NOW(), NOW(), %(user)s, %(user)s, 0, 0
+        FROM ({_LATEST_ASSIGNMENTS.format(condition="")}) l
+        """,
+        {"user": frappe.session.user},
+    )
+    return frappe.db.count(CURRENT_SALARY_DOCTYPE)
+
+
+def refresh_employee_salary(employee):
+    """Recompute one employee's current base salary (after an assignment is submitted or cancelled)."""
+    if not employee:
+        return
+
+    row = frappe.db.sql(
+        _LATEST_ASSIGNMENTS.format(condition="AND ssa.employee = %(employee)s"),
+        {"employee": employee},
+        as_dict=True,
+    )
+    if not row:
+        frappe.db.delete(CURRENT_SALARY_DOCTYPE, {"employee": employee})
+        return
+
+    r = row[0]
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tab{CURRENT_SALARY_DOCTYPE}`
+          (name, employee, base, from_date, salary_structure_assignment,
+           creation, modified, owner, modified_by, docstatus, idx)
+        VALUES (%(employee)s, %(employee)s, %(base)s, %(from_date)s, %(assignment)s, NOW(), NOW(), %(user)s, %(user)s, 0, 0)
+        ON DUPLICATE KEY UPDATE
+          base = VALUES(base),
+          from_date = VALUES(from_date),
+          salary_structure_assignment = VALUES(salary_structure_assignment),
+          modified = VALUES(modified),
+          modified_by = VALUES(modified_by)
+        """,
+        {
+            "employee": employee,
+            "base": r.get("base"),
+            "from_date": r.get("from_date"),
+            "assignment": r.get("name"),
+            "user": frappe.session.user,
+        },
+    )
+
+
+@frappe.whitelist()
+def rebuild():
+    """Queue a full rebuild of Saudization Current Salary."""
+    frappe.only_for(("System Manager", "HR Manager"))
+    frappe.enqueue("saudization_dashboard.salary.rebuild_current_salaries", queue="long")
+    return {"queued": 1, "message": _("Current salary rebuild queued")}
@@ -0,0 +1,10 @@
+frappe.ui.form.on('Saudization Settings', {
+  refresh(frm) {
+    frm.add_custom_button(__('Reclassify Employees'), () => {
+      frappe.call({
+        method: 'saudization_dashboard.nationality.reclassify_all',
+        callback: (r) => frappe.show_alert({message: (r.message && r.message.message) || __('Queued'), indicator: 'green'})
+      });
+    });
+  }
+});
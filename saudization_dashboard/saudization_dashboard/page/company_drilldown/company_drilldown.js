@@ -235,9 +235,17 @@ frappe.pages['company-drilldown'].on_page_load = function(wrapper) {
     });
   }
 
+  // Latest bundle; department -> designation drills render from it without another call.
+  let bundle = null;
+
   function loadDesignations(department){
     const v = fg.get_values();
     if (!v.company || !department) return;
+    const cached = bundle && bundle.designations_by_department && bundle.designations_by_department[department];
+    if (cached) {
+      renderDesignations({department: department, designations: cached});
+      return;
+    }
     frappe.call({
       method: 'saudization_dashboard.api.get_designation_breakdown',
       args: {
@@ -250,36 +258,36 @@ frappe.pages['company-drilldown'].on_page_load = function(wrapper) {
     });
   }
 
-  function loadRisky(){
-    const v = fg.get_values();
-    if (!v.company) return;
+  // Last payload and ETag per argument set; the server answers not_modified while the ETag
+  // is current, and an unchanged payload that is already on screen is not redrawn.
+  const payloads = {};
+  let rendered = null;
+  function conditionalCall(method, args, render){
+    const key = JSON.stringify(args);
+    const known = payloads[key];
     frappe.call({
-      method: 'saudization_dashboard.api.get_top_risky_positions',
-      args: {
-        company: v.company,
-        as_on_date: v.as_on_date,
-        branch: v.branch,
-        top_n: 10,
-        min_headcount: 3
-      },
-      callback: (r) => renderRisky(r.message || {})
+      method: method,
+      args: Object.assign({}, args, {if_none_match: known ? known.etag : ''}),
+      callback: (r) => {
+        const res = r.message || {};
+        if (!res.not_modified || !known) payloads[key] = {etag: res.etag, data: res.data || {}};
+        if (res.not_modified && rendered === key) return;
+        rendered = key;
+        render(payloads[key].data);
+      }
     });
   }
 
   function refresh(){
     const v = fg.get_values();
     if (!v.company) return;
-    frappe.call({
-      method: 'saudization_dashboard.api.get_company_drilldown',
-      args: v,
-      callback: (r) => {
-        const data = r.message || {};
-        setKpis(data);
-        renderBranches(data.branches, data.branch);
-        renderDepartments(data.departments, data.branch);
-        renderDesignations({});
-        loadRisky();
-      }
+    conditionalCall('saudization_dashboard.api.get_company_drilldown_bundle', Object.assign({}, v, {top_n: 10, min_headcount: 3}), (data) => {
+      bundle = data;
+      setKpis(data);
+      renderBranches(data.branches, data.branch);
+      renderDepartments(data.departments, data.branch);
+      renderDesignations({});
+      renderRisky({items: data.risky_positions || []});
     });
   }
 
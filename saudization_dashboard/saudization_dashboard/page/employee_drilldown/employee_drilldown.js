@@ -33,7 +33,16 @@ frappe.pages['employee-drilldown'].on_page_load = function(wrapper) {
     frappe.route_options = null;
   }
 
-  let state = {limit: 50, offset: 0, total: 0};
+  // Keyset paging: cursors[i] loads page i, pages[i] keeps pages already seen (Prev is instant),
+  // and the server prefetches the page after the current one.
+  let state = {limit: 50, total: 0, page: 0, cursors: [null], pages: [], generation: 0};
+
+  function resetPaging(){
+    state.page = 0;
+    state.cursors = [null];
+    state.pages = [];
+    state.generation += 1;
+  }
 
   function pill(is_saudi){
     const status = is_saudi ? __('Saudi') : __('Non-Saudi');
@@ -55,8 +64,7 @@ frappe.pages['employee-drilldown'].on_page_load = function(wrapper) {
       nationality_group: v.nationality_group,
       search: v.search,
       is_saudi: is_saudi,
-      limit: state.limit,
-      offset: state.offset
+      limit: state.limit
     };
   }
 
@@ -105,10 +113,12 @@ frappe.pages['employee-drilldown'].on_page_load = function(wrapper) {
   }
 
   function renderPagination(){
-    const from = state.total ? (state.offset + 1) : 0;
-    const to = Math.min(state.offset + state.limit, state.total);
-    const prevDisabled = state.offset <= 0;
-    const nextDisabled = (state.offset + state.limit) >= state.total;
+    const current = state.pages[state.page] || {rows: []};
+    const offset = state.page * state.limit;
+    const from = current.rows.length ? (offset + 1) : 0;
+    const to = offset + current.rows.length;
+    const prevDisabled = state.page <= 0;
+    const nextDisabled = !current.has_more;
 
     const $p = $pagination;
     $p.empty();
@@ -117,33 +127,73 @@ frappe.pages['employee-drilldown'].on_page_load = function(wrapper) {
     const $prev = $(`<button class="btn btn-default btn-xs" ${prevDisabled ? 'disabled' : ''}>${__('Prev')}</button>`);
     const $next = $(`<button class="btn btn-default btn-xs" ${nextDisabled ? 'disabled' : ''}>${__('Next')}</button>`);
 
-    $prev.on('click', () => { if (!prevDisabled){ state.offset = Math.max(0, state.offset - state.limit); refresh(); } });
-    $next.on('click', () => { if (!nextDisabled){ state.offset = state.offset + state.limit; refresh(); } });
+    $prev.on('click', () => { if (!prevDisabled){ showPage(state.page - 1); } });
+    $next.on('click', () => { if (!nextDisabled){ showPage(state.page + 1); } });
 
     $p.append($prev);
     $p.append($next);
   }
 
-  function refresh(){
-    const v = fg.get_values();
-    if (!v.company){
-      $tableWrap.html(`<div class="text-muted">${__('Select a Company to load employees.')}</div>`);
-      return;
+  function showPage(index){
+    state.page = index;
+    if (state.pages[index]) {
+      render(state.pages[index].rows);
+      renderPagination();
+      if (state.pages[index].has_more && !state.pages[index + 1]) {
+        load(index + 1);
+      }
+    } else {
+      load(index);
     }
+  }
+
+  function storePage(index, page){
+    state.pages[index] = page;
+    if (page.next_cursor) {
+      state.cursors[index + 1] = page.next_cursor;
+    }
+  }
+
+  function load(index){
+    const args = getArgs();
+    args.cursor = state.cursors[index];
+    args.prefetch = 1;
+    args.with_total = index === 0 ? 1 : 0;
+    const generation = state.generation;
 
     frappe.call({
       method: 'saudization_dashboard.api.get_employee_list',
-      args: getArgs(),
+      args: args,
       callback: (r) => {
+        if (generation !== state.generation) return;  // filters changed meanwhile
         const data = r.message || {};
-        state.total = data.total || 0;
-        render(data.rows || []);
-        renderPagination();
+        if (data.total !== null && data.total !== undefined) {
+          state.total = data.total;
+        }
+        storePage(index, data);
+        if (data.next_page) {
+          storePage(index + 1, data.next_page);
+        }
+        if (state.page === index) {
+          render(data.rows || []);
+          renderPagination();
+        }
       }
     });
   }
 
-  function exportCsv(){
+  function refresh(){
+    const v = fg.get_values();
+    if (!v.company){
+      $tableWrap.html(`<div class="text-muted">${__('Select a Company to load employees.')}</div>`);
+      return;
+    }
+
+    resetPaging();
+    load(0);
+  }
+
+  function exportFile(file_format){
     const v = fg.get_values();
     if (!v.company){
       frappe.msgprint(__('Select a Company first.'));
@@ -151,16 +201,18 @@ frappe.pages['employee-drilldown'].on_page_load = function(wrapper) {
     }
     const args = getArgs();
     delete args.limit;
-    delete args.offset;
+    args.file_format = file_format;
+    args.background = 1;
 
     frappe.call({
       method: 'saudization_dashboard.api.export_employee_list_csv',
       args: args,
-      freeze: true,
       callback: (r) => {
-        const file_url = r.message && r.message.file_url;
-        if (file_url) {
-          window.open(file_url, '_blank');
+        const msg = r.message || {};
+        if (msg.queued) {
+          frappe.show_alert({message: __('Export started. The file will open when it is ready.'), indicator: 'blue'});
+        } else if (msg.file_url) {
+          window.open(msg.file_url, '_blank');
         } else {
           frappe.msgprint(__('Could not generate file.'));
         }
@@ -168,13 +220,26 @@ frappe.pages['employee-drilldown'].on_page_load = function(wrapper) {
     });
   }
 
+  // The export runs as a background job and reports back over realtime.
+  frappe.realtime.off('saudization_employee_export');
+  frappe.realtime.on('saudization_employee_export', (data) => {
+    if (data && data.file_url) {
+      frappe.show_alert({message: __('Employee export is ready ({0} rows)', [data.rows || 0]), indicator: 'green'});
+      window.open(data.file_url, '_blank');
+    } else {
+      frappe.msgprint(__('Could not generate file.'));
+    }
+  });
+
   const $btnRefresh = $(`<button class="btn btn-primary btn-xs">${__('Refresh')}</button>`).appendTo($actions);
   const $btnExport = $(`<button class="btn btn-default btn-xs">${__('Export CSV')}</button>`).appendTo($actions);
+  const $btnExportXlsx = $(`<button class="btn btn-default btn-xs">${__('Export Excel')}</button>`).appendTo($actions);
 
-  $btnRefresh.on('click', () => { state.offset = 0; refresh(); });
-  $btnExport.on('click', exportCsv);
+  $btnRefresh.on('click', refresh);
+  $btnExport.on('click', () => exportFile('csv'));
+  $btnExportXlsx.on('click', () => exportFile('xlsx'));
 
-  fg.on('change', () => { state.offset = 0; refresh(); });
+  fg.on('change', refresh);
 
   refresh();
 };
@@ -186,36 +186,51 @@ frappe.pages['executive-scorecard'].on_page_load = function(wrapper) {
     });
   }
 
-  function refresh(){
-    const v = fg.get_values();
+  // Last payload and ETag per argument set; the server answers not_modified while the ETag
+  // is current, and an unchanged payload that is already on screen is not redrawn.
+  const payloads = {};
+  let rendered = null;
+  function conditionalCall(method, args, render){
+    const key = JSON.stringify(args);
+    const known = payloads[key];
     frappe.call({
-      method: 'saudization_dashboard.api.get_executive_scorecard',
-      args: v,
+      method: method,
+      args: Object.assign({}, args, {if_none_match: known ? known.etag : ''}),
       callback: (r) => {
-        const data = r.message || {};
-        setKpis(data);
-        drawTrend(data.trend);
-        drawRiskChart(data.holding);
-        renderRiskTable(data.holding?.rows, (fg.get_values()||{}).as_on_date);
-
-        // Risky designations list: prioritize explicit Company filter, fallback to highest risk entity
-        const company_for_positions = v.company || data.risk?.highest_risk || null;
-        page.__risk_company_for_positions = company_for_positions;
-        if (company_for_positions) {
-          frappe.call({
-            method: 'saudization_dashboard.api.get_top_risky_positions',
-            args: {
-              company: company_for_positions,
-              as_on_date: v.as_on_date,
-              branch: v.branch,
-              top_n: 10,
-              min_headcount: 3
-            },
-            callback: (rr) => renderRiskyPositions(rr.message?.items || [])
-          });
-        } else {
-          renderRiskyPositions([]);
-        }
+        const res = r.message || {};
+        if (!res.not_modified || !known) payloads[key] = {etag: res.etag, data: res.data || {}};
+        if (res.not_modified && rendered === key) return;
+        rendered = key;
+        render(payloads[key].data);
+      }
+    });
+  }
+
+  function refresh(){
+    const v = fg.get_values();
+    conditionalCall('saudization_dashboard.api.get_executive_scorecard', v, (data) => {
+      setKpis(data);
+      drawTrend(data.trend);
+      drawRiskChart(data.holding);
+      renderRiskTable(data.holding?.rows, (fg.get_values()||{}).as_on_date);
+
+      // Risky designations list: prioritize explicit Company filter, fallback to highest risk entity
+      const company_for_positions = v.company || data.risk?.highest_risk || null;
+      page.__risk_company_for_positions = company_for_positions;
+      if (company_for_positions) {
+        frappe.call({
+          method: 'saudization_dashboard.api.get_top_risky_positions',
+          args: {
+            company: company_for_positions,
+            as_on_date: v.as_on_date,
+            branch: v.branch,
+            top_n: 10,
+            min_headcount: 3
+          },
+          callback: (rr) => renderRiskyPositions(rr.message?.items || [])
+        });
+      } else {
+        renderRiskyPositions([]);
       }
     });
   }
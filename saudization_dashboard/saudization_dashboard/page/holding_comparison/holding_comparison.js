@@ -91,19 +91,34 @@ frappe.pages['holding-comparison'].on_page_load = function(wrapper) {
     });
   }
 
-  function refresh(){
-    const v = fg.get_values();
+  // Last payload and ETag per argument set; the server answers not_modified while the ETag
+  // is current, and an unchanged payload that is already on screen is not redrawn.
+  const payloads = {};
+  let rendered = null;
+  function conditionalCall(method, args, render){
+    const key = JSON.stringify(args);
+    const known = payloads[key];
     frappe.call({
-      method: 'saudization_dashboard.api.get_holding_comparison',
-      args: v,
+      method: method,
+      args: Object.assign({}, args, {if_none_match: known ? known.etag : ''}),
       callback: (r) => {
-        const data = r.message || {};
-        renderChart(data.chart);
-        renderTable(data.rows);
+        const res = r.message || {};
+        if (!res.not_modified || !known) payloads[key] = {etag: res.etag, data: res.data || {}};
+        if (res.not_modified && rendered === key) return;
+        rendered = key;
+        render(payloads[key].data);
       }
     });
   }
 
+  function refresh(){
+    const v = fg.get_values();
+    conditionalCall('saudization_dashboard.api.get_holding_comparison', v, (data) => {
+      renderChart(data.chart);
+      renderTable(data.rows);
+    });
+  }
+
   page.set_primary_action(__('Refresh'), refresh);
   fg.on('change', refresh);
   refresh();
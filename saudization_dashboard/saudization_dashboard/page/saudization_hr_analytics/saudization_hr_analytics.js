@@ -17,7 +17,10 @@ frappe.pages['saudization-hr-analytics'] = {
       },
       theme: null,
       navigation: null,
-      active_tab: null
+      active_tab: null,
+      // request key -> {etag, data}; the server answers not_modified while the ETag is current
+      payloads: {},
+      rendered: null
     };
 
     const filters = page.add_field({
@@ -116,6 +119,22 @@ frappe.pages['saudization-hr-analytics'] = {
       }).then(r => r.message);
     }
 
+    function conditional_call(method, args={}) {
+      const full = Object.assign(get_filters(), args);
+      const key = method + JSON.stringify(full);
+      const known = state.payloads[key];
+      return frappe.call({
+        method: `saudization_dashboard.api.${method}`,
+        args: Object.assign({}, full, {if_none_match: known ? known.etag : ''})
+      }).then(r => {
+        const res = r.message || {};
+        if (!res.not_modified || !known) {
+          state.payloads[key] = {etag: res.etag, data: res.data};
+        }
+        return {key, data: state.payloads[key].data, changed: !res.not_modified};
+      });
+    }
+
     function render_kpis(k) {
   const tooltips = {
     'Total Employees': 'Active employees only (Status = Active).',
@@ -297,14 +316,18 @@ frappe.pages['saudization-hr-analytics'] = {
       }
     }
 
-    async function ensure_navigation() {
-      if (state.navigation) return;
+    async function ensure_bootstrap() {
+      if (state.theme) return;
       try {
-        const nav = await call('get_navigation');
-        state.navigation = nav;
-        render_tabs(nav);
+        // Theme and navigation together, from the server-side cache.
+        const r = await frappe.call({method: 'saudization_dashboard.api.get_bootstrap'});
+        const boot = r.message || {};
+        apply_theme(boot.theme);
+        state.navigation = boot.navigation;
+        render_tabs(boot.navigation);
       } catch (e) {
-        // Fail silently; dashboard should still work.
+        // Fail silently; dashboard should still work with the default theme.
+        apply_theme({});
       }
     }
 
@@ -315,23 +338,22 @@ frappe.pages['saudization-hr-analytics'] = {
         return;
       }
 
-      if (!state.theme) {
-        const t = await call('get_theme');
-        apply_theme(t);
-      }
-
-      await ensure_navigation();
-
-      const [kpis, natRows, actualTarget, desig, dept, salary, trend, matrix] = await Promise.all([
-        call('get_kpis'),
-        call('get_nationality_group_breakdown'),
-        call('get_actual_vs_target_overall'),
-        call('get_saudization_by_designation', {min_headcount: 3}),
-        call('get_saudization_by_department'),
-        call('get_saudization_by_salary_band'),
-        call('get_saudization_trend', {months_back: 24}),
-        call('get_matrix_with_targets', {min_headcount: 3})
-      ]);
+      await ensure_bootstrap();
+
+      // One request, one employee scan: every chart payload comes back together.
+      // Refreshing unchanged data costs one version lookup and no redraw.
+      const res = await conditional_call('get_dashboard_bundle', {min_headcount: 3, months_back: 24});
+      if (!res.changed && state.rendered === res.key) return;
+      state.rendered = res.key;
+      const bundle = res.data;
+      const kpis = bundle.kpis;
+      const natRows = bundle.nationality;
+      const actualTarget = bundle.actual_vs_target;
+      const desig = bundle.designation;
+      const dept = bundle.department;
+      const salary = bundle.salary_band;
+      const trend = bundle.trend;
+      const matrix = bundle.matrix;
 
       render_kpis(kpis);
 
@@ -393,7 +415,7 @@ frappe.pages['saudization-hr-analytics'] = {
         trend.datasets
       );
 
-      render_table_matrix(matrix.rows);
+      render_table_matrix(matrix);
     }
 
     // initial
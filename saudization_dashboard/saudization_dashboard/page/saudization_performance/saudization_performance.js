@@ -0,0 +1,90 @@
+frappe.pages['saudization-performance'].on_page_load = function(wrapper) {
+  const page = frappe.ui.make_app_page({
+    parent: wrapper,
+    title: __('Saudization Performance'),
+    single_column: true
+  });
+
+  $(wrapper).find('.layout-main-section').addClass('saud-perf-wrap');
+
+  const $summary = $('<div class="saud-perf-card"><h4>'+__('Endpoints (rolling window)')+'</h4><div id="saud-perf-summary"></div></div>').appendTo(page.body);
+  const $slow = $('<div class="saud-perf-card"><h4 id="saud-perf-slow-title">'+__('Slow Calls')+'</h4><div id="saud-perf-slow"></div></div>').appendTo(page.body);
+
+  const esc = (v) => frappe.utils.escape_html(v == null ? '-' : String(v));
+
+  function table(columns, rows){
+    const html = ['<table class="saud-perf-table"><thead><tr>'];
+    columns.forEach(c => html.push(`<th>${esc(c.label)}</th>`));
+    html.push('</tr></thead><tbody>');
+    rows.forEach(r => {
+      html.push('<tr>');
+      columns.forEach(c => html.push(`<td class="${c.num ? 'num' : ''}">${esc(r[c.field])}</td>`));
+      html.push('</tr>');
+    });
+    html.push('</tbody></table>');
+    return html.join('');
+  }
+
+  function renderSummary(rows){
+    const $t = $summary.find('#saud-perf-summary');
+    if (!rows || !rows.length){
+      $t.html(`<div class="text-muted">${__('No calls recorded yet')}</div>`);
+      return;
+    }
+    $t.html(table([
+      {field: 'endpoint', label: __('Endpoint')},
+      {field: 'scope_bucket', label: __('Companies in Scope')},
+      {field: 'calls', label: __('Calls'), num: 1},
+      {field: 'wall_p50_ms', label: __('p50 ms'), num: 1},
+      {field: 'wall_p95_ms', label: __('p95 ms'), num: 1},
+      {field: 'sql_count_p50', label: __('SQL p50'), num: 1},
+      {field: 'sql_count_p95', label: __('SQL p95'), num: 1},
+      {field: 'sql_p95_ms', label: __('SQL p95 ms'), num: 1},
+      {field: 'rows_p50', label: __('Rows p50'), num: 1},
+      {field: 'last_at', label: __('Last Call')}
+    ], rows));
+  }
+
+  function renderSlow(rows, threshold){
+    $slow.find('#saud-perf-slow-title').text(__('Slow Calls (>= {0} ms)', [threshold]));
+    const $t = $slow.find('#saud-perf-slow');
+    if (!rows || !rows.length){
+      $t.html(`<div class="text-muted">${__('No slow calls')}</div>`);
+      return;
+    }
+    $t.html(table([
+      {field: 'at', label: __('At')},
+      {field: 'endpoint', label: __('Endpoint')},
+      {field: 'scope', label: __('Company / Holding')},
+      {field: 'scope_size', label: __('Companies'), num: 1},
+      {field: 'wall_ms', label: __('Wall ms'), num: 1},
+      {field: 'sql_count', label: __('SQL'), num: 1},
+      {field: 'sql_ms', label: __('SQL ms'), num: 1},
+      {field: 'rows', label: __('Rows'), num: 1}
+    ], rows));
+  }
+
+  function render(data){
+    data = data || {};
+    renderSummary(data.summary);
+    renderSlow(data.slow_calls, data.slow_threshold_ms);
+  }
+
+  function refresh(){
+    frappe.call({
+      method: 'saudization_dashboard.profiling.get_performance_summary',
+      callback: (r) => render(r.message)
+    });
+  }
+
+  page.set_primary_action(__('Refresh'), refresh);
+  page.add_inner_button(__('Reset'), () => {
+    frappe.confirm(__('Clear all recorded calls?'), () => {
+      frappe.call({
+        method: 'saudization_dashboard.profiling.reset_performance_stats',
+        callback: (r) => render(r.message)
+      });
+    });
+  });
+  refresh();
+};
@@ -0,0 +1,21 @@
+from frappe import _
+
+from saudization_dashboard.api import get_kpis
+from saudization_dashboard.reports import company_filter
+
+
+def execute(filters=None):
+    kpis = get_kpis(company_filter(filters))
+    columns = [
+        {"fieldname": "metric", "label": _("Metric"), "fieldtype": "Data", "width": 120},
+        {"fieldname": "actual_percent", "label": _("Actual %"), "fieldtype": "Percent", "width": 110},
+        {"fieldname": "target_percent", "label": _("Target %"), "fieldtype": "Percent", "width": 110},
+        {"fieldname": "variance_percent", "label": _("Variance %"), "fieldtype": "Float", "precision": 1, "width": 110},
+    ]
+    data = [{
+        "metric": _("Overall"),
+        "actual_percent": kpis.get("saudization_percent"),
+        "target_percent": kpis.get("target_percent"),
+        "variance_percent": kpis.get("variance_percent"),
+    }]
+    return columns, data
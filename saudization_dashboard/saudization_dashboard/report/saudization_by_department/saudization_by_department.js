@@ -0,0 +1,18 @@
+frappe.query_reports['Saudization by Department'] = {
+  filters: [
+    {
+      fieldname: 'company',
+      label: __('Company'),
+      fieldtype: 'Link',
+      options: 'Company',
+      reqd: 1,
+      default: frappe.defaults.get_user_default('Company'),
+    },
+    {
+      fieldname: 'designation',
+      label: __('Designation'),
+      fieldtype: 'Link',
+      options: 'Designation',
+    },
+  ],
+};
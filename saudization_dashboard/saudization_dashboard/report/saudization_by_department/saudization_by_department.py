@@ -0,0 +1,29 @@
+from frappe import _
+
+from saudization_dashboard.api import _percent, _sort_key_nulls_first
+from saudization_dashboard.cube import get_cube
+from saudization_dashboard.reports import company_filter
+
+
+def execute(filters=None):
+    filters = filters or {}
+    cube = get_cube(company_filter(filters))
+    groups = cube.group("department", cube.mask(designation=filters.get("designation")))
+
+    data = [{
+        "department": department,
+        "saudi_count": v[1],
+        "non_saudi_count": v[2],
+        "total_count": v[0],
+        "saudization_percent": _percent(v[1], v[0]),
+    } for department, v in groups.items()]
+    data.sort(key=lambda r: (r["saudization_percent"], -r["total_count"], _sort_key_nulls_first(r["department"])))
+
+    columns = [
+        {"fieldname": "department", "label": _("Department"), "fieldtype": "Link", "options": "Department", "width": 200},
+        {"fieldname": "saudi_count", "label": _("Saudi"), "fieldtype": "Int", "width": 90},
+        {"fieldname": "non_saudi_count", "label": _("Non-Saudi"), "fieldtype": "Int", "width": 100},
+        {"fieldname": "total_count", "label": _("Total"), "fieldtype": "Int", "width": 90},
+        {"fieldname": "saudization_percent", "label": _("Saudization %"), "fieldtype": "Percent", "width": 120},
+    ]
+    return columns, data
@@ -0,0 +1,29 @@
+from frappe import _
+from frappe.utils import cint
+
+from saudization_dashboard.api import _percent, _sort_key_nulls_first
+from saudization_dashboard.cube import get_cube
+from saudization_dashboard.reports import company_filter
+
+
+def execute(filters=None):
+    filters = filters or {}
+    min_headcount = cint(filters.get("min_headcount")) if filters.get("min_headcount") not in (None, "") else 3
+    cube = get_cube(company_filter(filters))
+    groups = cube.group("designation", cube.mask(department=filters.get("department")))
+
+    data = [{
+        "designation": designation,
+        "saudi_count": v[1],
+        "total_count": v[0],
+        "saudization_percent": _percent(v[1], v[0]),
+    } for designation, v in groups.items() if v[0] >= min_headcount]
+    data.sort(key=lambda r: (r["saudization_percent"], -r["total_count"], _sort_key_nulls_first(r["designation"])))
+
+    columns = [
+        {"fieldname": "designation", "label": _("Designation"), "fieldtype": "Link", "options": "Designation", "width": 200},
+        {"fieldname": "saudi_count", "label": _("Saudi"), "fieldtype": "Int", "width": 90},
+        {"fieldname": "total_count", "label": _("Total"), "fieldtype": "Int", "width": 90},
+        {"fieldname": "saudization_percent", "label": _("Saudization %"), "fieldtype": "Percent", "width": 120},
+    ]
+    return columns, data
@@ -0,0 +1,24 @@
+frappe.query_reports['Saudization by Nationality Group'] = {
+  filters: [
+    {
+      fieldname: 'company',
+      label: __('Company'),
+      fieldtype: 'Link',
+      options: 'Company',
+      reqd: 1,
+      default: frappe.defaults.get_user_default('Company'),
+    },
+    {
+      fieldname: 'department',
+      label: __('Department'),
+      fieldtype: 'Link',
+      options: 'Department',
+    },
+    {
+      fieldname: 'designation',
+      label: __('Designation'),
+      fieldtype: 'Link',
+      options: 'Designation',
+    },
+  ],
+};
@@ -0,0 +1,29 @@
+from frappe import _
+
+from saudization_dashboard.api import _percent, get_nationality_group_breakdown
+from saudization_dashboard.reports import company_filter
+
+
+def execute(filters=None):
+    filters = filters or {}
+    groups = get_nationality_group_breakdown(
+        company_filter(filters), department=filters.get("department"), designation=filters.get("designation")
+    )
+    total = sum(g["value"] for g in groups)
+    data = [
+        {"nationality_group": g["label"], "headcount": g["value"], "percent": _percent(g["value"], total)}
+        for g in groups
+    ]
+    columns = [
+        {"fieldname": "nationality_group", "label": _("Nationality Group"), "fieldtype": "Data", "width": 160},
+        {"fieldname": "headcount", "label": _("Headcount"), "fieldtype": "Int", "width": 110},
+        {"fieldname": "percent", "label": _("Percent"), "fieldtype": "Percent", "width": 110},
+    ]
+    chart = {
+        "data": {
+            "labels": [r["nationality_group"] or _("Not Set") for r in data],
+            "datasets": [{"name": _("Headcount"), "values": [r["headcount"] for r in data]}],
+        },
+        "type": "donut",
+    }
+    return columns, data, None, chart
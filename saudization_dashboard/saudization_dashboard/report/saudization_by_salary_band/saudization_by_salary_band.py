@@ -0,0 +1,32 @@
+from frappe import _
+
+from saudization_dashboard.api import _percent
+from saudization_dashboard.cube import SALARY_BANDS, get_cube
+from saudization_dashboard.reports import company_filter
+
+
+def execute(filters=None):
+    cube = get_cube(company_filter(filters))
+    groups = cube.group("salary_band", cube.mask())
+
+    data = [{
+        "salary_band": band,
+        "saudi_count": groups[band][1],
+        "total_count": groups[band][0],
+        "saudization_percent": _percent(groups[band][1], groups[band][0]),
+    } for band in SALARY_BANDS if band in groups]
+
+    columns = [
+        {"fieldname": "salary_band", "label": _("Salary Band"), "fieldtype": "Data", "width": 120},
+        {"fieldname": "saudi_count", "label": _("Saudi"), "fieldtype": "Int", "width": 90},
+        {"fieldname": "total_count", "label": _("Total"), "fieldtype": "Int", "width": 90},
+        {"fieldname": "saudization_percent", "label": _("Saudization %"), "fieldtype": "Percent", "width": 120},
+    ]
+    chart = {
+        "data": {
+            "labels": [r["salary_band"] for r in data],
+            "datasets": [{"name": _("Saudization %"), "values": [r["saudization_percent"] for r in data]}],
+        },
+        "type": "bar",
+    }
+    return columns, data, None, chart
@@ -0,0 +1,12 @@
+frappe.query_reports['Saudization Compliance vs Target by Department'] = {
+  filters: [
+    {
+      fieldname: 'company',
+      label: __('Company'),
+      fieldtype: 'Link',
+      options: 'Company',
+      reqd: 1,
+      default: frappe.defaults.get_user_default('Company'),
+    },
+  ],
+};
@@ -0,0 +1,21 @@
+from frappe import _
+
+from saudization_dashboard.api import get_department_compliance
+from saudization_dashboard.reports import company_filter
+
+
+def execute(filters=None):
+    # Every department, as the former Query Report listed them; the dashboard applies policy minimums.
+    data = get_department_compliance(company_filter(filters), min_headcount=0, policy_min=0)
+    # Worst variance first; departments without a target last.
+    data = sorted((dict(r) for r in data), key=lambda r: (r["variance_percent"] is None, r["variance_percent"] or 0, -r["headcount"]))
+
+    columns = [
+        {"fieldname": "department", "label": _("Department"), "fieldtype": "Link", "options": "Department", "width": 200},
+        {"fieldname": "headcount", "label": _("Headcount"), "fieldtype": "Int", "width": 110},
+        {"fieldname": "actual_percent", "label": _("Actual %"), "fieldtype": "Percent", "width": 110},
+        {"fieldname": "target_percent", "label": _("Target %"), "fieldtype": "Percent", "width": 110},
+        {"fieldname": "variance_percent", "label": _("Variance %"), "fieldtype": "Float", "precision": 1, "width": 110},
+        {"fieldname": "status", "label": _("Status"), "fieldtype": "Data", "width": 110},
+    ]
+    return columns, data
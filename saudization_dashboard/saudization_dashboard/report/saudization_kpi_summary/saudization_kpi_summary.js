@@ -0,0 +1,30 @@
+frappe.query_reports['Saudization KPI Summary'] = {
+  filters: [
+    {
+      fieldname: 'company',
+      label: __('Company'),
+      fieldtype: 'Link',
+      options: 'Company',
+      reqd: 1,
+      default: frappe.defaults.get_user_default('Company'),
+    },
+    {
+      fieldname: 'department',
+      label: __('Department'),
+      fieldtype: 'Link',
+      options: 'Department',
+    },
+    {
+      fieldname: 'designation',
+      label: __('Designation'),
+      fieldtype: 'Link',
+      options: 'Designation',
+    },
+    {
+      fieldname: 'nationality_group',
+      label: __('Nationality Group'),
+      fieldtype: 'Select',
+      options: '\nSaudi\nGCC\nNon-GCC\nUnknown',
+    },
+  ],
+};
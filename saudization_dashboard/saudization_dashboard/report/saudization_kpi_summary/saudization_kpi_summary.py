@@ -0,0 +1,27 @@
+from frappe import _
+
+from saudization_dashboard.api import get_kpis
+from saudization_dashboard.reports import company_filter
+
+
+def execute(filters=None):
+    filters = filters or {}
+    kpis = get_kpis(
+        company_filter(filters),
+        department=filters.get("department"),
+        designation=filters.get("designation"),
+        nationality_group=filters.get("nationality_group"),
+    )
+    columns = [
+        {"fieldname": "total_employees", "label": _("Total Employees"), "fieldtype": "Int", "width": 130},
+        {"fieldname": "saudi_employees", "label": _("Saudi Employees"), "fieldtype": "Int", "width": 130},
+        {"fieldname": "non_saudi_employees", "label": _("Non-Saudi Employees"), "fieldtype": "Int", "width": 150},
+        {"fieldname": "saudization_percent", "label": _("Saudization %"), "fieldtype": "Percent", "width": 120},
+        {"fieldname": "target_percent", "label": _("Target %"), "fieldtype": "Percent", "width": 100},
+        {"fieldname": "variance_percent", "label": _("Variance %"), "fieldtype": "Float", "precision": 1, "width": 100},
+        {"fieldname": "avg_salary_saudi", "label": _("Avg Salary (Saudi)"), "fieldtype": "Currency", "width": 140},
+        {"fieldname": "avg_salary_non_saudi", "label": _("Avg Salary (Non-Saudi)"), "fieldtype": "Currency", "width": 160},
+        {"fieldname": "avg_tenure_years_saudi", "label": _("Avg Tenure Years (Saudi)"), "fieldtype": "Float", "precision": 1, "width": 160},
+        {"fieldname": "avg_tenure_years_non_saudi", "label": _("Avg Tenure Years (Non-Saudi)"), "fieldtype": "Float", "precision": 1, "width": 180},
+    ]
+    return columns, [kpis]
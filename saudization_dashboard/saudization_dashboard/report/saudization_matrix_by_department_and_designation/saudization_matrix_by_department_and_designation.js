@@ -0,0 +1,18 @@
+frappe.query_reports['Saudization Matrix by Department and Designation'] = {
+  filters: [
+    {
+      fieldname: 'company',
+      label: __('Company'),
+      fieldtype: 'Link',
+      options: 'Company',
+      reqd: 1,
+      default: frappe.defaults.get_user_default('Company'),
+    },
+    {
+      fieldname: 'min_headcount',
+      label: __('Min Headcount'),
+      fieldtype: 'Int',
+      default: 3,
+    },
+  ],
+};
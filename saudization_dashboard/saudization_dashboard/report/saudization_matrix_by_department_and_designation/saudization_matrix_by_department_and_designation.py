@@ -0,0 +1,23 @@
+from frappe import _
+from frappe.utils import cint
+
+from saudization_dashboard.api import get_matrix_with_targets
+from saudization_dashboard.reports import company_filter
+
+
+def execute(filters=None):
+    filters = filters or {}
+    min_headcount = cint(filters.get("min_headcount")) if filters.get("min_headcount") not in (None, "") else 3
+    # Copies: the endpoint result may be the cached object.
+    data = [dict(r) for r in get_matrix_with_targets(company_filter(filters), min_headcount=min_headcount)]
+
+    columns = [
+        {"fieldname": "department", "label": _("Department"), "fieldtype": "Link", "options": "Department", "width": 180},
+        {"fieldname": "designation", "label": _("Designation"), "fieldtype": "Link", "options": "Designation", "width": 180},
+        {"fieldname": "saudi_count", "label": _("Saudi"), "fieldtype": "Int", "width": 90},
+        {"fieldname": "total_count", "label": _("Total"), "fieldtype": "Int", "width": 90},
+        {"fieldname": "saudization_percent", "label": _("Saudization %"), "fieldtype": "Percent", "width": 120},
+        {"fieldname": "target_percent", "label": _("Target %"), "fieldtype": "Percent", "width": 100},
+        {"fieldname": "variance_percent", "label": _("Variance %"), "fieldtype": "Float", "precision": 1, "width": 100},
+    ]
+    return columns, data
@@ -0,0 +1,18 @@
+frappe.query_reports['Saudization Trend by Joining Month'] = {
+  filters: [
+    {
+      fieldname: 'company',
+      label: __('Company'),
+      fieldtype: 'Link',
+      options: 'Company',
+      reqd: 1,
+      default: frappe.defaults.get_user_default('Company'),
+    },
+    {
+      fieldname: 'months_back',
+      label: __('Months Back'),
+      fieldtype: 'Int',
+      default: 24,
+    },
+  ],
+};
@@ -0,0 +1,26 @@
+from frappe import _
+from frappe.utils import cint
+
+from saudization_dashboard.api import get_trend
+from saudization_dashboard.reports import company_filter
+
+
+def execute(filters=None):
+    """Saudization % and hires per joining month, for employees still active."""
+    filters = filters or {}
+    rows = get_trend(company_filter(filters), months_back=cint(filters.get("months_back")) or 24)
+    data = [{"month": r["label"], "saudization_percent": r["value"], "hires_count": r["hires_count"]} for r in rows]
+
+    columns = [
+        {"fieldname": "month", "label": _("Month"), "fieldtype": "Date", "width": 110},
+        {"fieldname": "saudization_percent", "label": _("Saudization %"), "fieldtype": "Percent", "width": 120},
+        {"fieldname": "hires_count", "label": _("Hires"), "fieldtype": "Int", "width": 90},
+    ]
+    chart = {
+        "data": {
+            "labels": [r["month"] for r in data],
+            "datasets": [{"name": _("Saudization %"), "values": [r["saudization_percent"] for r in data]}],
+        },
+        "type": "line",
+    }
+    return columns, data, None, chart
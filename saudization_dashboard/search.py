@@ -0,0 +1,89 @@
+import frappe
+
+import re
+
+
+FULLTEXT_INDEX = "saudization_employee_name_ft"
+NAME_INDEX = "saudization_employee_name"
+NUMBER_INDEX = "saudization_employee_number"
+FULLTEXT_FLAG_KEY = "saudization_dashboard:employee_fulltext_index"
+
+# InnoDB does not index tokens shorter than innodb_ft_min_token_size (3 by default);
+# shorter words are only matched through the name prefix.
+MIN_TOKEN_LENGTH = 3
+
+# Unicode-aware, so Arabic names tokenize the same way as Latin ones.
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Rank tiers, highest first: exact ID / number, ID / number prefix, name prefix, name token.
+RANK_SQL = """(CASE
+    WHEN e.name = %(q)s OR e.employee_number = %(q)s THEN 3
+    WHEN e.name LIKE %(q_prefix)s OR e.employee_number LIKE %(q_prefix)s THEN 2
+    WHEN e.employee_name LIKE %(q_prefix)s THEN 1
+    ELSE 0 END)"""
+
+
+def _has_index(table, index_name):
+    return bool(frappe.db.sql(f"SHOW INDEX FROM `{table}` WHERE Key_name = %s", index_name))
+
+
+def ensure_search_indexes():
+    """Create the Employee search indexes: B-tree on name / number for prefixes, FULLTEXT on name for tokens."""
+    if not frappe.db.table_exists("tabEmployee"):
+        return
+
+    frappe.db.add_index("Employee", ["employee_name"], NAME_INDEX)
+    frappe.db.add_index("Employee", ["employee_number"], NUMBER_INDEX)
+    if not _has_index("tabEmployee", FULLTEXT_INDEX):
+        frappe.db.sql_ddl(f"ALTER TABLE `tabEmployee` ADD FULLTEXT INDEX `{FULLTEXT_INDEX}` (`employee_name`)")
+    frappe.cache().delete_value(FULLTEXT_FLAG_KEY)
+
+
+def has_fulltext_index():
+    return bool(frappe.cache().get_value(
+        FULLTEXT_FLAG_KEY, generator=lambda: int(_has_index("tabEmployee", FULLTEXT_INDEX))
+    ))
+
+
+def _escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _boolean_query(search):
+    """'moh al-sal' -> '+moh* +sal*': every indexable token required, each as a prefix."""
+    tokens = [t for t in _TOKEN.findall(search) if len(t) >= MIN_TOKEN_LENGTH]
+    return " ".join(f"+{t}*" for t in tokens)
+
+
+def search_condition(params, search):
+    """WHERE fragment for the Employee Drilldown search box; fills the params RANK_SQL needs.
+
+    Each kind of match is its own index-driven SELECT: IDs by primary-key prefix, employee
+    numbers and names by prefix on their B-tree indexes, and name words through the FULLTEXT
+    index. The UNION of those names is materialized and joined back to the filtered rows,
+    instead of ORing the predicates, which no single index can serve. Without the FULLTEXT
+    index (not migrated yet) names fall back to a substring match, which scans.
+    """
+    q = (search or "").strip()
+    params["q"] = q
+    params["q_prefix"] = _escape_like(q) + "%"
+
+    lookups = [
+        "SELECT se.name FROM `tabEmployee` se WHERE se.name LIKE %(q_prefix)s",
+        "SELECT se.name FROM `tabEmployee` se WHERE se.employee_number LIKE %(q_prefix)s",
+        "SELECT se.name FROM `tabEmployee` se WHERE se.employee_name LIKE %(q_prefix)s",
+    ]
+    if has_fulltext_index():
+        boolean = _boolean_query(q)
+        if boolean:
+            params["q_fulltext"] = boolean
+            lookups.append(
+                "SELECT se.name FROM `tabEmployee` se"
+                " WHERE MATCH(se.employee_name) AGAINST (%(q_fulltext)s IN BOOLEAN MODE)"
+            )
+    else:
+        params["q_contains"] = "%" + _escape_like(q) + "%"
+        lookups.append("SELECT se.name FROM `tabEmployee` se WHERE se.employee_name LIKE %(q_contains)s")
+
+    # The derived table keeps the UNION out of the IN itself, so it stays a semi-join.
+    return "e.name IN (SELECT m.name FROM (" + " UNION ".join(lookups) + ") m)"
@@ -0,0 +1,200 @@
+import frappe
+from frappe import _
+
+import hashlib
+from bisect import bisect_left
+from frappe.utils import getdate, now_datetime
+
+from saudization_dashboard import movement, replica
+
+
+SNAPSHOT_DOCTYPE = "Saudization Monthly Snapshot"
+DIRTY_COMPANIES_KEY = "saudization_dashboard:snapshot_dirty_companies"
+REFRESHED_MONTH_KEY = "saudization_dashboard:snapshot_refreshed_month"
+
+DIMENSIONS = ("branch", "department", "designation", "nationality_group")
+SNAPSHOT_FIELDS = ["name", "creation", "modified", "owner", "modified_by",
+                   "month_end", "company", *DIMENSIONS, "total_employees", "saudi_employees"]
+
+
+def snapshot_enabled():
+    """True when dashboards should read month-end figures from the snapshot table."""
+    try:
+        return bool(int(frappe.db.get_single_value("Saudization Settings", "use_snapshot_table") or 0))
+    except Exception:
+        return False
+
+
+def _snapshot_months():
+    try:
+        months = int(frappe.db.get_single_value("Saudization Settings", "snapshot_months") or 0)
+    except Exception:
+        months = 0
+    return months if months > 0 else 36
+
+
+def _month_ends(months, today=None):
+    from saudization_dashboard.api import _last_day_of_month, _month_labels
+    return [_last_day_of_month(m) for m in _month_labels(getdate(today), months)]
+
+
+def mark_company_dirty(company):
+    """Queue a company for the next incremental snapshot refresh."""
+    if company:
+        frappe.cache().sadd(DIRTY_COMPANIES_KEY, company)
+
+
+def _employee_intervals(company, month_ends):
+    return frappe.db.sql(
+        """
+        SELECT
+            IFNULL(e.branch,'') AS branch,
+            IFNULL(e.department,'') AS department,
+            IFNULL(e.designation,'') AS designation,
+            IFNULL(e.saudization_nationality_group,'') AS nationality_group,
+            IFNULL(e.is_saudi,0) AS is_saudi,
+            e.date_of_joining AS date_of_joining,
+            e.relieving_date AS relieving_date,
+            COUNT(*) AS headcount
+        FROM `tabEmployee` e
+        WHERE e.company = %(company)s
+          AND (e.date_of_joining IS NULL OR e.date_of_joining <= %(last)s)
+          AND (e.relieving_date IS NULL OR e.relieving_date > %(first)s)
+          AND (e.date_of_joining IS NULL OR e.relieving_date IS NULL OR e.relieving_date > e.date_of_joining)
+        GROUP BY 1, 2, 3, 4, 5, e.date_of_joining, e.relieving_date
+        """,
+        {"company": company, "first": month_ends[0], "last": month_ends[-1]},
+        as_dict=True,
+    )
+
+
+def bucket_name(month_end, company, dims):
+    """Deterministic row name, so incremental updates can upsert a bucket (see aggregates.py)."""
+    key = "\x1f".join(str(v or "") for v in (month_end, company, *dims))
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def compute_company_snapshot(company, month_ends):
+    """{row name: [month_end, *dims, total, saudi]} for one company from a full recount."""
+    if movement.ledger_enabled():
+        rows = movement.interval_rows([company], dimensions=DIMENSIONS)
+    else:
+        rows = _employee_intervals(company, month_ends)
+
+    # Sweep: each interval adds +1 to the first month-end it covers and -1 after the last one.
+    n = len(month_ends)
+    deltas = {}
+    for r in rows:
+        start = bisect_left(month_ends, r["date_of_joining"]) if r.get("date_of_joining") else 0
+        end = bisect_left(month_ends, r["relieving_date"]) if r.get("relieving_date") else n
+        if start >= end:
+            continue
+        dims = tuple(r.get(d) or None for d in DIMENSIONS)
+        total, saudi = deltas.setdefault(dims, ([0] * (n + 1), [0] * (n + 1)))
+        count = int(r["headcount"] or 0)
+        total[start] += count
+        total[end] -= count
+        if int(r.get("is_saudi") or 0) == 1:
+            saudi[start] += count
+            saudi[end] -= count
+
+    buckets = {}
+    for dims, (total, saudi) in deltas.items():
+        running_total = running_saudi = 0
+        for i, month_end in enumerate(month_ends):
+            running_total += total[i]
+            running_saudi += saudi[i]
+            if running_total <= 0:
+                continue
+            buckets[bucket_name(month_end, company, dims)] = [month_end, *dims, running_total, running_saudi]
+    return buckets
+
+
+def stored_company_snapshot(company):
+    """The company's stored rows in the same shape as `compute_company_snapshot`."""
+    fields = ", ".join(DIMENSIONS)
+    return {
+        r[0]: list(r[1:])
+        for r in frappe.db.sql(
+            f"""
+            SELECT name, month_end, {fields}, total_employees, saudi_employees
+            FROM `tab{SNAPSHOT_DOCTYPE}`
+            WHERE company = %(company)s
+            """,
+            {"company": company},
+        )
+    }
+
+
+def write_company_snapshot(company, buckets, month_ends):
+    now = now_datetime()
+    user = frappe.session.user
+    values = [(name, now, now, user, user, row[0], company, *row[1:]) for name, row in buckets.items()]
+
+    frappe.db.delete(SNAPSHOT_DOCTYPE, {"company": company})
+    if values:
+        frappe.db.bulk_insert(SNAPSHOT_DOCTYPE, fields=SNAPSHOT_FIELDS, values=values)
+    frappe.cache().hset(REFRESHED_MONTH_KEY, company, str(month_ends[-1]))
+    return len(values)
+
+
+def is_current(company, month_ends):
+    """True when the company's rows were built for this window (safe to update incrementally)."""
+    return frappe.cache().hget(REFRESHED_MONTH_KEY, company) == str(month_ends[-1])
+
+
+def refresh_company_snapshot(company, months=None):
+    """Rebuild every month-end row of one company from Employee joining/relieving dates (or the movement ledger)."""
+    month_ends = _month_ends(months or _snapshot_months())
+    if not company or not month_ends:
+        return 0
+    with replica.reads():
+        buckets = compute_company_snapshot(company, month_ends)
+    return write_company_snapshot(company, buckets, month_ends)
+
+
+def dirty_companies():
+    """Companies marked by Employee changes whose stored rows are stale until the next refresh."""
+    return {c.decode() if isinstance(c, bytes) else c for c in frappe.cache().smembers(DIRTY_COMPANIES_KEY) or []}
+
+
+def _companies_needing_refresh():
+    companies = dirty_companies()
+
+    # A new month needs its month-end row even when nobody changed.
+    current = str(_month_ends(1)[-1])
+    for company in frappe.db.sql_list("SELECT DISTINCT company FROM `tabEmployee` WHERE IFNULL(company,'') != ''"):
+        if frappe.cache().hget(REFRESHED_MONTH_KEY, company) != current:
+            companies.add(company)
+    return sorted(companies)
+
+
+def refresh_snapshots():
+    """Scheduled job: refresh only the companies whose employees changed (or that are a month behind)."""
+    if not frappe.db.table_exists("tab" + SNAPSHOT_DOCTYPE):
+        return
+
+    months = _snapshot_months()
+    for company in _companies_needing_refresh():
+        # Clear the mark first so changes made during the rebuild are picked up next run.
+        frappe.cache().srem(DIRTY_COMPANIES_KEY, company)
+        try:
+            refresh_company_snapshot(company, months=months)
+            frappe.db.commit()
+        except Exception:
+            frappe.db.rollback()
+            mark_company_dirty(company)
+            frappe.log_error(frappe.get_traceback(), f"Saudization snapshot refresh failed for {company}")
+
+
+@frappe.whitelist()
+def rebuild_snapshots(company=None):
+    """Queue a snapshot rebuild for one company (or every company)."""
+    frappe.only_for(("System Manager", "HR Manager"))
+    if company:
+        mark_company_dirty(company)
+    else:
+        for c in frappe.get_all("Company", pluck="name"):
+            mark_company_dirty(c)
+    frappe.enqueue("saudization_dashboard.snapshot.refresh_snapshots", queue="long")
+    return {"queued": 1, "message": _("Snapshot refresh queued")}
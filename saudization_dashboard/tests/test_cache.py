@@ -0,0 +1,73 @@
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from saudization_dashboard import cache
+
+
+ENDPOINT = "_test_single_flight"
+
+
+class TestSingleFlight(FrappeTestCase):
+    """A miss that another worker is already computing waits for its result (cache._single_flight)."""
+
+    def setUp(self):
+        self.key = f"{cache.RESULT_PREFIX}:{ENDPOINT}:{frappe.generate_hash(length=12)}"
+        self.lock = cache._redis_key(f"{cache.COMPUTING_PREFIX}:{self.key}")
+        frappe.cache().delete(cache._stats_key(ENDPOINT, "coalesced"))
+
+    def tearDown(self):
+        frappe.cache().delete_value(self.key)
+        frappe.cache().delete(self.lock, cache._stats_key(ENDPOINT, "coalesced"))
+
+    def _coalesced(self):
+        return int(frappe.cache().get(cache._stats_key(ENDPOINT, "coalesced")) or 0)
+
+    def _hold_lock(self):
+        # What the first caller's redis.set(lock, token, nx=True) leaves behind.
+        self.assertTrue(frappe.cache().set(self.lock, "other-worker", nx=True, ex=cache.SINGLE_FLIGHT_LOCK_TTL))
+
+    def test_waiter_gets_first_callers_value(self):
+        self._hold_lock()
+        compute = MagicMock(return_value={"mine": 1})
+
+        def first_caller_finishes(_delay):
+            frappe.cache().set_value(self.key, {"value": {"theirs": 1}}, expires_in_sec=60)
+            frappe.cache().delete(self.lock)
+
+        with patch("saudization_dashboard.cache.time.sleep", side_effect=first_caller_finishes):
+            value = cache._single_flight(ENDPOINT, self.key, 60, compute)
+
+        self.assertEqual(value, {"theirs": 1})
+        compute.assert_not_called()
+        self.assertEqual(self._coalesced(), 1)
+
+    def test_waiter_keeps_polling_while_lock_is_held(self):
+        self._hold_lock()
+        compute = MagicMock(return_value={"mine": 1})
+        polls = []
+
+        def sleep(_delay):
+            polls.append(_delay)
+            if len(polls) == 3:
+                frappe.cache().set_value(self.key, {"value": {"theirs": 1}}, expires_in_sec=60)
+
+        with patch("saudization_dashboard.cache.time.sleep", side_effect=sleep):
+            value = cache._single_flight(ENDPOINT, self.key, 60, compute)
+
+        self.assertEqual(value, {"theirs": 1})
+        self.assertEqual(len(polls), 3)
+        compute.assert_not_called()
+
+    def test_waiter_computes_when_first_caller_failed(self):
+        self._hold_lock()
+        compute = MagicMock(return_value={"mine": 1})
+
+        # The lock is released without a result, as after an exception in the first caller.
+        with patch("saudization_dashboard.cache.time.sleep", side_effect=lambda _d: frappe.cache().delete(self.lock)):
+            value = cache._single_flight(ENDPOINT, self.key, 60, compute)
+
+        self.assertEqual(value, {"mine": 1})
+        compute.assert_called_once()
+        self.assertEqual(self._coalesced(), 0)
@@ -0,0 +1,313 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import getdate, now_datetime
+
+from saudization_dashboard import api, cube, events, movement, parallel, policy, snapshot
+from saudization_dashboard.salary import CURRENT_SALARY_DOCTYPE, CURRENT_SALARY_JOIN
+
+
+COMPANY = "_Test Saudization Engines"
+
+# (name, branch, department, designation, is_saudi, nationality group, joining, relieving, status)
+EMPLOYEES = (
+    ("_T-SDE-01", "Riyadh", "Sales", "Manager", 1, "Saudi", "2020-01-15", None, "Active"),
+    # Joins on a month-end / the day after one.
+    ("_T-SDE-02", "Riyadh", "Sales", "Clerk", 0, "GCC", "2024-03-31", None, "Active"),
+    ("_T-SDE-03", "Jeddah", "Sales", "Clerk", 0, "Non-GCC", "2024-04-01", None, "Active"),
+    # Relieved on a month-end / the day after one.
+    ("_T-SDE-04", "Jeddah", "HR", "Clerk", 1, "Saudi", "2023-06-01", "2024-06-30", "Left"),
+    ("_T-SDE-05", "Riyadh", "HR", "Manager", 0, "Non-GCC", "2022-02-28", "2024-07-01", "Left"),
+    # No joining date and no dimensions.
+    ("_T-SDE-06", None, None, None, 1, "Saudi", None, None, "Active"),
+    # Leap day, no nationality group.
+    ("_T-SDE-07", "Riyadh", "HR", "Clerk", 0, None, "2024-02-29", None, "Active"),
+    # Relieved the day they joined, and before they joined: never counted.
+    ("_T-SDE-08", "Jeddah", "Sales", "Manager", 1, "Saudi", "2024-05-10", "2024-05-10", "Left"),
+    ("_T-SDE-09", "Jeddah", "Sales", "Manager", 0, "Non-GCC", "2024-08-01", "2024-01-01", "Left"),
+    # Joins on the last month-end of the window, with an empty (not NULL) department.
+    ("_T-SDE-10", "Riyadh", "", "Clerk", 1, "Saudi", "2024-12-31", None, "Active"),
+    # Joins after the window / leaves on the month-end before it.
+    ("_T-SDE-11", "Riyadh", "Sales", "Clerk", 0, "GCC", "2025-01-01", None, "Active"),
+    ("_T-SDE-12", "Jeddah", "HR", "Manager", 1, "Saudi", "2019-05-05", "2023-12-31", "Left"),
+    # Employed for one day across a month-end.
+    ("_T-SDE-13", "Jeddah", "Sales", "Clerk", 1, "Saudi", "2024-01-31", "2024-02-01", "Left"),
+    ("_T-SDE-14", "Riyadh", "Sales", "Clerk", 0, "Non-GCC", "2021-11-30", None, "Active"),
+)
+
+SALARIES = {"_T-SDE-01": 18000, "_T-SDE-02": 7500.5, "_T-SDE-03": 4200, "_T-SDE-06": 12000.25, "_T-SDE-14": 5000}
+
+# (name, effective_from, effective_to, default_target_percent)
+POLICIES = (
+    ("_T-SDE-P1", "2020-01-01", "2022-12-31", 20),
+    # Overlaps P1 and outlives P3.
+    ("_T-SDE-P2", "2022-06-01", None, 30),
+    # Newer than P2 but ended: later dates walk back to P2.
+    ("_T-SDE-P3", "2023-01-01", "2023-06-30", 40),
+    # A single day.
+    ("_T-SDE-P4", "2025-01-01", "2025-01-01", 50),
+)
+
+WINDOW_END = date(2024, 12, 15)
+CUBE_TODAY = date(2025, 6, 15)
+
+
+def _around(dates):
+    """Every date with its neighbours, for boundary checks."""
+    out = set()
+    for d in dates:
+        out.update((d - timedelta(days=1), d, d + timedelta(days=1)))
+    return sorted(out)
+
+
+def _employee_dates():
+    return [getdate(d) for row in EMPLOYEES for d in row[6:8] if d]
+
+
+class EngineTestCase(FrappeTestCase):
+    """A fixed employee set for one synthetic company, removed again after the class."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        now, user = now_datetime(), frappe.session.user
+        frappe.db.bulk_insert("Employee", fields=[
+            "name", "employee_name", "first_name", "company", "status", "branch", "department", "designation",
+            "is_saudi", "saudization_nationality_group", "date_of_joining", "relieving_date",
+            "creation", "modified", "owner", "modified_by",
+        ], values=[
+            (name, name, name, COMPANY, status, branch, department, designation, is_saudi, group, joined, relieved,
+             now, now, user, user)
+            for name, branch, department, designation, is_saudi, group, joined, relieved, status in EMPLOYEES
+        ])
+        frappe.db.bulk_insert(CURRENT_SALARY_DOCTYPE, fields=[
+            "name", "employee", "base", "from_date", "creation", "modified", "owner", "modified_by",
+        ], values=[(e, e, base, "2020-01-01", now, now, user, user) for e, base in SALARIES.items()])
+
+        # Engines read Employee on this connection, whatever the site's settings say.
+        cls.patches = [
+            patch("saudization_dashboard.movement.ledger_enabled", return_value=False),
+            patch.object(parallel, "pool_size", return_value=0),
+        ]
+        for p in cls.patches:
+            p.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        for p in cls.patches:
+            p.stop()
+        frappe.db.delete(CURRENT_SALARY_DOCTYPE, {"employee": ("in", list(SALARIES))})
+        frappe.db.delete("Employee", {"company": COMPANY})
+        super().tearDownClass()
+
+
+class TestHeadcountEngine(EngineTestCase):
+    """`_HeadcountEngine` / `_Timeline` against the `_employee_snapshot` query it replaced."""
+
+    def test_counts_match_snapshot_query(self):
+        engine = api._HeadcountEngine([COMPANY])
+        month_ends = snapshot._month_ends(12, today=WINDOW_END)
+        for as_on in sorted(set(month_ends) | set(_around(_employee_dates()))):
+            for branch in (None, "Riyadh", "Jeddah"):
+                expected = api._employee_snapshot(company=COMPANY, branch=branch, as_on=as_on)
+                got = engine.snapshot(as_on, company=COMPANY, branch=branch)
+                with self.subTest(as_on=as_on, branch=branch):
+                    self.assertEqual(got["total_employees"], int(expected.total_employees or 0))
+                    self.assertEqual(got["saudi_employees"], int(expected.saudi_employees or 0))
+                    self.assertEqual(
+                        got["saudization_percent"],
+                        float(expected.saudization_percent) if expected.saudization_percent is not None else None,
+                    )
+
+    def test_scope_totals_match_company_totals(self):
+        engine = api._HeadcountEngine([COMPANY])
+        for as_on in _around(_employee_dates()):
+            self.assertEqual(engine.counts(as_on), engine.counts(as_on, company=COMPANY))
+
+    def test_boundaries(self):
+        engine = api._HeadcountEngine([COMPANY])
+        total = lambda d: engine.counts(getdate(d), company=COMPANY)[0]  # noqa: E731
+        # Counted from the joining date, not on the relieving date.
+        self.assertEqual(total("2024-03-31") - total("2024-03-30"), 1)
+        self.assertEqual(total("2024-06-30") - total("2024-06-29"), -1)
+        # Relieved the day they joined: never counted.
+        self.assertEqual(total("2024-05-10"), total("2024-05-09"))
+
+
+class TestSnapshotSweep(EngineTestCase):
+    """`compute_company_snapshot` month-ends against `_employee_snapshot` on each month-end."""
+
+    def test_month_ends_match_snapshot_query(self):
+        month_ends = snapshot._month_ends(12, today=WINDOW_END)
+        buckets = snapshot.compute_company_snapshot(COMPANY, month_ends).values()
+        branch_at = 1 + snapshot.DIMENSIONS.index("branch")
+
+        for month_end in month_ends:
+            for branch in (None, "Riyadh", "Jeddah"):
+                rows = [b for b in buckets if b[0] == month_end and (branch is None or b[branch_at] == branch)]
+                expected = api._employee_snapshot(company=COMPANY, branch=branch, as_on=month_end)
+                with self.subTest(month_end=month_end, branch=branch):
+                    self.assertEqual(sum(b[-2] for b in rows), int(expected.total_employees or 0))
+                    self.assertEqual(sum(b[-1] for b in rows), int(expected.saudi_employees or 0))
+
+    def test_empty_dimensions_are_null(self):
+        month_ends = snapshot._month_ends(12, today=WINDOW_END)
+        for b in snapshot.compute_company_snapshot(COMPANY, month_ends).values():
+            self.assertNotIn("", b[1:1 + len(snapshot.DIMENSIONS)])
+
+
+class TestSnapshotEngine(EngineTestCase):
+    """`_SnapshotHeadcountEngine` never serves a dirty company's stored rows."""
+
+    EMPLOYEE = "_T-SDE-14"
+
+    def setUp(self):
+        self.patches = [
+            patch.object(snapshot, "snapshot_enabled", return_value=True),
+            # Employee changes mark the snapshot dirty instead of moving counters in place.
+            patch("saudization_dashboard.aggregates.incremental_enabled", return_value=False),
+        ]
+        for p in self.patches:
+            p.start()
+        snapshot.refresh_company_snapshot(COMPANY, months=3)
+        frappe.cache().srem(snapshot.DIRTY_COMPANIES_KEY, COMPANY)
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        frappe.cache().srem(snapshot.DIRTY_COMPANIES_KEY, COMPANY)
+        frappe.db.delete(snapshot.SNAPSHOT_DOCTYPE, {"company": COMPANY})
+        if movement._has_table():
+            frappe.db.delete(movement.MOVEMENT_DOCTYPE, {"employee": self.EMPLOYEE})
+        frappe.db.set_value("Employee", self.EMPLOYEE, {"is_saudi": 0, "saudization_nationality_group": "Non-GCC"})
+
+    def _saudi_counts(self):
+        return api.get_trend_data(company=COMPANY, months_back=3)["overall"]["saudi_counts"]
+
+    def test_edit_shows_before_refresh(self):
+        before = self._saudi_counts()
+
+        doc = frappe.get_doc("Employee", self.EMPLOYEE)
+        doc._doc_before_save = frappe.get_doc("Employee", self.EMPLOYEE)
+        doc.is_saudi, doc.saudization_nationality_group = 1, "Saudi"
+        doc.db_update()
+        events.on_employee_change(doc, "on_update")
+        self.assertIn(COMPANY, snapshot.dirty_companies())
+
+        # Employed since 2021, so every month of the trend gains one Saudi.
+        self.assertEqual(self._saudi_counts(), [n + 1 for n in before])
+
+
+class TestWorkforceCube(EngineTestCase):
+    """`WorkforceCube` group-bys against the Employee queries it replaced."""
+
+    def setUp(self):
+        self.cube = cube._load(COMPANY, CUBE_TODAY)
+
+    def _grouped(self, columns):
+        return {
+            tuple(r[:-3]) if len(r) > 4 else r[0]: [int(r[-3]), int(r[-2] or 0), int(r[-1] or 0)]
+            for r in frappe.db.sql(
+                f"""
+                SELECT {columns},
+                       COUNT(*),
+                       SUM(CASE WHEN e.is_saudi=1 THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN e.is_saudi=0 THEN 1 ELSE 0 END)
+                FROM `tabEmployee` e
+                {CURRENT_SALARY_JOIN}
+                WHERE e.status='Active' AND e.company=%(company)s
+                GROUP BY {columns}
+                """,
+                {"company": COMPANY},
+            )
+        }
+
+    def test_group_by_dimension(self):
+        mask = self.cube.mask()
+        self.assertEqual(self.cube.group("department", mask), self._grouped("e.department"))
+        self.assertEqual(self.cube.group("branch", mask), self._grouped("e.branch"))
+        self.assertEqual(
+            self.cube.group("nationality_group", mask), self._grouped("e.saudization_nationality_group")
+        )
+        self.assertEqual(
+            self.cube.group2("department", "designation", mask), self._grouped("e.department, e.designation")
+        )
+
+    def test_salary_bands(self):
+        bands = self._grouped("""CASE
+            WHEN IFNULL(ls.base,0) <= 5000 THEN 'Up to 5k'
+            WHEN ls.base <= 10000 THEN '5k-10k'
+            WHEN ls.base <= 15000 THEN '10k-15k'
+            ELSE '15k+' END""")
+        self.assertEqual(self.cube.group("salary_band", self.cube.mask()), bands)
+
+    def test_filtered_totals_and_averages(self):
+        mask = self.cube.mask(department="Sales")
+        expected = frappe.db.sql(
+            f"""
+            SELECT COUNT(*),
+                   SUM(CASE WHEN e.is_saudi=1 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN e.is_saudi=0 THEN 1 ELSE 0 END),
+                   AVG(CASE WHEN e.is_saudi=0 THEN ls.base END),
+                   AVG(CASE WHEN e.is_saudi=1 THEN TIMESTAMPDIFF(MONTH, e.date_of_joining, %(today)s) END)
+            FROM `tabEmployee` e
+            {CURRENT_SALARY_JOIN}
+            WHERE e.status='Active' AND e.company=%(company)s AND e.department='Sales'
+            """,
+            {"company": COMPANY, "today": CUBE_TODAY},
+        )[0]
+        self.assertEqual(self.cube.totals(mask), tuple(int(v or 0) for v in expected[:3]))
+        self.assertEqual(self.cube.avg_salary(mask, 0).quantize(Decimal("0.01")), Decimal(expected[3]).quantize(Decimal("0.01")))
+        self.assertEqual(self.cube.avg_tenure_months(mask, 1).quantize(Decimal("0.01")), Decimal(expected[4]).quantize(Decimal("0.01")))
+
+    def test_unknown_filter_matches_nothing(self):
+        self.assertEqual(self.cube.totals(self.cube.mask(department="No Such Department")), (0, 0, 0))
+
+
+class TestPolicyResolver(FrappeTestCase):
+    """`PolicyResolver` bisect against the latest-covering-policy query it replaced."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        now, user = now_datetime(), frappe.session.user
+        frappe.db.bulk_insert("Saudization Policy", fields=[
+            "name", "company", "effective_from", "effective_to", "default_target_percent",
+            "creation", "modified", "owner", "modified_by",
+        ], values=[(name, COMPANY, start, end, target, now, now, user, user) for name, start, end, target in POLICIES])
+        data = policy._load()
+        cls.resolver = policy.PolicyResolver(data["policies"], data["lines"])
+
+    @classmethod
+    def tearDownClass(cls):
+        frappe.db.delete("Saudization Policy", {"company": COMPANY})
+        super().tearDownClass()
+
+    def _baseline(self, as_on):
+        row = frappe.db.sql(
+            """
+            SELECT default_target_percent
+            FROM `tabSaudization Policy`
+            WHERE company=%s
+              AND effective_from <= %s
+              AND (effective_to IS NULL OR effective_to >= %s)
+            ORDER BY effective_from DESC
+            LIMIT 1
+            """,
+            (COMPANY, as_on, as_on),
+        )
+        return row[0][0] if row else None
+
+    def test_target_matches_query(self):
+        edges = [getdate(d) for row in POLICIES for d in row[1:3] if d]
+        for as_on in _around(edges):
+            with self.subTest(as_on=as_on):
+                self.assertEqual(self.resolver.target(COMPANY, as_on), self._baseline(as_on))
+
+    def test_walks_back_past_ended_policy(self):
+        self.assertEqual(self.resolver.policy(COMPANY, date(2023, 7, 1)).name, "_T-SDE-P2")
+        self.assertIsNone(self.resolver.policy(COMPANY, date(2019, 12, 31)))
+        self.assertIsNone(self.resolver.target("_Test No Such Company", date(2024, 1, 1)))
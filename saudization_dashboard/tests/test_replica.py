@@ -0,0 +1,129 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from saudization_dashboard import cache, replica
+
+
+class TestReplicaLagGuard(FrappeTestCase):
+    """The lag guard in replica._switch, against a fake replica answering SHOW SLAVE STATUS."""
+
+    def setUp(self):
+        frappe.cache().delete_value(replica.LAG_KEY)
+        frappe.cache().delete_value(cache.LAST_WRITE_KEY)
+        self.primary = frappe.local.db
+        self.replica = MagicMock()
+
+    def tearDown(self):
+        frappe.local.db = self.primary
+        frappe.local.saudization_replica = False
+        for attr in ("primary_db", "replica_db"):
+            if hasattr(frappe.local, attr):
+                delattr(frappe.local, attr)
+        frappe.cache().delete_value(replica.LAG_KEY)
+        frappe.cache().delete_value(cache.LAST_WRITE_KEY)
+
+    def _connect_replica(self):
+        # What frappe.connect_replica does, with the fake connection.
+        frappe.local.primary_db = frappe.local.db
+        frappe.local.replica_db = self.replica
+        frappe.local.db = self.replica
+        return True
+
+    def _switch(self, status=None, error=None, max_lag=30):
+        if error:
+            self.replica.sql.side_effect = error
+        else:
+            self.replica.sql.return_value = status
+        with patch.object(frappe, "connect_replica", self._connect_replica):
+            return replica._switch(max_lag)
+
+    def assertOnPrimary(self):
+        self.assertIs(frappe.local.db, self.primary)
+        self.assertFalse(replica.active())
+        self.replica.close.assert_called_once()
+
+    def test_switches_when_replica_is_current(self):
+        self.assertTrue(self._switch([{"Seconds_Behind_Master": 2}]))
+        self.assertIs(frappe.local.db, self.replica)
+        self.replica.sql.assert_called_once_with("SHOW SLAVE STATUS", as_dict=True)
+        self.assertEqual(frappe.cache().get_value(replica.LAG_KEY), 2)
+        replica._restore()
+        self.assertOnPrimary()
+
+    def test_lag_above_threshold_stays_on_primary(self):
+        self.assertFalse(self._switch([{"Seconds_Behind_Master": 31}], max_lag=30))
+        self.assertOnPrimary()
+
+    def test_stored_lag_skips_the_connection(self):
+        frappe.cache().set_value(replica.LAG_KEY, 120)
+        with patch.object(frappe, "connect_replica") as connect:
+            self.assertFalse(replica._switch(30))
+        connect.assert_not_called()
+
+    def test_replication_stopped_stays_on_primary(self):
+        self.assertFalse(self._switch([{"Seconds_Behind_Master": None}]))
+        self.assertOnPrimary()
+        self.assertEqual(frappe.cache().get_value(replica.LAG_KEY), replica.UNKNOWN_LAG)
+
+    def test_not_a_replica_stays_on_primary(self):
+        self.assertFalse(self._switch([]))
+        self.assertOnPrimary()
+
+    def test_lag_unreadable_stays_on_primary(self):
+        # e.g. the database user lacks REPLICATION CLIENT
+        self.assertFalse(self._switch(error=Exception("Access denied")))
+        self.assertOnPrimary()
+
+    def test_recent_write_stays_on_primary(self):
+        frappe.cache().set_value(cache.LAST_WRITE_KEY, time.time() - 2)
+        self.assertFalse(self._switch([{"Seconds_Behind_Master": 5}]))
+        self.assertOnPrimary()
+
+    def test_write_older_than_lag_uses_replica(self):
+        frappe.cache().set_value(cache.LAST_WRITE_KEY, time.time() - 60)
+        self.assertTrue(self._switch([{"Seconds_Behind_Master": 5}]))
+        replica._restore()
+        self.assertOnPrimary()
+
+
+class TestReplicaConnection(FrappeTestCase):
+    """The real connect_replica path and lag query; needs `replica_host` in site_config.json."""
+
+    def setUp(self):
+        if not replica.configured():
+            self.skipTest("no replica_host configured for this site")
+        frappe.cache().delete_value(replica.LAG_KEY)
+        frappe.cache().delete_value(cache.LAST_WRITE_KEY)
+        self.primary = frappe.local.db
+
+    def tearDown(self):
+        frappe.cache().delete_value(replica.LAG_KEY)
+        frappe.cache().delete_value(cache.LAST_WRITE_KEY)
+
+    def _server_id(self):
+        return frappe.db.sql("SELECT @@server_id")[0][0]
+
+    def test_reads_run_on_replica(self):
+        primary_id = self._server_id()
+        with patch.object(replica, "_settings", return_value=(True, 3600)):
+            with replica.reads():
+                lag = frappe.cache().get_value(replica.LAG_KEY)
+                if lag == replica.UNKNOWN_LAG:
+                    self.skipTest("replica lag unreadable (replication stopped or no REPLICATION CLIENT privilege)")
+                self.assertTrue(replica.active())
+                self.assertIsNot(frappe.local.db, self.primary)
+                self.assertNotEqual(self._server_id(), primary_id)
+                self.assertGreaterEqual(replica._measure_lag(), 0)
+        self.assertIs(frappe.local.db, self.primary)
+        self.assertFalse(replica.active())
+
+    def test_recent_write_stays_on_primary(self):
+        frappe.cache().set_value(cache.LAST_WRITE_KEY, time.time())
+        with patch.object(replica, "_settings", return_value=(True, 3600)):
+            with replica.reads():
+                self.assertIs(frappe.local.db, self.primary)
+                self.assertFalse(replica.active())
+        self.assertIs(frappe.local.db, self.primary)
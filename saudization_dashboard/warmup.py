@@ -0,0 +1,152 @@
+import frappe
+from frappe import _
+
+import json
+import time
+
+from frappe.utils import cint, now_datetime, today
+
+from saudization_dashboard import cache, hierarchy
+
+
+LOG_DOCTYPE = "Saudization Warmup Log"
+WARMED_DAY_KEY = "saudization_dashboard:warmup_day"
+
+SCOPE_ALL = "Holdings and Companies"
+SCOPE_HOLDINGS = "Holdings Only"
+SCOPE_SELECTED = "Selected Companies"
+
+DEFAULT_HOUR = 5
+DEFAULT_MONTHS_BACK = (12, 24)
+
+
+def _settings():
+    try:
+        return frappe.get_cached_doc("Saudization Settings")
+    except Exception:
+        return None
+
+
+def _months_back(settings):
+    values = []
+    for part in (settings.get("warmup_months_back") or "").replace(";", ",").split(","):
+        if cint(part) > 0 and cint(part) not in values:
+            values.append(cint(part))
+    return values or list(DEFAULT_MONTHS_BACK)
+
+
+def _scope(settings):
+    """(holdings, companies) to warm under the configured scope."""
+    tree = hierarchy.get_hierarchy()
+    holdings = sorted(tree["descendants"])
+    staffed = set(frappe.db.sql_list(
+        "SELECT DISTINCT company FROM `tabEmployee` WHERE status='Active' AND IFNULL(company,'') != ''"
+    ))
+
+    scope = settings.get("warmup_scope") or SCOPE_ALL
+    if scope == SCOPE_HOLDINGS:
+        return holdings, []
+    if scope == SCOPE_SELECTED:
+        selected = {row.company for row in settings.get("warmup_companies") or [] if row.company}
+        return [h for h in holdings if h in selected], sorted(selected & staffed)
+    return holdings, sorted(staffed)
+
+
+def _calls(holdings, companies, months_back):
+    """(label, endpoint, kwargs) for every payload a page requests with its default filters.
+
+    Arguments mirror what the pages send so the cache keys match: as-on dates as strings,
+    empty filters omitted.
+    """
+    from saudization_dashboard import api
+
+    as_on = today()
+    calls = []
+    for m in months_back:
+        calls.append((f"scorecard (all) {m}m", api.get_executive_scorecard, {"as_on_date": as_on, "months_back": m}))
+
+    for holding in holdings:
+        for m in months_back:
+            calls.append((f"scorecard {holding} {m}m", api.get_executive_scorecard,
+                          {"holding_company": holding, "as_on_date": as_on, "months_back": m}))
+            calls.append((f"trend {holding} {m}m", api.get_trend_data,
+                          {"holding_company": holding, "as_on_date": as_on, "months_back": m}))
+        calls.append((f"holding comparison {holding}", api.get_holding_comparison,
+                      {"holding_company": holding, "as_on_date": as_on}))
+
+    for company in companies:
+        for m in months_back:
+            calls.append((f"scorecard {company} {m}m", api.get_executive_scorecard,
+                          {"company": company, "as_on_date": as_on, "months_back": m}))
+            calls.append((f"trend {company} {m}m", api.get_trend_data,
+                          {"company": company, "as_on_date": as_on, "months_back": m}))
+        calls.extend([
+            (f"drilldown {company}", api.get_company_drilldown, {"company": company, "as_on_date": as_on}),
+            (f"drilldown bundle {company}", api.get_company_drilldown_bundle,
+             {"company": company, "as_on_date": as_on, "top_n": 10, "min_headcount": 3}),
+            (f"risky positions {company}", api.get_top_risky_positions,
+             {"company": company, "as_on_date": as_on, "top_n": 10, "min_headcount": 3}),
+            (f"dashboard bundle {company}", api.get_dashboard_bundle, {"company": company}),
+        ])
+    return calls
+
+
+def warm_up(trigger="Scheduler"):
+    """Compute every default dashboard payload into the result cache and log the timings."""
+    settings = _settings()
+    if settings is None or not cache._settings()[0]:
+        return None
+
+    months_back = _months_back(settings)
+    holdings, companies = _scope(settings)
+    started_at = now_datetime()
+    start = time.monotonic()
+
+    details, failed = [], 0
+    for label, fn, kwargs in _calls(holdings, companies, months_back):
+        t0 = time.monotonic()
+        try:
+            fn(**kwargs)
+            error = None
+        except Exception:
+            failed += 1
+            error = frappe.get_traceback()
+            frappe.log_error(error, f"Saudization warm-up failed: {label}")
+        details.append({"payload": label, "seconds": round(time.monotonic() - t0, 3), "ok": error is None})
+
+    log = frappe.get_doc({
+        "doctype": LOG_DOCTYPE,
+        "started_at": started_at,
+        "trigger": trigger,
+        "duration_seconds": round(time.monotonic() - start, 3),
+        "holdings": len(holdings),
+        "companies": len(companies),
+        "payloads": len(details),
+        "failed": failed,
+        "details": json.dumps(details, indent=1),
+    }).insert(ignore_permissions=True)
+    frappe.db.commit()
+    return log.name
+
+
+def run_scheduled_warmup():
+    """Scheduled job (hourly): warm up once a day, in the configured off-hours slot."""
+    settings = _settings()
+    if settings is None or not cint(settings.get("enable_warmup")):
+        return
+
+    hour = settings.get("warmup_hour")
+    hour = DEFAULT_HOUR if hour is None or hour == "" else cint(hour)
+    if now_datetime().hour != hour or frappe.cache().get_value(WARMED_DAY_KEY) == today():
+        return
+
+    frappe.cache().set_value(WARMED_DAY_KEY, today(), expires_in_sec=36 * 60 * 60)
+    warm_up()
+
+
+@frappe.whitelist()
+def warm_up_now():
+    """Queue a warm-up outside the schedule (e.g. right after a bulk import)."""
+    frappe.only_for(("System Manager", "HR Manager"))
+    frappe.enqueue("saudization_dashboard.warmup.warm_up", queue="long", trigger="Manual")
+    return {"queued": 1, "message": _("Dashboard warm-up queued")}